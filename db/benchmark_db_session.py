@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""Micro-benchmark of query latency, with a new default engine for every
+session as get_db_session used to make, and with the shared, tuned engines."""
+
+import random
+import time
+
+from rich import print
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from db.get_db_session import get_db_session
+from db.models import DpdHeadwords, Lookup
+from tools.paths import ProjectPaths
+from tools.tic_toc import tic, toc
+
+sessions = 200
+queries = 5000
+
+
+def get_default_db_session(db_path) -> Session:
+    """A session on a new engine with default pragmas."""
+    db_eng = create_engine(f"sqlite+pysqlite:///{db_path}", echo=False)
+    return sessionmaker(db_eng)()
+
+
+def time_new_sessions(make_session, lemmas: list[str]) -> float:
+    """Mean ms to get a session and run its first query."""
+    start = time.perf_counter()
+    for counter in range(sessions):
+        db_session = make_session()
+        db_session.execute(
+            select(DpdHeadwords.id)
+            .where(DpdHeadwords.lemma_1 == lemmas[counter % len(lemmas)])
+        ).first()
+        db_session.close()
+    return (time.perf_counter() - start) / sessions * 1000
+
+
+def time_queries(db_session: Session, lemmas: list[str], keys: list[str]) -> float:
+    """Mean ms of a headword and a lookup query on one session."""
+    start = time.perf_counter()
+    for counter in range(queries):
+        db_session.execute(
+            select(DpdHeadwords)
+            .where(DpdHeadwords.lemma_1 == lemmas[counter % len(lemmas)])
+        ).first()
+        db_session.execute(
+            select(Lookup)
+            .where(Lookup.lookup_key == keys[counter % len(keys)])
+        ).first()
+    return (time.perf_counter() - start) / queries * 1000
+
+
+def main():
+    tic()
+    print("[bright_yellow]benchmarking db session query latency")
+    pth = ProjectPaths()
+    db_path = pth.dpd_db_path
+
+    db_session = get_db_session(db_path, read_only=True)
+    lemmas = list(db_session.execute(select(DpdHeadwords.lemma_1)).scalars())
+    keys = list(db_session.execute(select(Lookup.lookup_key)).scalars())
+    db_session.close()
+    random.seed(0)
+    random.shuffle(lemmas)
+    random.shuffle(keys)
+
+    before = time_new_sessions(lambda: get_default_db_session(db_path), lemmas)
+    after = time_new_sessions(lambda: get_db_session(db_path, read_only=True), lemmas)
+    print(f"[green]{'new session before':<20}[white]{before:>10.3f} ms")
+    print(f"[green]{'new session after':<20}[white]{after:>10.3f} ms")
+
+    db_session = get_default_db_session(db_path)
+    before = time_queries(db_session, lemmas, keys)
+    db_session.close()
+    db_session = get_db_session(db_path, read_only=True)
+    after = time_queries(db_session, lemmas, keys)
+    db_session.close()
+    print(f"[green]{'queries before':<20}[white]{before:>10.3f} ms")
+    print(f"[green]{'queries after':<20}[white]{after:>10.3f} ms")
+    toc()
+
+
+if __name__ == "__main__":
+    main()
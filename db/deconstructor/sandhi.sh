@@ -20,5 +20,7 @@ poetry install
 # poetry shell
 export PYTHONPATH=$PYTHONPATH:db/deconstructor/tools
 nohup poetry run python3.11 db/deconstructor/sandhi_splitter.py &
+# to continue a run which crashed or was stopped
+# nohup poetry run python3.11 db/deconstructor/sandhi_splitter.py --resume &
 # cat nohup.out
 # zip -j -r output_do.zip db/deconstructor/output/ && zip output_do nohup.out
@@ -4,21 +4,22 @@
 Postprocess the results, find top five most likely candidates and save to database.
 """
 
-import numpy as np
 import pandas as pd
 import pickle
+import resource
+import sys
 
+from collections import Counter
 from difflib import SequenceMatcher
+from itertools import chain
 from rich import print
 
 from sqlalchemy.orm.session import Session
-from tools.lookup_is_another_value import is_another_value
-from tools.update_test_add import update_test_add
 
 from db.get_db_session import get_db_session
-from db.models import Lookup
+from tools.lookup_writer import write_lookup_column
 from tools.paths import ProjectPaths
-from tools.tic_toc import tic, toc
+from tools.tic_toc import tic, toc, bip, bop
 from tools.configger import config_test
 
 
@@ -49,14 +50,36 @@ def main():
     with open(pth.neg_inflections_set_path, "rb") as f:
         neg_inflections_set = pickle.load(f)
 
+    bip()
     matches_df = process_matches(ADD_DO, pth, neg_inflections_set)
+    print(f"[green]{'process matches':<20}[white]{bop():>10}")
+
+    bip()
     top_five_dict = make_top_five_dict(matches_df)
+    print(f"[green]{'top five dict':<20}[white]{bop():>10}")
+
+    bip()
     add_to_dpd_db(db_session, top_five_dict)
+    print(f"[green]{'add to db':<20}[white]{bop():>10}")
+
+    bip()
     make_rule_counts(pth, matches_df)
     letter_counts(pth, matches_df)
+    print(f"[green]{'counts':<20}[white]{bop():>10}")
+
+    print_peak_memory()
     toc()
 
 
+def print_peak_memory() -> None:
+    """Print the peak resident memory of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # bytes on mac, kilobytes on linux
+        peak = peak / 1024
+    print(f"[green]{'peak memory':<20}[white]{peak / 1024:>10,.0f} MB")
+
+
 def process_matches(ADD_DO, pth: ProjectPaths, neg_inflections_set):
     print("[green]processing matches")
 
@@ -84,29 +107,24 @@ def process_matches(ADD_DO, pth: ProjectPaths, neg_inflections_set):
     print("adding word count")
     matches_df["count"] = matches_df.groupby("word")["word"].transform("size")
 
-    def calculate_ratio(original, split):
-        split = split.replace(" + ", "")
-        return SequenceMatcher(None, original, split).ratio()
+    def calculate_ratio(split):
+        if " + " not in split:
+            # identical strings
+            return 1.0
+        return SequenceMatcher(None, split, split.replace(" + ", "")).ratio()
 
     print("adding difference ratio")
-    matches_df["ratio"] = np.vectorize(calculate_ratio)(
-        matches_df["split"], matches_df["split"]
-    )
+    # only calculate once per unique split
+    unique_splits = matches_df["split"].unique()
+    ratios = {split: calculate_ratio(split) for split in unique_splits}
+    matches_df["ratio"] = matches_df["split"].map(ratios)
 
     print("adding neg_count")
-
-    def neg_counter(row):
-        neg_count = 0
-        if " + " in row["split"]:
-            word_list = row["split"].split(" + ")
-            # doesn't matter if the first word is negative
-            word_list.remove(word_list[0])
-            for word in word_list:
-                if word in neg_inflections_set:
-                    neg_count += 1
-        return neg_count
-
-    matches_df["neg_count"] = matches_df.apply(neg_counter, axis=1)
+    # doesn't matter if the first word is negative
+    split_words = (
+        matches_df["split"].str.split(" + ", regex=False).str[1:].explode())
+    matches_df["neg_count"] = (
+        split_words.isin(neg_inflections_set).groupby(level=0).sum())
 
     print("sorting df values")
     matches_df.sort_values(
@@ -129,22 +147,20 @@ def process_matches(ADD_DO, pth: ProjectPaths, neg_inflections_set):
 
 
 def make_top_five_dict(matches_df):
-    print("[green]making top five dict", end=" ")
-    top_five_dict = {}
+    """Top five splits of each word, from the sorted matches_df.
+    Only splits with the same or fewer parts than the best split count."""
 
-    for __index__, i in matches_df.iterrows():
-        if i.word not in top_five_dict:
-            top_five_dict[i.word] = {"splits": [i.split], "splitcount": i.splitcount}
-        else:
-            if len(top_five_dict[i.word]["splits"]) < 5:
-                if i.splitcount <= top_five_dict[i.word]["splitcount"]:
-                    top_five_dict[i.word]["splits"].append(i.split)
-
-    # print(top_five_dict["ārammaṇamūlakasappāyakārīsuttā"])
+    print("[green]making top five dict", end=" ")
 
-    # remove the splitcount
-    for key, value in top_five_dict.items():
-        top_five_dict[key] = value["splits"]
+    best_splitcount = (
+        matches_df.groupby("word", sort=False)["splitcount"].transform("first"))
+    top_five_df = (
+        matches_df[matches_df["splitcount"] <= best_splitcount]
+        .groupby("word", sort=False)
+        .head(5))
+    top_five_dict = {}
+    for word, split in zip(top_five_df["word"], top_five_df["split"]):
+        top_five_dict.setdefault(word, []).append(split)
 
     print(len(top_five_dict))
     return top_five_dict
@@ -153,49 +169,18 @@ def make_top_five_dict(matches_df):
 def add_to_dpd_db(db_session: Session, top_five_dict):
     print("[green]adding to dpd_db", end=" ")
 
-    lookup_table = (db_session.query(Lookup).all())
-    update_set, test_set, add_set = update_test_add(lookup_table, top_five_dict)
-
-    # update test add
-    for i in lookup_table:
-        if i.lookup_key in update_set:
-            i.deconstructor_pack(top_five_dict[i.lookup_key])
-        elif i.lookup_key in test_set:
-            if is_another_value(i, "deconstructor"):
-                i.deconstructor = ""
-            else:
-                db_session.delete(i) 
-
-    db_session.commit()
-
-    # add
-    add_to_db = []
-    for constructed, deconstructed in top_five_dict.items():
-        if constructed in add_set:
-            add_me = Lookup()
-            add_me.lookup_key = constructed
-            add_me.deconstructor_pack(deconstructed)
-            add_to_db.append(add_me)
-
-    db_session.add_all(add_to_db)
-    db_session.commit()
+    counts = write_lookup_column(
+        db_session, "deconstructor", top_five_dict)
     db_session.close()
 
-    print(f"{len(add_to_db)}")
+    print(f"{counts.added}")
 
 
 def make_rule_counts(pth: ProjectPaths, matches_df):
     print("[green]saving rule counts", end=" ")
 
-    rules_list = matches_df[["rules"]].values.tolist()
-    rule_counts = {}
-
-    for sublist in rules_list:
-        for item in sublist[0].split(","):
-            if item not in rule_counts:
-                rule_counts[item] = 1
-            else:
-                rule_counts[item] += 1
+    rule_counts = Counter(chain.from_iterable(
+        rules.split(",") for rules in matches_df["rules"]))
 
     df = pd.DataFrame.from_dict(rule_counts, orient="index", columns=["count"])
     counts_df = df.value_counts()
@@ -209,27 +194,13 @@ def letter_counts(pth: ProjectPaths, df):
     df.drop_duplicates(
         subset=["word", "split"], keep="first", inplace=True, ignore_index=True
     )
-    masterlist = []
-    for row in range(len(df)):
-        split = df.loc[row, "split"]
-        if "<i>" not in split:
-            words = split.split(" + ")
-            for word in words:
-                masterlist.append(word)
-    masterlist = sorted(masterlist)
-
-    letters = {}
-    for i in range(1, 11):
-        letters[i] = []
-
-    for word in masterlist:
-        if len(word) >= 10:
-            letters[10].append(word)
-        else:
-            letters[len(word)].append(word)
+    splits = df.loc[~df["split"].str.contains("<i>", regex=False), "split"]
+    masterlist = pd.Series(
+        sorted(splits.str.split(" + ", regex=False).explode()), dtype=object)
+    word_lengths = masterlist.str.len().clip(upper=10)
 
     for i in range(1, 11):
-        letters_df = pd.DataFrame(letters[i])
+        letters_df = pd.DataFrame(masterlist[word_lengths == i].tolist())
         letters_counts_sorted = letters_df.value_counts()
         letters_path = getattr(pth, f"letters{i}")
         letters_counts_sorted.to_csv(letters_path, sep="\t", header=None)
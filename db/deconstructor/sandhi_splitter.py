@@ -3,14 +3,22 @@
 """Recursive algorithm to deconstruct compounds and split sandhi. """
 
 import cProfile
+import hashlib
+import json
 import logging
+import marisa_trie
 import pandas as pd
 import pickle
+import psutil
 import re
+import sqlite3
+import sys
 import time
 
+from itertools import chain
+from multiprocessing import get_context
 from rich import print
-from typing import Optional, Set, TypedDict, Union, Self
+from typing import Iterator, Optional, Set, TypedDict, Union, Self
 from os import popen
 
 from tools.pali_alphabet import vowels, double_consonants
@@ -142,7 +150,7 @@ def comp(d):
     return f"{d.front}{d.word}{d.back}"
 
 
-def setup(pth: ProjectPaths):
+def setup(pth: ProjectPaths, resume: bool = False):
     print("[green]importing assets")
 
     global rules
@@ -159,12 +167,26 @@ def setup(pth: ProjectPaths):
     with open(pth.all_inflections_set_path, "rb") as f:
         all_inflections_set = pickle.load(f)
 
-    global all_inflections_nofirst
-    global all_inflections_nolast
+    global inflections_trie
+    global inflections_rev_trie
+    global fuzzy_front_trie
+    global fuzzy_back_trie
 
-    (all_inflections_nofirst,
-        all_inflections_nolast) = make_all_inflections_nfl_nll(
-            all_inflections_set)
+    (inflections_trie,
+        inflections_rev_trie,
+        fuzzy_front_trie,
+        fuzzy_back_trie) = make_inflections_tries(all_inflections_set)
+
+    global finished_set
+    global finished_matched_set
+    finished_set = set()
+    finished_matched_set = set()
+
+    if resume and pth.sandhi_checkpoint_path.exists():
+        finished_set, finished_matched_set = load_checkpoint(pth)
+        return
+    elif resume:
+        print("[red]no checkpoint found, starting from the beginning")
 
     # initalise matches.csv
     with open(pth.matches_path, "w") as f:
@@ -174,6 +196,69 @@ def setup(pth: ProjectPaths):
     with open(pth.sandhi_timer_path, "w") as f:
         f.write("")
 
+    # initalise checkpoint journal
+    with open(pth.sandhi_checkpoint_path, "w") as f:
+        f.write("")
+
+
+def load_checkpoint(pth: ProjectPaths) -> tuple[Set[str], Set[str]]:
+    """Read the checkpoint journal of a previous run and return the sets of
+    finished words and matched words. matches.tsv, timer.tsv and the journal
+    are truncated back to the last completed flush, so a partly written batch
+    gets split again."""
+
+    print("[green]resuming from checkpoint", end=" ")
+
+    finished = set()
+    matched = set()
+    batch_finished = set()
+    batch_matched = set()
+    checkpoint_size = 0
+    matches_size = 0
+    timer_size = 0
+    position = 0
+
+    with open(pth.sandhi_checkpoint_path) as f:
+        for line in f:
+            position += len(line.encode())
+            fields = line.rstrip("\n").split("\t")
+            if fields[0] == "#" and len(fields) == 3:
+                matches_size = int(fields[1])
+                timer_size = int(fields[2])
+                checkpoint_size = position
+                finished.update(batch_finished)
+                matched.update(batch_matched)
+                batch_finished = set()
+                batch_matched = set()
+            elif len(fields) == 2:
+                batch_finished.add(fields[0])
+                if fields[1] == "1":
+                    batch_matched.add(fields[0])
+
+    for path, size in [
+        (pth.matches_path, matches_size),
+        (pth.sandhi_timer_path, timer_size),
+        (pth.sandhi_checkpoint_path, checkpoint_size),
+    ]:
+        with open(path, "a") as f:
+            f.truncate(size)
+
+    print(f"[white]{len(finished):,}")
+
+    return finished, matched
+
+
+def save_checkpoint(pth: ProjectPaths, finished_words: list[str]) -> None:
+    """Add the words finished since the last flush to the checkpoint journal,
+    followed by a line with the current size of matches.tsv and timer.tsv."""
+
+    with open(pth.sandhi_checkpoint_path, "a") as f:
+        for word in finished_words:
+            f.write(f"{word}\t{int(word not in unmatched_set)}\n")
+        f.write(
+            f"#\t{pth.matches_path.stat().st_size}"
+            f"\t{pth.sandhi_timer_path.stat().st_size}\n")
+
 
 def import_sandhi_rules(pth: ProjectPaths):
     print("[green]importing sandhi rules", end=" ")
@@ -211,7 +296,28 @@ def import_sandhi_rules(pth: ProjectPaths):
     else:
         print("[white]ok")
 
-    return sandhi_rules
+    return make_sandhi_rules_index(sandhi_rules)
+
+
+def make_sandhi_rules_index(
+    sandhi_rules: dict[int, dict[str, str]]
+) -> dict[tuple[str, str], list[tuple[str, str, int]]]:
+    """Compile the sandhi rules into an index of
+    (last letter, first letter) : [(ch1, ch2, rule_no), ...]
+    so the splitting functions only loop over the rules which can apply.
+    Rules keep their original order within each list."""
+
+    print("[green]indexing sandhi rules", end=" ")
+
+    rules_index: dict[tuple[str, str], list[tuple[str, str, int]]] = {}
+    for rule_no, rule in sandhi_rules.items():
+        key = (rule["chA"], rule["chB"])
+        rules_index.setdefault(key, []).append(
+            (rule["ch1"], rule["ch2"], rule_no))
+
+    print(f"[white]{len(rules_index):,}")
+
+    return rules_index
 
 
 def make_shortlist_set(pth: ProjectPaths):
@@ -228,23 +334,55 @@ def make_shortlist_set(pth: ProjectPaths):
     return shortlist_set
 
 
-def make_all_inflections_nfl_nll(all_inflections_set):
-    """all inflections with no first letter, no last letter"""
+def make_inflections_tries(
+    all_inflections_set: Set[str]
+) -> tuple[marisa_trie.Trie, marisa_trie.Trie, marisa_trie.Trie, marisa_trie.Trie]:
+    """Compact tries over all inflections, used to find all the cut points
+    in a word in a single walk, rather than slicing and hashing every substring.
+    1. all inflections
+    2. all inflections reversed
+    3. all inflections + all inflections with no last letter
+    4. all inflections + all inflections with no first letter, reversed"""
+
+    print("[green]making all inflections tries", end=" ")
+
+    inflections_trie = marisa_trie.Trie(all_inflections_set)
+    inflections_rev_trie = marisa_trie.Trie(
+        inflection[::-1] for inflection in all_inflections_set)
+    fuzzy_front_trie = marisa_trie.Trie(chain(
+        all_inflections_set,
+        (inflection[:-1] for inflection in all_inflections_set)))
+    fuzzy_back_trie = marisa_trie.Trie(chain(
+        (inflection[::-1] for inflection in all_inflections_set),
+        (inflection[1:][::-1] for inflection in all_inflections_set)))
+
+    print(f"[white]{len(fuzzy_front_trie):,}")
 
-    print("[green]making all inflections nfl & nll", end=" ")
+    return (
+        inflections_trie, inflections_rev_trie,
+        fuzzy_front_trie, fuzzy_back_trie)
 
-    all_inflections_nofirst = set()
-    all_inflections_nolast = set()
 
-    for inflection in all_inflections_set:
-        # no first letter
-        all_inflections_nofirst.add(inflection[1:])
-        # no last letter
-        all_inflections_nolast.add(inflection[:-1])
+def front_cut_points(trie: marisa_trie.Trie, word: str) -> list[str]:
+    """All the words in the trie found at the front of the word,
+    longest first, in the same order as word[:-i] for i in range(len(word))."""
 
-    print(f"[white]{len(all_inflections_nofirst):,}")
+    cut_points = [
+        prefix for prefix in reversed(trie.prefixes(word))
+        if 0 < len(prefix) < len(word)]
+    if word and "" in trie:
+        # word[:-0] is an empty string
+        cut_points.insert(0, "")
+    return cut_points
 
-    return all_inflections_nofirst, all_inflections_nolast
+
+def back_cut_points(rev_trie: marisa_trie.Trie, word: str) -> list[str]:
+    """All the words in the reversed trie found at the back of the word,
+    longest first, in the same order as word[i:] for i in range(len(word))."""
+
+    return [
+        suffix[::-1] for suffix in reversed(rev_trie.prefixes(word[::-1]))
+        if suffix]
 
 
 def main():
@@ -273,59 +411,76 @@ def main():
         format='%(asctime)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S')
 
+    # resume a previous run from its checkpoint journal
+    resume = "--resume" in sys.argv
+
     # make globally accessable vaiables
-    setup(pth)
+    setup(pth, resume)
 
     global matches_dict
-    with open(pth.matches_dict_path, "rb") as f:
-        matches_dict = pickle.load(f)
+    if finished_set:
+        # manual corrections were already saved in the first flush
+        matches_dict = {}
+    else:
+        with open(pth.matches_dict_path, "rb") as f:
+            matches_dict = pickle.load(f)
 
     time_dict = {}
     global unmatched_len_init
     unmatched_len_init = len(unmatched_set)
 
-    print(f"[green]splitting sandhi [white]{unmatched_len_init:,}")
+    unmatched_set.difference_update(finished_matched_set)
+    words_to_split = [
+        word for word in unmatched_set if word not in finished_set]
 
-    for counter, word in enumerate(unmatched_set.copy()):
+    # only split words which are not in the cache of previous runs
+    inputs_hash = make_inputs_hash(pth)
+    split_cache = load_split_cache(pth, inputs_hash)
+    cached_words = [word for word in words_to_split if word in split_cache]
+    words_to_split = [
+        word for word in words_to_split if word not in split_cache]
 
-        bip()
-        logging.info(word)
-
-        global w
-        w = Word(word)
-        matches_dict[word] = []
-
-        # d is a dictionary of data accessed using dot notation
-        d = DotDict(default_dot_dict_init(counter, word))
-
-        # two word sandhi
-        d = two_word_sandhi(d)
-
-        # iti + assa / assā
-        if d.word.endswith(("tissa", "tissā")):
-            d = remove_tissa(d)
+    print(f"[green]cached words [white]{len(cached_words):,}")
+    print(f"[green]splitting sandhi [white]{len(words_to_split):,}")
 
-        # three word sandhi
-        if not w.matches:
-            d = three_word_sandhi(d)
-
-        # # recursive removal
-        if not w.matches:
-            recursive_removal(d)
-
-        time_dict[word] = bop()
-
-        if d.count % 1000 == 0:
+    start = len(finished_set)
+    if config_test("deconstructor", "multiprocess", "yes"):
+        new_results = split_words_multiprocess(
+            words_to_split, start + len(cached_words))
+    else:
+        new_results = split_words_serial(
+            words_to_split, start + len(cached_words))
+    results = chain(
+        load_cached_words(cached_words, split_cache, start), new_results)
+
+    # words finished since the last flush, and those complete enough to cache
+    finished_words = []
+    cache_words = []
+
+    for counter, word, elapsed, overtime in results:
+        finished_words.append(word)
+        # cached words weren't split, so they have no time
+        if elapsed is not None:
+            time_dict[word] = elapsed
+        # overtime words were cut short, so split them again next run
+        if not overtime:
+            cache_words.append(word)
+
+        if counter % 1000 == 0:
             print(
-                f"{d.count:>10,} / {unmatched_len_init:<10,}{d.word}")
+                f"{counter:>10,} / {unmatched_len_init:<10,}{word}")
 
             save_matches(pth, matches_dict)
             try:
                 save_timer_dict(pth, time_dict)
             except KeyError:
                 pass
+            save_split_cache(pth, inputs_hash, cache_words)
+            save_checkpoint(pth, finished_words)
             matches_dict = {}
             time_dict = {}
+            finished_words = []
+            cache_words = []
 
     save_matches(pth, matches_dict)
 
@@ -333,6 +488,9 @@ def main():
         save_timer_dict(pth, time_dict)
     except KeyError as e:
         print(f"[red] {e}")
+    save_split_cache(pth, inputs_hash, cache_words)
+    save_checkpoint(pth, finished_words)
+    prune_split_cache(pth, inputs_hash)
 
     summary(pth)
     toc()
@@ -345,6 +503,106 @@ def main():
             popen("tuna profiler.prof")
 
 
+def split_word(counter: int, word: str) -> bool:
+    """Run all the splitting functions on a single word,
+    adding the results to matches_dict.
+    Returns True if the word ran overtime, so its matches may be incomplete."""
+
+    global w
+    w = Word(word)
+    matches_dict[word] = []
+
+    # d is a dictionary of data accessed using dot notation
+    d = DotDict(default_dot_dict_init(counter, word))
+
+    # two word sandhi
+    d = two_word_sandhi(d)
+
+    # iti + assa / assā
+    if d.word.endswith(("tissa", "tissā")):
+        d = remove_tissa(d)
+
+    # three word sandhi
+    if not w.matches:
+        d = three_word_sandhi(d)
+
+    # # recursive removal
+    if not w.matches:
+        recursive_removal(d)
+
+    return w.overtime
+
+
+def load_cached_words(
+    cached_words: list[str],
+    split_cache: dict[str, list],
+    start: int
+) -> Iterator[tuple[int, str, Optional[str], bool]]:
+    """Add the matches of words split in a previous run
+    with the same inputs. They have no split time."""
+
+    for counter, word in enumerate(cached_words, start=start):
+        matches = split_cache[word]
+        matches_dict[word] = matches
+        if matches:
+            unmatched_set.discard(word)
+        yield counter, word, None, False
+
+
+def split_words_serial(
+    words_to_split: list[str],
+    start: int
+) -> Iterator[tuple[int, str, Optional[str], bool]]:
+    """Split all unmatched words one after the other in this process."""
+
+    for counter, word in enumerate(words_to_split, start=start):
+        bip()
+        logging.info(word)
+        overtime = split_word(counter, word)
+        yield counter, word, bop(), overtime
+
+
+def split_word_worker(item: tuple[int, str]) -> tuple[str, list, str, bool]:
+    """Split a single word inside a pool worker.
+    The worker is forked after setup(), so it inherits all_inflections_set,
+    rules and the inflections tries (front, reversed and fuzzy front / back)
+    without any pickling."""
+
+    global matches_dict
+    counter, word = item
+    bip()
+    matches_dict = {}
+    overtime = split_word(counter, word)
+    return word, matches_dict[word], bop(), overtime
+
+
+def split_words_multiprocess(
+    words_to_split: list[str],
+    start: int
+) -> Iterator[tuple[int, str, Optional[str], bool]]:
+    """Split all unmatched words across a pool of forked processes.
+    Results come back in the same order as a serial run, and this process
+    is the only one which updates matches_dict and unmatched_set."""
+
+    num_logical_cores = psutil.cpu_count()
+    print(f"[green]processes [white]{num_logical_cores}")
+
+    ctx = get_context("fork")
+    with ctx.Pool(processes=num_logical_cores) as pool:
+        results = pool.imap(
+            split_word_worker,
+            enumerate(words_to_split, start=start),
+            chunksize=50)
+
+        for counter, (word, matches, elapsed, overtime) in enumerate(
+                results, start=start):
+            logging.info(word)
+            matches_dict[word] = matches
+            if matches:
+                unmatched_set.discard(word)
+            yield counter, word, elapsed, overtime
+
+
 def save_matches(pth: ProjectPaths, matches_dict):
 
     with open(pth.matches_path, "a") as f:
@@ -356,7 +614,98 @@ def save_matches(pth: ProjectPaths, matches_dict):
                 f.write("\n")
 
 
+def make_inputs_hash(pth: ProjectPaths) -> str:
+    """Hash everything which can change the result of splitting a word:
+    all inflections, sandhi rules, exceptions, manual corrections
+    and the global dampers."""
+
+    print("[green]hashing splitter inputs", end=" ")
+
+    inputs_hash = hashlib.sha256()
+    for inflection in sorted(all_inflections_set):
+        inputs_hash.update(f"{inflection}\n".encode())
+    for path in [
+        pth.sandhi_rules_path,
+        pth.sandhi_exceptions_path,
+        pth.manual_corrections_path,
+    ]:
+        with open(path, "rb") as f:
+            inputs_hash.update(f.read())
+    dampers = [
+        clean_list_max_length, fuzzy_list_max_length,
+        clean_word_min_length, fuzzy_word_min_length,
+        max_matches, max_recursions, max_word_length]
+    inputs_hash.update(json.dumps(dampers).encode())
+
+    print(f"[white]{inputs_hash.hexdigest()[:10]}")
+
+    return inputs_hash.hexdigest()
+
+
+def connect_split_cache(pth: ProjectPaths) -> sqlite3.Connection:
+    conn = sqlite3.connect(pth.sandhi_cache_path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS split_cache (
+            word TEXT NOT NULL,
+            inputs_hash TEXT NOT NULL,
+            matches TEXT NOT NULL,
+            PRIMARY KEY (word, inputs_hash)
+        )""")
+    return conn
+
+
+def load_split_cache(pth: ProjectPaths, inputs_hash: str) -> dict[str, list]:
+    """Load the matches of all words split with the same inputs."""
+
+    print("[green]loading split cache", end=" ")
+
+    conn = connect_split_cache(pth)
+    split_cache = {
+        word: [tuple(match) for match in json.loads(matches)]
+        for word, matches in conn.execute(
+            "SELECT word, matches FROM split_cache WHERE inputs_hash = ?",
+            (inputs_hash,))
+    }
+    conn.close()
+
+    print(f"[white]{len(split_cache):,}")
+
+    return split_cache
+
+
+def save_split_cache(
+    pth: ProjectPaths,
+    inputs_hash: str,
+    cache_words: list[str]
+) -> None:
+    """Save the matches of the words finished since the last flush,
+    apart from words which ran overtime."""
+
+    conn = connect_split_cache(pth)
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO split_cache VALUES (?, ?, ?)",
+            [
+                (word, inputs_hash, json.dumps(matches_dict[word]))
+                for word in cache_words
+            ])
+    conn.close()
+
+
+def prune_split_cache(pth: ProjectPaths, inputs_hash: str) -> None:
+    """Remove words split with old inputs after a complete run."""
+
+    conn = connect_split_cache(pth)
+    with conn:
+        conn.execute(
+            "DELETE FROM split_cache WHERE inputs_hash != ?", (inputs_hash,))
+    conn.execute("VACUUM")
+    conn.close()
+
+
 def save_timer_dict(pth: ProjectPaths, time_dict):
+    if not time_dict:
+        return
     df = pd.DataFrame.from_dict(time_dict, orient="index")
     df = df.sort_values(by=0, ascending=False)
     df.to_csv(
@@ -771,45 +1120,39 @@ def remove_apievaiti(d: DotDict) -> DotDict:
             wordA = d.word[:-2]
             wordB = d.word[-2:]
 
-        for rule in rules:
-            chA = rules[rule]["chA"]
-            chB = rules[rule]["chB"]
-            ch1 = rules[rule]["ch1"]
-            ch2 = rules[rule]["ch2"]
-
-            try:
-                wordA_lastletter = wordA[-1]
-            except Exception:
-                wordA_lastletter = wordA
-            wordB_firstletter = wordB[0]
-
-            if (wordA_lastletter == chA and
-                    wordB_firstletter == chB):
-                word1 = wordA[:-1] + ch1
-                word2 = ch2 + wordB[1:]
-
-                if word2 in ["api", "eva", "iti"]:
-                    d.word = d.word.replace(wordB, "")
-                    d.word = d.word.replace(wordA, word1)
-                    d.back = f" + {word2}{d.back}"
-                    d.comm = "apievaiti"
-                    d.rules_back = f"{rule+2},{d.rules_back}"
-                    d.path += " > apievaiti"
+        try:
+            wordA_lastletter = wordA[-1]
+        except Exception:
+            wordA_lastletter = wordA
+        wordB_firstletter = wordB[0]
+
+        for ch1, ch2, rule in rules.get(
+                (wordA_lastletter, wordB_firstletter), []):
+            word1 = wordA[:-1] + ch1
+            word2 = ch2 + wordB[1:]
+
+            if word2 in ["api", "eva", "iti"]:
+                d.word = d.word.replace(wordB, "")
+                d.word = d.word.replace(wordA, word1)
+                d.back = f" + {word2}{d.back}"
+                d.comm = "apievaiti"
+                d.rules_back = f"{rule+2},{d.rules_back}"
+                d.path += " > apievaiti"
 
-                    if d.word in all_inflections_set:
-                        d.comm = f"match! = {comp(d)}"
+                if d.word in all_inflections_set:
+                    d.comm = f"match! = {comp(d)}"
 
-                        if comp(d) not in w.matches:
-                            matches_dict[d.init] += [
-                                (comp(d), "xword-pi", "apievaiti", d.path)]
-                            w.matches.add(comp(d))
-                            d.matches.add(comp(d))
-                            unmatched_set.discard(d.init)
+                    if comp(d) not in w.matches:
+                        matches_dict[d.init] += [
+                            (comp(d), "xword-pi", "apievaiti", d.path)]
+                        w.matches.add(comp(d))
+                        d.matches.add(comp(d))
+                        unmatched_set.discard(d.init)
 
-                    else:
-                        recursive_removal(d)
+                else:
+                    recursive_removal(d)
 
-                    d = DotDict(d_orig)
+                d = DotDict(d_orig)
 
     return d_orig
 
@@ -822,12 +1165,7 @@ def remove_lwff_clean(d: DotDict) -> DotDict:
 
     if comp(d) not in w.matches:
 
-        lwff_clean_list = []
-
-        for i in range(len(d.word)):
-            if d.word[:-i] in all_inflections_set:
-                lwff_clean_list.append(d.word[:-i])
-
+        lwff_clean_list = front_cut_points(inflections_trie, d.word)
         lwff_clean_list = lwff_clean_list[:clean_list_max_length]
 
         for lwff_clean in lwff_clean_list:
@@ -865,12 +1203,7 @@ def remove_lwfb_clean(d: DotDict) -> DotDict:
 
     if comp(d) not in w.matches:
 
-        lwfb_clean_list = []
-
-        for i in range(len(d.word)):
-            if d.word[i:] in all_inflections_set:
-                lwfb_clean_list.append(d.word[i:])
-
+        lwfb_clean_list = back_cut_points(inflections_rev_trie, d.word)
         lwfb_clean_list = lwfb_clean_list[:clean_list_max_length]
 
         for lwfb_clean in lwfb_clean_list:
@@ -910,12 +1243,7 @@ def remove_lwff_fuzzy(d: DotDict) -> DotDict:
         lwff_fuzzy_list = []
 
         if len(d.word) >= fuzzy_word_min_length:
-            for i in range(len(d.word)):
-                fuzzy_word = d.word[:-i]
-
-                if (fuzzy_word in all_inflections_nolast or
-                        fuzzy_word in all_inflections_set):
-                    lwff_fuzzy_list.append(fuzzy_word)
+            lwff_fuzzy_list = front_cut_points(fuzzy_front_trie, d.word)
 
         lwff_fuzzy_list = lwff_fuzzy_list[:fuzzy_list_max_length]
 
@@ -935,41 +1263,35 @@ def remove_lwff_fuzzy(d: DotDict) -> DotDict:
                 except Exception:
                     wordB_firstletter = ""
 
-                for rule in rules:
-                    chA = rules[rule]["chA"]
-                    chB = rules[rule]["chB"]
-                    ch1 = rules[rule]["ch1"]
-                    ch2 = rules[rule]["ch2"]
-
-                    if (wordA_lastletter == chA and
-                            wordB_firstletter == chB):
-                        word1 = wordA_fuzzy[:-1] + ch1
-                        word2 = ch2 + wordB_fuzzy[1:]
-
-                        if word1 in all_inflections_set:
-                            d.path += " > front_fuzzy"
-                            d.word = re.sub(
-                                f"^{wordA_fuzzy}", "", d.word, count=1)
-                            d.word = re.sub(
-                                f"^{wordB_fuzzy}", word2, d.word, count=1)
-                            d.front = f"{d.front}{word1} + "
-                            d.comm = f"lwff_fuzzy [yellow]{word1} + {word2}"
-                            d.rules_front += f"{rule+2},"
+                for ch1, ch2, rule in rules.get(
+                        (wordA_lastletter, wordB_firstletter), []):
+                    word1 = wordA_fuzzy[:-1] + ch1
+                    word2 = ch2 + wordB_fuzzy[1:]
+
+                    if word1 in all_inflections_set:
+                        d.path += " > front_fuzzy"
+                        d.word = re.sub(
+                            f"^{wordA_fuzzy}", "", d.word, count=1)
+                        d.word = re.sub(
+                            f"^{wordB_fuzzy}", word2, d.word, count=1)
+                        d.front = f"{d.front}{word1} + "
+                        d.comm = f"lwff_fuzzy [yellow]{word1} + {word2}"
+                        d.rules_front += f"{rule+2},"
 
-                            if d.word in all_inflections_set:
-                                if comp(d) not in w.matches:
-                                    matches_dict[d.init] += [(
-                                        comp(d), "xword-fff",
-                                        f"{comp_rules(d)}", d.path)]
-                                    w.matches.add(comp(d))
-                                    d.matches.add(comp(d))
-                                    unmatched_set.discard(d.init)
+                        if d.word in all_inflections_set:
+                            if comp(d) not in w.matches:
+                                matches_dict[d.init] += [(
+                                    comp(d), "xword-fff",
+                                    f"{comp_rules(d)}", d.path)]
+                                w.matches.add(comp(d))
+                                d.matches.add(comp(d))
+                                unmatched_set.discard(d.init)
 
-                            else:
-                                d.comm = f"recursing lwff_fuzzy {comp(d)}"
-                                recursive_removal(d)
+                        else:
+                            d.comm = f"recursing lwff_fuzzy {comp(d)}"
+                            recursive_removal(d)
 
-                            d = DotDict(d_orig)
+                        d = DotDict(d_orig)
 
     return d_orig
 
@@ -985,12 +1307,7 @@ def remove_lwfb_fuzzy(d: DotDict) -> DotDict:
         lwfb_fuzzy_list = []
 
         if len(d.word) > 0:
-            for i in range(len(d.word)):
-                fuzzy_word = d.word[i:]
-
-                if (fuzzy_word in all_inflections_nofirst or
-                        fuzzy_word in all_inflections_set):
-                    lwfb_fuzzy_list.append(fuzzy_word)
+            lwfb_fuzzy_list = back_cut_points(fuzzy_back_trie, d.word)
 
         lwfb_fuzzy_list = lwfb_fuzzy_list[:fuzzy_list_max_length]
 
@@ -1009,43 +1326,37 @@ def remove_lwfb_fuzzy(d: DotDict) -> DotDict:
                 except Exception:
                     wordB_firstletter = ""
 
-                for rule in rules:
-                    chA = rules[rule]["chA"]
-                    chB = rules[rule]["chB"]
-                    ch1 = rules[rule]["ch1"]
-                    ch2 = rules[rule]["ch2"]
-
-                    if (wordA_lastletter == chA and
-                            wordB_firstletter == chB):
-                        word1 = wordA_fuzzy[:-1] + ch1
-                        word2 = ch2 + wordB_fuzzy[1:]
-
-                        if word2 in all_inflections_set:
-                            d.path += " > back_fuzzy"
-                            d.word = re.sub(
-                                f"{wordB_fuzzy}$", "", d.word, count=1)
-                            d.word = re.sub(
-                                f"{wordA_fuzzy}$", word1, d.word, count=1)
-                            # d.back = re.sub(
-                            #     f"{wordB_fuzzy}$", word2, d.back, count=1)
-                            d.back = f" + {word2}{d.back}"
-                            d.comm = f"lwfb_fuzzy [yellow]{word1} + {word2}"
-                            d.rules_back = f"{rule+2},{d.rules_back}"
-
-                            if d.word in all_inflections_set:
-                                if comp(d) not in w.matches:
-                                    matches_dict[d.init] += [(
-                                        comp(d), "xword-fbf",
-                                        f"{comp_rules(d)}", d.path)]
-                                    w.matches.add(comp(d))
-                                    d.matches.add(comp(d))
-                                    unmatched_set.discard(d.init)
+                for ch1, ch2, rule in rules.get(
+                        (wordA_lastletter, wordB_firstletter), []):
+                    word1 = wordA_fuzzy[:-1] + ch1
+                    word2 = ch2 + wordB_fuzzy[1:]
+
+                    if word2 in all_inflections_set:
+                        d.path += " > back_fuzzy"
+                        d.word = re.sub(
+                            f"{wordB_fuzzy}$", "", d.word, count=1)
+                        d.word = re.sub(
+                            f"{wordA_fuzzy}$", word1, d.word, count=1)
+                        # d.back = re.sub(
+                        #     f"{wordB_fuzzy}$", word2, d.back, count=1)
+                        d.back = f" + {word2}{d.back}"
+                        d.comm = f"lwfb_fuzzy [yellow]{word1} + {word2}"
+                        d.rules_back = f"{rule+2},{d.rules_back}"
+
+                        if d.word in all_inflections_set:
+                            if comp(d) not in w.matches:
+                                matches_dict[d.init] += [(
+                                    comp(d), "xword-fbf",
+                                    f"{comp_rules(d)}", d.path)]
+                                w.matches.add(comp(d))
+                                d.matches.add(comp(d))
+                                unmatched_set.discard(d.init)
 
-                            else:
-                                d.comm = f"recursing lwfb_fuzzy {comp(d)}"
-                                recursive_removal(d)
+                        else:
+                            d.comm = f"recursing lwfb_fuzzy {comp(d)}"
+                            recursive_removal(d)
 
-                            d = DotDict(d_orig)
+                        d = DotDict(d_orig)
 
     return d_orig
 
@@ -1093,36 +1404,30 @@ def two_word_sandhi(d: DotDict) -> DotDict:
 
             # bla* *lah
 
-            for rule in rules:
-                chA = rules[rule]["chA"]
-                chB = rules[rule]["chB"]
-                ch1 = rules[rule]["ch1"]
-                ch2 = rules[rule]["ch2"]
-
-                if (wordA_lastletter == chA and
-                        wordB_firstletter == chB):
-                    word1 = wordA[:-1] + ch1
-                    word2 = ch2 + wordB[1:]
+            for ch1, ch2, rule in rules.get(
+                    (wordA_lastletter, wordB_firstletter), []):
+                word1 = wordA[:-1] + ch1
+                word2 = ch2 + wordB[1:]
 
-                    if (word1 in all_inflections_set and
-                            word2 in all_inflections_set):
-                        d.front = f"{d.front}{word1} + "
-                        d.word = word2
-                        d.rules_front += f"{rule+2},"
-                        d.path += " > 2.2"
-                        if d.comm == "start":
-                            d.comm = "start2.2"
-                        else:
-                            d.comm = "x2.2"
+                if (word1 in all_inflections_set and
+                        word2 in all_inflections_set):
+                    d.front = f"{d.front}{word1} + "
+                    d.word = word2
+                    d.rules_front += f"{rule+2},"
+                    d.path += " > 2.2"
+                    if d.comm == "start":
+                        d.comm = "start2.2"
+                    else:
+                        d.comm = "x2.2"
 
-                        if comp(d) not in w.matches:
-                            matches_dict[d.init] += [
-                                (comp(d), d.comm, f"{comp_rules(d)}", d.path)]
-                            w.matches.add(comp(d))
-                            d.matches.add(comp(d))
-                            unmatched_set.discard(d.init)
+                    if comp(d) not in w.matches:
+                        matches_dict[d.init] += [
+                            (comp(d), d.comm, f"{comp_rules(d)}", d.path)]
+                        w.matches.add(comp(d))
+                        d.matches.add(comp(d))
+                        unmatched_set.discard(d.init)
 
-                    d = DotDict(d_orig)
+                d = DotDict(d_orig)
 
     return d_orig
 
@@ -1186,130 +1491,106 @@ def three_word_sandhi(d: DotDict) -> DotDict:
                 # blah bla* *lah
                 if wordA in all_inflections_set:
 
-                    for rule in rules:
-                        chA = rules[rule]["chA"]
-                        chB = rules[rule]["chB"]
-                        ch1 = rules[rule]["ch1"]
-                        ch2 = rules[rule]["ch2"]
+                    for ch1, ch2, rule in rules.get(
+                            (wordB_lastletter, wordC_firstletter), []):
+                        word2 = wordB[:-1] + ch1
+                        word3 = ch2 + wordC[1:]
 
-                        if (wordB_lastletter == chA and
-                                wordC_firstletter == chB):
-                            word2 = wordB[:-1] + ch1
-                            word3 = ch2 + wordC[1:]
+                        if (wordA in all_inflections_set and
+                            word2 in all_inflections_set and
+                                word3 in all_inflections_set):
 
-                            if (wordA in all_inflections_set and
-                                word2 in all_inflections_set and
-                                    word3 in all_inflections_set):
-
-                                d.front = f"{d.front}{wordA} + "
-                                d.word = word2
-                                d.back = f" + {word3}{d.back}"
-                                d.rules_front += "0,"
-                                d.rules_back = f"{rule+2},{d.rules_back}"
-                                d.path += " > 3.2"
-                                if d.comm == "start":
-                                    d.comm = "start3.2"
-                                else:
-                                    d.comm = "x3.2"
-
-                                if comp(d) not in w.matches:
-                                    matches_dict[d.init] += [(
-                                        comp(d), d.comm,
-                                        f"{comp_rules(d)}", d.path)]
-                                    w.matches.add(comp(d))
-                                    d.matches.add(comp(d))
-                                    unmatched_set.discard(d.init)
-
-                                d = DotDict(d_orig)
+                            d.front = f"{d.front}{wordA} + "
+                            d.word = word2
+                            d.back = f" + {word3}{d.back}"
+                            d.rules_front += "0,"
+                            d.rules_back = f"{rule+2},{d.rules_back}"
+                            d.path += " > 3.2"
+                            if d.comm == "start":
+                                d.comm = "start3.2"
+                            else:
+                                d.comm = "x3.2"
+
+                            if comp(d) not in w.matches:
+                                matches_dict[d.init] += [(
+                                    comp(d), d.comm,
+                                    f"{comp_rules(d)}", d.path)]
+                                w.matches.add(comp(d))
+                                d.matches.add(comp(d))
+                                unmatched_set.discard(d.init)
+
+                            d = DotDict(d_orig)
 
                 # bla* *lah blah
 
                 if wordC in all_inflections_set:
 
-                    for rule in rules:
-                        chA = rules[rule]["chA"]
-                        chB = rules[rule]["chB"]
-                        ch1 = rules[rule]["ch1"]
-                        ch2 = rules[rule]["ch2"]
+                    for ch1, ch2, rule in rules.get(
+                            (wordA_lastletter, wordB_firstletter), []):
+                        word1 = wordA[:-1] + ch1
+                        word2 = ch2 + wordB[1:]
 
-                        if (wordA_lastletter == chA and
-                                wordB_firstletter == chB):
-                            word1 = wordA[:-1] + ch1
-                            word2 = ch2 + wordB[1:]
+                        if (word1 in all_inflections_set and
+                            word2 in all_inflections_set and
+                                wordC in all_inflections_set):
 
-                            if (word1 in all_inflections_set and
-                                word2 in all_inflections_set and
-                                    wordC in all_inflections_set):
-
-                                d.front = f"{d.front}{word1} + "
-                                d.word = word2
-                                d.back = f" + {wordC}{d.back}"
-                                d.rules_front += f"{rule+2},"
-                                d.rules_back = f"0,{d.rules_back}"
-                                d.path += " > 3.3"
-                                if d.comm == "start":
-                                    d.comm = "start3.3"
-                                else:
-                                    d.comm = "x3.3"
-
-                                if comp(d) not in w.matches:
-                                    matches_dict[d.init] += [(
-                                        comp(d), d.comm,
-                                        f"{comp_rules(d)}", d.path)]
-                                    w.matches.add(comp(d))
-                                    d.matches.add(comp(d))
-                                    unmatched_set.discard(d.init)
-
-                                d = DotDict(d_orig)
+                            d.front = f"{d.front}{word1} + "
+                            d.word = word2
+                            d.back = f" + {wordC}{d.back}"
+                            d.rules_front += f"{rule+2},"
+                            d.rules_back = f"0,{d.rules_back}"
+                            d.path += " > 3.3"
+                            if d.comm == "start":
+                                d.comm = "start3.3"
+                            else:
+                                d.comm = "x3.3"
+
+                            if comp(d) not in w.matches:
+                                matches_dict[d.init] += [(
+                                    comp(d), d.comm,
+                                    f"{comp_rules(d)}", d.path)]
+                                w.matches.add(comp(d))
+                                d.matches.add(comp(d))
+                                unmatched_set.discard(d.init)
+
+                            d = DotDict(d_orig)
 
                 # bla* *la* *lah
 
-                for rulex in rules:
-                    chAx = rules[rulex]["chA"]
-                    chBx = rules[rulex]["chB"]
-                    ch1x = rules[rulex]["ch1"]
-                    ch2x = rules[rulex]["ch2"]
+                for ch1x, ch2x, rulex in rules.get(
+                        (wordA_lastletter, wordB_firstletter), []):
+                    word1 = wordA[:-1] + ch1x
+                    word2 = ch2x + wordB[1:]
 
-                    if (wordA_lastletter == chAx and
-                            wordB_firstletter == chBx):
-                        word1 = wordA[:-1] + ch1x
-                        word2 = ch2x + wordB[1:]
+                    for ch1y, ch2y, ruley in rules.get(
+                            (wordB_lastletter, wordC_firstletter), []):
+                        word2 = (ch2x + wordB[1:])[:-1] + ch1y
+                        word3 = ch2y + wordC[1:]
 
-                        for ruley in rules:
-                            chAy = rules[ruley]["chA"]
-                            chBy = rules[ruley]["chB"]
-                            ch1y = rules[ruley]["ch1"]
-                            ch2y = rules[ruley]["ch2"]
-
-                            if (wordB_lastletter == chAy and
-                                    wordC_firstletter == chBy):
-                                word2 = (ch2x + wordB[1:])[:-1] + ch1y
-                                word3 = ch2y + wordC[1:]
-
-                                if (word1 in all_inflections_set and
-                                        word2 in all_inflections_set and
-                                        word3 in all_inflections_set):
-
-                                    d.front = f"{d.front}{word1} + "
-                                    d.word = word2
-                                    d.back = f" + {word3}{d.back}"
-                                    d.rules_front += f"{rulex+2},"
-                                    d.rules_back = f"{ruley+2},{d.rules_back}"
-                                    d.path += " > 3.4"
-                                    if d.comm == "start":
-                                        d.comm = "start3.4"
-                                    else:
-                                        d.comm = "x3.4"
+                        if (word1 in all_inflections_set and
+                                word2 in all_inflections_set and
+                                word3 in all_inflections_set):
 
-                                    if comp(d) not in w.matches:
-                                        matches_dict[d.init] += [(
-                                            comp(d), d.comm,
-                                            f"{comp_rules(d)}", d.path)]
-                                        w.matches.add(comp(d))
-                                        d.matches.add(comp(d))
-                                        unmatched_set.discard(d.init)
+                            d.front = f"{d.front}{word1} + "
+                            d.word = word2
+                            d.back = f" + {word3}{d.back}"
+                            d.rules_front += f"{rulex+2},"
+                            d.rules_back = f"{ruley+2},{d.rules_back}"
+                            d.path += " > 3.4"
+                            if d.comm == "start":
+                                d.comm = "start3.4"
+                            else:
+                                d.comm = "x3.4"
 
-                                    d = DotDict(d_orig)
+                            if comp(d) not in w.matches:
+                                matches_dict[d.init] += [(
+                                    comp(d), d.comm,
+                                    f"{comp_rules(d)}", d.path)]
+                                w.matches.add(comp(d))
+                                d.matches.add(comp(d))
+                                unmatched_set.discard(d.init)
+
+                            d = DotDict(d_orig)
 
     return d_orig
 
@@ -1343,66 +1624,48 @@ def four_word_sandhi(d: DotDict) -> DotDict:
 
                     # bla* *la* *la* *lah
 
-                    for rulex in rules:
-                        chAx = rules[rulex]["chA"]
-                        chBx = rules[rulex]["chB"]
-                        ch1x = rules[rulex]["ch1"]
-                        ch2x = rules[rulex]["ch2"]
-
-                        if (wordA_lastletter == chAx and
-                                wordB_firstletter == chBx):
-                            word1 = wordA[:-1] + ch1x
-                            word2 = ch2x + wordB[1:]
-
-                            for ruley in rules:
-                                chAy = rules[ruley]["chA"]
-                                chBy = rules[ruley]["chB"]
-                                ch1y = rules[ruley]["ch1"]
-                                ch2y = rules[ruley]["ch2"]
-
-                                if wordB_lastletter == chAy and \
-                                        wordC_firstletter == chBy:
-                                    word2 = (ch2x + wordB[1:])[:-1] + ch1y
-                                    word3 = ch2y + wordC[1:]
-
-                                    for rulez in rules:
-                                        chAz = rules[rulez]["chA"]
-                                        chBz = rules[rulez]["chB"]
-                                        ch1z = rules[rulez]["ch1"]
-                                        ch2z = rules[rulez]["ch2"]
-
-                                        if (wordC_lastletter == chAz and
-                                                wordD_firstletter == chBz):
-                                            word3 = (
-                                                ch2y + wordC[1:])[:-1] + ch1z
-                                            word4 = ch2z + wordD[1:]
-
-                                            if (word1 in all_inflections_set
-                                                and
-                                                word2 in all_inflections_set
-                                                and
-                                                word3 in all_inflections_set
-                                                and
-                                                    word4 in all_inflections_set):
-                                                d.front = f"{d.front}{word1} + {word2} + "
-                                                d.word = word3
-                                                d.back = f" + {word4}{d.back}"
-                                                d.rules_front += f"{rulex+2},{ruley+2}"
-                                                d.rules_back = f"{rulez+2},{d.rules_back}"
-                                                d.path += " > 4"
-                                                d.comm = "x4"
-
-                                                if comp(d) not in w.matches:
-                                                    matches_dict[d.init] += [(
-                                                        comp(d), d.comm,
-                                                        f"{comp_rules(d)}",
-                                                        d.path)]
-                                                    w.matches.add(comp(d))
-                                                    d.matches.add(comp(d))
-                                                    unmatched_set.discard(
-                                                        d.init)
-
-                                                d = DotDict(d_orig)
+                    for ch1x, ch2x, rulex in rules.get(
+                            (wordA_lastletter, wordB_firstletter), []):
+                        word1 = wordA[:-1] + ch1x
+                        word2 = ch2x + wordB[1:]
+
+                        for ch1y, ch2y, ruley in rules.get(
+                                (wordB_lastletter, wordC_firstletter), []):
+                            word2 = (ch2x + wordB[1:])[:-1] + ch1y
+                            word3 = ch2y + wordC[1:]
+
+                            for ch1z, ch2z, rulez in rules.get(
+                                    (wordC_lastletter, wordD_firstletter), []):
+                                word3 = (
+                                    ch2y + wordC[1:])[:-1] + ch1z
+                                word4 = ch2z + wordD[1:]
+
+                                if (word1 in all_inflections_set
+                                    and
+                                    word2 in all_inflections_set
+                                    and
+                                    word3 in all_inflections_set
+                                    and
+                                        word4 in all_inflections_set):
+                                    d.front = f"{d.front}{word1} + {word2} + "
+                                    d.word = word3
+                                    d.back = f" + {word4}{d.back}"
+                                    d.rules_front += f"{rulex+2},{ruley+2}"
+                                    d.rules_back = f"{rulez+2},{d.rules_back}"
+                                    d.path += " > 4"
+                                    d.comm = "x4"
+
+                                    if comp(d) not in w.matches:
+                                        matches_dict[d.init] += [(
+                                            comp(d), d.comm,
+                                            f"{comp_rules(d)}",
+                                            d.path)]
+                                        w.matches.add(comp(d))
+                                        d.matches.add(comp(d))
+                                        unmatched_set.discard(
+                                            d.init)
+
+                                    d = DotDict(d_orig)
 
     return d_orig
 
@@ -1452,7 +1715,7 @@ def summary(pth: ProjectPaths):
     for __word__, matches in matches_dict.items():
         match_count += len(matches)
 
-    match_average = match_count / word_count
+    match_average = match_count / word_count if word_count else 0
 
     print(f"[green]match count:\t{match_count:,}")
     print(f"[green]match average:\t{match_average:.4f}")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+"""Speed test the sandhi splitter against the original splitter from before
+the sandhi rules index, on a fixed sample of unmatched words.
+The original sandhi_splitter.py is loaded from git, and both runs must
+produce byte-identical matches, apart from words which ran overtime.
+Run sandhi_setup.py first to make the assets.
+
+Usage:
+    python db/deconstructor/speed_test_sandhi_rules.py [git revision]
+"""
+
+import filecmp
+import pickle
+import subprocess
+import sys
+
+from pathlib import Path
+from rich import print
+from types import ModuleType
+
+import sandhi_splitter as ss
+
+from tools.paths import ProjectPaths
+from tools.tic_toc import bip, bop
+
+sample_size = 500
+
+splitter_path = "db/deconstructor/sandhi_splitter.py"
+
+
+def find_original_revision() -> str:
+    """The revision before the sandhi rules index was added."""
+    result = subprocess.run(
+        ["git", "log", "--format=%H", "--reverse",
+            "-S", "def make_sandhi_rules_index", "--", splitter_path],
+        capture_output=True, text=True, check=True)
+    return f"{result.stdout.split()[0]}^"
+
+
+def load_original_splitter(revision: str) -> ModuleType:
+    """Load sandhi_splitter.py as it was at a git revision."""
+    source = subprocess.run(
+        ["git", "show", f"{revision}:{splitter_path}"],
+        capture_output=True, text=True, check=True).stdout
+    original = ModuleType("sandhi_splitter_original")
+    exec(compile(source, f"{revision}:{splitter_path}", "exec"), original.__dict__)
+    return original
+
+
+def split_word_original(original: ModuleType, counter: int, word: str) -> None:
+    """The body of the original main loop, for a single word."""
+    original.w = original.Word(word)
+    original.matches_dict[word] = []
+
+    d = original.DotDict(original.default_dot_dict_init(counter, word))
+    d = original.two_word_sandhi(d)
+    if d.word.endswith(("tissa", "tissā")):
+        d = original.remove_tissa(d)
+    if not original.w.matches:
+        d = original.three_word_sandhi(d)
+    if not original.w.matches:
+        original.recursive_removal(d)
+
+
+def run_sample(splitter: ModuleType, split_word, sample: list[str]) -> tuple[str, set[str]]:
+    """Split every word of the sample, return the time taken and the words
+    which ran overtime."""
+    splitter.matches_dict = {}
+    overtime_words = set()
+    bip()
+    for counter, word in enumerate(sample):
+        split_word(counter, word)
+        if splitter.w.overtime:
+            overtime_words.add(word)
+    elapsed = bop()
+    return elapsed, overtime_words
+
+
+def save_matches(splitter: ModuleType, skip_words: set[str], output_path: Path) -> None:
+    with open(output_path, "w") as f:
+        for word, data in splitter.matches_dict.items():
+            if word in skip_words:
+                continue
+            for item in data:
+                f.write(f"{word}\t")
+                for column in item:
+                    f.write(f"{column}\t")
+                f.write("\n")
+
+
+def main():
+    print("[bright_yellow]speed test sandhi splitter against the original")
+    pth = ProjectPaths()
+
+    if len(sys.argv) > 1:
+        revision = sys.argv[1]
+    else:
+        revision = find_original_revision()
+    print(f"[green]original revision [white]{revision}")
+    original = load_original_splitter(revision)
+
+    with open(pth.unmatched_set_path, "rb") as f:
+        unmatched_set = pickle.load(f)
+    with open(pth.all_inflections_set_path, "rb") as f:
+        all_inflections_set = pickle.load(f)
+
+    original.rules = original.import_sandhi_rules(pth)
+    original.all_inflections_set = all_inflections_set
+    (original.all_inflections_nofirst,
+        original.all_inflections_nolast) = original.make_all_inflections_nfl_nll(
+            all_inflections_set)
+    original.unmatched_set = set(unmatched_set)
+
+    ss.rules = ss.import_sandhi_rules(pth)
+    ss.all_inflections_set = all_inflections_set
+    (ss.inflections_trie,
+        ss.inflections_rev_trie,
+        ss.fuzzy_front_trie,
+        ss.fuzzy_back_trie) = ss.make_inflections_tries(all_inflections_set)
+    ss.unmatched_set = set(unmatched_set)
+
+    sample = sorted(unmatched_set)[:sample_size]
+    print(f"[green]sample size [white]{len(sample)}")
+
+    original_path = pth.sandhi_output_dir / "matches_original.tsv"
+    current_path = pth.sandhi_output_dir / "matches_current.tsv"
+
+    original_time, original_overtime = run_sample(
+        original,
+        lambda counter, word: split_word_original(original, counter, word),
+        sample)
+    print(f"[green]{'original':<20}[white]{original_time:>10}")
+
+    current_time, current_overtime = run_sample(ss, ss.split_word, sample)
+    print(f"[green]{'current':<20}[white]{current_time:>10}")
+
+    # a word which ran overtime was cut short after 10s,
+    # at a different point in each run, so leave it out of the comparison
+    overtime_words = original_overtime | current_overtime
+    print(f"[green]{'overtime words':<20}[white]{len(overtime_words):>10}")
+    save_matches(original, overtime_words, original_path)
+    save_matches(ss, overtime_words, current_path)
+
+    print(f"[green]{'speedup':<20}[white]{float(original_time) / max(float(current_time), 0.001):>10.1f}x")
+
+    if filecmp.cmp(original_path, current_path, shallow=False):
+        print("[green]matches are byte-identical")
+    else:
+        print("[red]matches differ!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,12 +13,12 @@ from root_matrix import generate_root_matrix
 from root_info import generate_root_info_html
 
 from db.get_db_session import get_db_session
-from db.models import DpdRoots, DpdHeadwords, FamilyRoot, Lookup
+from db.models import DpdRoots, DpdHeadwords, FamilyRoot
 
 from scripts.anki_updater import family_updater
 
 from tools.configger import config_test
-from tools.lookup_is_another_value import is_another_value
+from tools.lookup_writer import write_lookup_column
 from tools.meaning_construction import degree_of_completion
 from tools.meaning_construction import clean_construction
 from tools.meaning_construction import make_meaning
@@ -26,7 +26,6 @@ from tools.pali_sort_key import pali_list_sorter, pali_sort_key
 from tools.paths import ProjectPaths
 from tools.superscripter import superscripter_uni
 from tools.tic_toc import tic, toc
-from tools.update_test_add import update_test_add
 
 from exporter.ru_components.tools.tools_for_ru_exporter import make_short_ru_meaning, ru_replace_abbreviations, make_short_meaning
 
@@ -267,33 +266,10 @@ def update_lookup_table(db_session):
         r2h_dict[r.root_family_clean].add(r.root_key)
         r2h_dict[r.root_family_clean_no_space].add(r.root_key)
     
-    lookup_table = db_session.query(Lookup).all()
-    results = update_test_add(lookup_table, r2h_dict)
-    update_set, test_set, add_set = results
-
-    # update test add
-    for i in lookup_table:
-        if i.lookup_key in update_set:
-            i.roots_pack(pali_list_sorter(r2h_dict[i.lookup_key]))
-        elif i.lookup_key in test_set:
-            if is_another_value(i, "roots"):
-                i.root = ""
-            else:
-                db_session.delete(i)                
-    
-    db_session.commit()
-
-    # add
-    add_to_db = []
-    for inflection, root_keys in r2h_dict.items():
-        if inflection in add_set:
-            add_me = Lookup()
-            add_me.lookup_key = inflection
-            add_me.roots_pack(pali_list_sorter(root_keys))
-            add_to_db.append(add_me)
-
-    db_session.add_all(add_to_db)
-    db_session.commit()
+    roots_dict = {
+        key: pali_list_sorter(root_keys)
+        for key, root_keys in r2h_dict.items()}
+    write_lookup_column(db_session, "roots", roots_dict)
 
     print(len(r2h_dict))
 
@@ -3,12 +3,13 @@
 """Create frequency map data and HTML and save into database."""
 
 import psutil
-from typing import List, TypedDict
+from pathlib import Path
+from typing import List, Tuple, TypedDict
+import numpy as np
 import pandas as pd
 import pickle
 import re
-from multiprocessing.managers import ListProxy
-from multiprocessing import Process, Manager
+from multiprocessing import get_context
 
 from rich import print
 from mako.template import Template
@@ -23,7 +24,6 @@ from tools.configger import config_test, config_update
 from tools.tic_toc import tic, toc
 from tools.superscripter import superscripter_uni
 from tools.paths import ProjectPaths
-from tools.utils import list_into_batches
 
 
 def main():
@@ -67,9 +67,9 @@ def main():
         changed_headwords = []
         html_file_missing = []
 
-    dicts = make_dfs_and_dicts(pth)
+    word_counts_df = make_word_counts_df(pth)
     num_logical_cores = psutil.cpu_count()
-    make_data_dict_and_html(pth, db_session, dicts, num_logical_cores, regenerate_all)
+    make_data_dict_and_html(pth, db_session, word_counts_df, num_logical_cores, regenerate_all)
     db_session.close()
 
     # reset config
@@ -143,265 +143,180 @@ def test_html_file_missing(db_session: Session):
         print("ok")
 
 
-def make_dfs_and_dicts(pth: ProjectPaths) -> List[dict]:
-    print("[green]making word count dicts and df's")
-
-    wc_dir = pth.word_count_dir
-
-    vinaya_pārājika_mūla = pd.read_csv(wc_dir.joinpath("vinaya_pārājika_mūla.csv"), sep="\t", header=None)
-    vinaya_pārājika_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("vinaya_pārājika_aṭṭhakathā.csv"), sep="\t", header=None)
-    vinaya_ṭīkā = pd.read_csv(wc_dir.joinpath("vinaya_ṭīkā.csv"), sep="\t", header=None)
-    vinaya_pācittiya_mūla = pd.read_csv(wc_dir.joinpath("vinaya_pācittiya_mūla.csv"), sep="\t", header=None)
-    vinaya_pācittiya_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("vinaya_pācittiya_aṭṭhakathā.csv"), sep="\t", header=None)
-    vinaya_mahāvagga_mūla = pd.read_csv(wc_dir.joinpath("vinaya_mahāvagga_mūla.csv"), sep="\t", header=None)
-    vinaya_mahāvagga_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("vinaya_mahāvagga_aṭṭhakathā.csv"), sep="\t", header=None)
-    vinaya_cūḷavagga_mūla = pd.read_csv(wc_dir.joinpath("vinaya_cūḷavagga_mūla.csv"), sep="\t", header=None)
-    vinaya_cūḷavagga_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("vinaya_cūḷavagga_aṭṭhakathā.csv"), sep="\t", header=None)
-    vinaya_parivāra_mūla = pd.read_csv(wc_dir.joinpath("vinaya_parivāra_mūla.csv"), sep="\t", header=None)
-    vinaya_parivāra_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("vinaya_parivāra_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_dīgha_mūla = pd.read_csv(wc_dir.joinpath("sutta_dīgha_mūla.csv"), sep="\t", header=None)
-    sutta_dīgha_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_dīgha_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_dīgha_ṭīkā = pd.read_csv(wc_dir.joinpath("sutta_dīgha_ṭīkā.csv"), sep="\t", header=None)
-    sutta_majjhima_mūla = pd.read_csv(wc_dir.joinpath("sutta_majjhima_mūla.csv"), sep="\t", header=None)
-    sutta_majjhima_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_majjhima_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_majjhima_ṭīkā = pd.read_csv(wc_dir.joinpath("sutta_majjhima_ṭīkā.csv"), sep="\t", header=None)
-    sutta_saṃyutta_mūla = pd.read_csv(wc_dir.joinpath("sutta_saṃyutta_mūla.csv"), sep="\t", header=None)
-    sutta_saṃyutta_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_saṃyutta_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_saṃyutta_ṭīkā = pd.read_csv(wc_dir.joinpath("sutta_saṃyutta_ṭīkā.csv"), sep="\t", header=None)
-    sutta_aṅguttara_mūla = pd.read_csv(wc_dir.joinpath("sutta_aṅguttara_mūla.csv"), sep="\t", header=None)
-    sutta_aṅguttara_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_aṅguttara_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_aṅguttara_ṭīkā = pd.read_csv(wc_dir.joinpath("sutta_aṅguttara_ṭīkā.csv"), sep="\t", header=None)
-    sutta_khuddaka1_mūla = pd.read_csv(wc_dir.joinpath("sutta_khuddaka1_mūla.csv"), sep="\t", header=None)
-    sutta_khuddaka1_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_khuddaka1_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_khuddaka2_mūla = pd.read_csv(wc_dir.joinpath("sutta_khuddaka2_mūla.csv"), sep="\t", header=None)
-    sutta_khuddaka2_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_khuddaka2_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_khuddaka3_mūla = pd.read_csv(wc_dir.joinpath("sutta_khuddaka3_mūla.csv"), sep="\t", header=None)
-    sutta_khuddaka3_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_khuddaka3_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_khuddaka3_ṭīkā = pd.read_csv(wc_dir.joinpath("sutta_khuddaka3_ṭīkā.csv"), sep="\t", header=None)
-    abhidhamma_dhammasaṅgaṇī_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_dhammasaṅgaṇī_mūla.csv"), sep="\t", header=None)
-    abhidhamma_vibhāṅga_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_vibhāṅga_mūla.csv"), sep="\t", header=None)
-    abhidhamma_dhātukathā_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_dhātukathā_mūla.csv"), sep="\t", header=None)
-    abhidhamma_puggalapaññatti_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_puggalapaññatti_mūla.csv"), sep="\t", header=None)
-    abhidhamma_kathāvatthu_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_kathāvatthu_mūla.csv"), sep="\t", header=None)
-    abhidhamma_yamaka_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_yamaka_mūla.csv"), sep="\t", header=None)
-    abhidhamma_paṭṭhāna_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_paṭṭhāna_mūla.csv"), sep="\t", header=None)
-    abhidhamma_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("abhidhamma_aṭṭhakathā.csv"), sep="\t", header=None)
-    abhidhamma_ṭīkā = pd.read_csv(wc_dir.joinpath("abhidhamma_ṭīkā.csv"), sep="\t", header=None)
-    aññā_visuddhimagga = pd.read_csv(wc_dir.joinpath("aññā_visuddhimagga.csv"), sep="\t", header=None)
-    aññā_visuddhimagga_ṭīkā = pd.read_csv(wc_dir.joinpath("aññā_visuddhimagga_ṭīkā.csv"), sep="\t", header=None)
-    aññā_leḍī = pd.read_csv(wc_dir.joinpath("aññā_leḍī.csv"), sep="\t", header=None)
-    aññā_buddha_vandanā = pd.read_csv(wc_dir.joinpath("aññā_buddha_vandanā.csv"), sep="\t", header=None)
-    aññā_vaṃsa = pd.read_csv(wc_dir.joinpath("aññā_vaṃsa.csv"), sep="\t", header=None)
-    aññā_byākaraṇa = pd.read_csv(wc_dir.joinpath("aññā_byākaraṇa.csv"), sep="\t", header=None)
-    aññā_pucchavisajjana = pd.read_csv(wc_dir.joinpath("aññā_pucchavisajjana.csv"), sep="\t", header=None)
-    aññā_nīti = pd.read_csv(wc_dir.joinpath("aññā_nīti.csv"), sep="\t", header=None)
-    aññā_pakiṇṇaka = pd.read_csv(wc_dir.joinpath("aññā_pakiṇṇaka.csv"), sep="\t", header=None)
-    aññā_sihaḷa = pd.read_csv(wc_dir.joinpath("aññā_sihaḷa.csv"), sep="\t", header=None)
-
-    vinaya_pārājika_mūla_dict = dict(vinaya_pārājika_mūla.values.tolist())
-    vinaya_pārājika_aṭṭhakathā_dict = dict(vinaya_pārājika_aṭṭhakathā.values.tolist())
-    vinaya_ṭīkā_dict = dict(vinaya_ṭīkā.values.tolist())
-    vinaya_pācittiya_mūla_dict = dict(vinaya_pācittiya_mūla.values.tolist())
-    vinaya_pācittiya_aṭṭhakathā_dict = dict(vinaya_pācittiya_aṭṭhakathā.values.tolist())
-    vinaya_mahāvagga_mūla_dict = dict(vinaya_mahāvagga_mūla.values.tolist())
-    vinaya_mahāvagga_aṭṭhakathā_dict = dict(vinaya_mahāvagga_aṭṭhakathā.values.tolist())
-    vinaya_cūḷavagga_mūla_dict = dict(vinaya_cūḷavagga_mūla.values.tolist())
-    vinaya_cūḷavagga_aṭṭhakathā_dict = dict(vinaya_cūḷavagga_aṭṭhakathā.values.tolist())
-    vinaya_parivāra_mūla_dict = dict(vinaya_parivāra_mūla.values.tolist())
-    vinaya_parivāra_aṭṭhakathā_dict = dict(vinaya_parivāra_aṭṭhakathā.values.tolist())
-    sutta_dīgha_mūla_dict = dict(sutta_dīgha_mūla.values.tolist())
-    sutta_dīgha_aṭṭhakathā_dict = dict(sutta_dīgha_aṭṭhakathā.values.tolist())
-    sutta_dīgha_ṭīkā_dict = dict(sutta_dīgha_ṭīkā.values.tolist())
-    sutta_majjhima_mūla_dict = dict(sutta_majjhima_mūla.values.tolist())
-    sutta_majjhima_aṭṭhakathā_dict = dict(sutta_majjhima_aṭṭhakathā.values.tolist())
-    sutta_majjhima_ṭīkā_dict = dict(sutta_majjhima_ṭīkā.values.tolist())
-    sutta_saṃyutta_mūla_dict = dict(sutta_saṃyutta_mūla.values.tolist())
-    sutta_saṃyutta_aṭṭhakathā_dict = dict(sutta_saṃyutta_aṭṭhakathā.values.tolist())
-    sutta_saṃyutta_ṭīkā_dict = dict(sutta_saṃyutta_ṭīkā.values.tolist())
-    sutta_aṅguttara_mūla_dict = dict(sutta_aṅguttara_mūla.values.tolist())
-    sutta_aṅguttara_aṭṭhakathā_dict = dict(sutta_aṅguttara_aṭṭhakathā.values.tolist())
-    sutta_aṅguttara_ṭīkā_dict = dict(sutta_aṅguttara_ṭīkā.values.tolist())
-    sutta_khuddaka1_mūla_dict = dict(sutta_khuddaka1_mūla.values.tolist())
-    sutta_khuddaka1_aṭṭhakathā_dict = dict(sutta_khuddaka1_aṭṭhakathā.values.tolist())
-    sutta_khuddaka2_mūla_dict = dict(sutta_khuddaka2_mūla.values.tolist())
-    sutta_khuddaka2_aṭṭhakathā_dict = dict(sutta_khuddaka2_aṭṭhakathā.values.tolist())
-    sutta_khuddaka3_mūla_dict = dict(sutta_khuddaka3_mūla.values.tolist())
-    sutta_khuddaka3_aṭṭhakathā_dict = dict(sutta_khuddaka3_aṭṭhakathā.values.tolist())
-    sutta_khuddaka3_ṭīkā_dict = dict(sutta_khuddaka3_ṭīkā.values.tolist())
-    abhidhamma_dhammasaṅgaṇī_mūla_dict = dict(abhidhamma_dhammasaṅgaṇī_mūla.values.tolist())
-    abhidhamma_vibhāṅga_mūla_dict = dict(abhidhamma_vibhāṅga_mūla.values.tolist())
-    abhidhamma_dhātukathā_mūla_dict = dict(abhidhamma_dhātukathā_mūla.values.tolist())
-    abhidhamma_puggalapaññatti_mūla_dict = dict(abhidhamma_puggalapaññatti_mūla.values.tolist())
-    abhidhamma_kathāvatthu_mūla_dict = dict(abhidhamma_kathāvatthu_mūla.values.tolist())
-    abhidhamma_yamaka_mūla_dict = dict(abhidhamma_yamaka_mūla.values.tolist())
-    abhidhamma_paṭṭhāna_mūla_dict = dict(abhidhamma_paṭṭhāna_mūla.values.tolist())
-    abhidhamma_aṭṭhakathā_dict = dict(abhidhamma_aṭṭhakathā.values.tolist())
-    abhidhamma_ṭīkā_dict = dict(abhidhamma_ṭīkā.values.tolist())
-    aññā_visuddhimagga_dict = dict(aññā_visuddhimagga.values.tolist())
-    aññā_visuddhimagga_ṭīkā_dict = dict(aññā_visuddhimagga_ṭīkā.values.tolist())
-    aññā_leḍī_dict = dict(aññā_leḍī.values.tolist())
-    aññā_buddha_vandanā_dict = dict(aññā_buddha_vandanā.values.tolist())
-    aññā_vaṃsa_dict = dict(aññā_vaṃsa.values.tolist())
-    aññā_byākaraṇa_dict = dict(aññā_byākaraṇa.values.tolist())
-    aññā_pucchavisajjana_dict = dict(aññā_pucchavisajjana.values.tolist())
-    aññā_nīti_dict = dict(aññā_nīti.values.tolist())
-    aññā_pakiṇṇaka_dict = dict(aññā_pakiṇṇaka.values.tolist())
-    aññā_sihaḷa_dict = dict(aññā_sihaḷa.values.tolist())
-
-    dicts = [
-        vinaya_pārājika_mūla_dict,
-        vinaya_pārājika_aṭṭhakathā_dict,
-        vinaya_ṭīkā_dict,
-        vinaya_pācittiya_mūla_dict,
-        vinaya_pācittiya_aṭṭhakathā_dict,
-        vinaya_mahāvagga_mūla_dict,
-        vinaya_mahāvagga_aṭṭhakathā_dict,
-        vinaya_cūḷavagga_mūla_dict,
-        vinaya_cūḷavagga_aṭṭhakathā_dict,
-        vinaya_parivāra_mūla_dict,
-        vinaya_parivāra_aṭṭhakathā_dict,
-        sutta_dīgha_mūla_dict,
-        sutta_dīgha_aṭṭhakathā_dict,
-        sutta_dīgha_ṭīkā_dict,
-        sutta_majjhima_mūla_dict,
-        sutta_majjhima_aṭṭhakathā_dict,
-        sutta_majjhima_ṭīkā_dict,
-        sutta_saṃyutta_mūla_dict,
-        sutta_saṃyutta_aṭṭhakathā_dict,
-        sutta_saṃyutta_ṭīkā_dict,
-        sutta_aṅguttara_mūla_dict,
-        sutta_aṅguttara_aṭṭhakathā_dict,
-        sutta_aṅguttara_ṭīkā_dict,
-        sutta_khuddaka1_mūla_dict,
-        sutta_khuddaka1_aṭṭhakathā_dict,
-        sutta_khuddaka2_mūla_dict,
-        sutta_khuddaka2_aṭṭhakathā_dict,
-        sutta_khuddaka3_mūla_dict,
-        sutta_khuddaka3_aṭṭhakathā_dict,
-        sutta_khuddaka3_ṭīkā_dict,
-        abhidhamma_dhammasaṅgaṇī_mūla_dict,
-        abhidhamma_aṭṭhakathā_dict,
-        abhidhamma_ṭīkā_dict,
-        abhidhamma_vibhāṅga_mūla_dict,
-        abhidhamma_dhātukathā_mūla_dict,
-        abhidhamma_puggalapaññatti_mūla_dict,
-        abhidhamma_kathāvatthu_mūla_dict,
-        abhidhamma_yamaka_mūla_dict,
-        abhidhamma_paṭṭhāna_mūla_dict,
-        aññā_visuddhimagga_dict,
-        aññā_visuddhimagga_ṭīkā_dict,
-        aññā_leḍī_dict,
-        aññā_buddha_vandanā_dict,
-        aññā_vaṃsa_dict,
-        aññā_byākaraṇa_dict,
-        aññā_pucchavisajjana_dict,
-        aññā_nīti_dict,
-        aññā_pakiṇṇaka_dict,
-        aññā_sihaḷa_dict
-    ]
-    return dicts
-
-
-def colourme(value, hi, low):
-    value = value
-    hi = hi
-    low = low
-    vrange = hi - low
-    step = (vrange/9)
-    group0 = 0
-    group1 = step*1
-    group2 = step*2
-    group3 = step*3
-    group4 = step*4
-    group5 = step*5
-    group6 = step*6
-    group7 = step*7
-    group8 = step*8
-    group9 = step*9
-    group10 = hi
-
-    if value == group0:
-        return "gr0"
-    elif value > group0 and value <= group1:
-        return "gr1"
-    elif value > group1 and value <= group2:
-        return "gr2"
-    elif value > group2 and value <= group3:
-        return "gr3"
-    elif value > group3 and value <= group4:
-        return "gr4"
-    elif value > group4 and value <= group5:
-        return "gr5"
-    elif value > group5 and value <= group6:
-        return "gr6"
-    elif value > group6 and value <= group7:
-        return "gr7"
-    elif value > group7 and value <= group8:
-        return "gr8"
-    elif value > group8 and value < group9:
-        return "gr9"
-    elif value == group10:
-        return "gr10"
+# word count csvs in the order of the sections of frequency.html
+word_count_files: List[str] = [
+    "vinaya_pārājika_mūla",
+    "vinaya_pārājika_aṭṭhakathā",
+    "vinaya_ṭīkā",
+    "vinaya_pācittiya_mūla",
+    "vinaya_pācittiya_aṭṭhakathā",
+    "vinaya_mahāvagga_mūla",
+    "vinaya_mahāvagga_aṭṭhakathā",
+    "vinaya_cūḷavagga_mūla",
+    "vinaya_cūḷavagga_aṭṭhakathā",
+    "vinaya_parivāra_mūla",
+    "vinaya_parivāra_aṭṭhakathā",
+    "sutta_dīgha_mūla",
+    "sutta_dīgha_aṭṭhakathā",
+    "sutta_dīgha_ṭīkā",
+    "sutta_majjhima_mūla",
+    "sutta_majjhima_aṭṭhakathā",
+    "sutta_majjhima_ṭīkā",
+    "sutta_saṃyutta_mūla",
+    "sutta_saṃyutta_aṭṭhakathā",
+    "sutta_saṃyutta_ṭīkā",
+    "sutta_aṅguttara_mūla",
+    "sutta_aṅguttara_aṭṭhakathā",
+    "sutta_aṅguttara_ṭīkā",
+    "sutta_khuddaka1_mūla",
+    "sutta_khuddaka1_aṭṭhakathā",
+    "sutta_khuddaka2_mūla",
+    "sutta_khuddaka2_aṭṭhakathā",
+    "sutta_khuddaka3_mūla",
+    "sutta_khuddaka3_aṭṭhakathā",
+    "sutta_khuddaka3_ṭīkā",
+    "abhidhamma_dhammasaṅgaṇī_mūla",
+    "abhidhamma_aṭṭhakathā",
+    "abhidhamma_ṭīkā",
+    "abhidhamma_vibhāṅga_mūla",
+    "abhidhamma_dhātukathā_mūla",
+    "abhidhamma_puggalapaññatti_mūla",
+    "abhidhamma_kathāvatthu_mūla",
+    "abhidhamma_yamaka_mūla",
+    "abhidhamma_paṭṭhāna_mūla",
+    "aññā_visuddhimagga",
+    "aññā_visuddhimagga_ṭīkā",
+    "aññā_leḍī",
+    "aññā_buddha_vandanā",
+    "aññā_vaṃsa",
+    "aññā_byākaraṇa",
+    "aññā_pucchavisajjana",
+    "aññā_nīti",
+    "aññā_pakiṇṇaka",
+    "aññā_sihaḷa",
+]
+
+
+def make_word_counts_df(pth: ProjectPaths) -> pd.DataFrame:
+    """All the word count csvs in one long df of word, section and count."""
+
+    print("[green]making word counts df")
+
+    word_counts_dfs = []
+    for section, file_name in enumerate(word_count_files):
+        df = pd.read_csv(
+            pth.word_count_dir.joinpath(f"{file_name}.csv"),
+            sep="\t", header=None, names=["word", "count"])
+        # the last count of a word wins, like in a dict
+        df = df.drop_duplicates(subset="word", keep="last")
+        df["section"] = section
+        word_counts_dfs.append(df)
+
+    word_counts_df = pd.concat(word_counts_dfs, ignore_index=True)
+    word_counts_df["count"] = word_counts_df["count"].fillna(0).astype("int64")
+    return word_counts_df
+
+
+def make_counts_matrix(
+        headwords: List[DpdHeadwords],
+        word_counts_df: pd.DataFrame
+) -> np.ndarray:
+    """Sum the counts of all the inflections of every headword in every section,
+    in one go. Returns a matrix of headwords x sections."""
+
+    ids = [i.id for i in headwords]
+    inflections_df = pd.DataFrame(
+        [(i.id, inflection)
+            for i in headwords
+            for inflection in i.inflections_list],
+        columns=["id", "word"])
+
+    counts_df = inflections_df \
+        .merge(word_counts_df, on="word") \
+        .groupby(["id", "section"])["count"] \
+        .sum() \
+        .unstack(fill_value=0) \
+        .reindex(
+            index=ids,
+            columns=range(len(word_count_files)),
+            fill_value=0)
+
+    return counts_df.to_numpy(dtype="int64")
+
+
+def colour_classes(counts_matrix: np.ndarray) -> np.ndarray:
+    """The colour class of every cell, in ten steps between the lowest
+    and highest count of each row. Returns None where no step fits."""
+
+    value_max = counts_matrix.max(axis=1, keepdims=True)
+    value_min = counts_matrix.min(axis=1, keepdims=True)
+    step = (value_max - value_min) / 9
+    groups = [step * n for n in range(10)]
+
+    conditions = [counts_matrix == 0]
+    for n in range(1, 9):
+        conditions.append(
+            (counts_matrix > groups[n - 1]) & (counts_matrix <= groups[n]))
+    conditions.append(
+        (counts_matrix > groups[8]) & (counts_matrix < groups[9]))
+    conditions.append(counts_matrix == value_max)
+
+    choices = [f"gr{n}" for n in range(11)]
+    return np.select(conditions, choices, default=None)
 
 
 class ParsedResult(TypedDict):
     id: int
     freq_html: str
 
-def _parse_item(i: DpdHeadwords, dicts: List[dict]) -> ParsedResult:
-    inflections = i.inflections_list
 
-    section = 1
-    d = {}
-    for dict in dicts:
-        count = 0
-        for inflection in inflections:
-            if inflection in dict:
-                infl = dict.get(inflection)
-                if infl is not None:
-                    count += infl
+# (id, lemma_1, pos, stem, counts, classes)
+MapItem = Tuple[int, str, str, str, List[int], List[str]]
+
+# compiled once in each worker
+freq_template: Template
 
-        d[str(section)] = {"data": count, "class": ""}
-        section += 1
 
-    d_values = [v["data"] for __k__, v, in d.items()]
+def init_mapmaker_worker(template_path: Path) -> None:
+    global freq_template
+    freq_template = Template(filename=str(template_path))
 
-    value_max = max(d_values)
-    value_min = min(d_values)
 
-    for x in d:
-        # add class
-        d[x]["class"] = colourme(d[x]["data"], value_max, value_min)
+def _parse_item(item: MapItem) -> ParsedResult:
+    id, lemma_1, pos, stem, counts, classes = item
 
+    d = {}
+    for section, (count, colour_class) in enumerate(zip(counts, classes), 1):
         # remove zeros
-        if d[x]["data"] == 0:
-            d[x]["data"] = ""
+        d[str(section)] = {
+            "data": count if count != 0 else "",
+            "class": colour_class}
 
     map_html = ""
 
-    if value_max > 0:
+    if max(counts) > 0:
 
-        if i.pos in INDECLINABLES or re.match(r"^!", i.stem):
-            map_html += f"""<p class="heading underlined">Exact matches of the word <b>{superscripter_uni(i.lemma_1)}</b> in the Chaṭṭha Saṅgāyana corpus.</p>"""
+        if pos in INDECLINABLES or re.match(r"^!", stem):
+            map_html += f"""<p class="heading underlined">Exact matches of the word <b>{superscripter_uni(lemma_1)}</b> in the Chaṭṭha Saṅgāyana corpus.</p>"""
 
-        elif i.pos in CONJUGATIONS:
-            map_html += f"""<p class="heading underlined">Exact matches of <b>{superscripter_uni(i.lemma_1)} and its conjugations</b> in the Chaṭṭha Saṅgāyana corpus.</p>"""
+        elif pos in CONJUGATIONS:
+            map_html += f"""<p class="heading underlined">Exact matches of <b>{superscripter_uni(lemma_1)} and its conjugations</b> in the Chaṭṭha Saṅgāyana corpus.</p>"""
 
-        elif i.pos in DECLENSIONS:
-            map_html += f"""<p class="heading underlined">Exact matches of <b>{superscripter_uni(i.lemma_1)} and its declensions</b> in the Chaṭṭha Saṅgāyana corpus.</p>"""
+        elif pos in DECLENSIONS:
+            map_html += f"""<p class="heading underlined">Exact matches of <b>{superscripter_uni(lemma_1)} and its declensions</b> in the Chaṭṭha Saṅgāyana corpus.</p>"""
 
-        template = Template(filename='db/frequency/frequency.html')
-        map_html += str(template.render(d=d))
+        map_html += str(freq_template.render(d=d))
 
     else:
-        map_html += f"""<p class="heading">There are no exact matches of <b>{superscripter_uni(i.lemma_1)} or its inflections</b> in the Chaṭṭha Saṅgāyana corpus.</p>"""
+        map_html += f"""<p class="heading">There are no exact matches of <b>{superscripter_uni(lemma_1)} or its inflections</b> in the Chaṭṭha Saṅgāyana corpus.</p>"""
+
+    return ParsedResult(id=id, freq_html=map_html)
 
-    return ParsedResult(id=i.id, freq_html=map_html)
 
 def make_data_dict_and_html(
         pth: ProjectPaths,
         db_session: Session,
-        dicts: List[dict],
+        word_counts_df: pd.DataFrame,
         use_n_processes: int,
         regenerate_all: bool
 ):
@@ -418,70 +333,40 @@ def make_data_dict_and_html(
                  i.id in html_file_missing or \
                  regenerate_all is True))
 
-    # Filter the DpdHeadwords and Derived data list, while keeping the related items together in a Tuple.
-    filtered_pairs: List = [i for i in dpd_db if _keep(i)]
-
-    # Split the list into batches, each batch will be assigned to a Process() thread.
-    batches: List = list_into_batches(filtered_pairs, use_n_processes)
-
-    processes: List[Process] = []
-
-    # The Manager allows shared memory between the worker threads.
-    manager = Manager()
-    results_list: ListProxy = manager.list()
-
-    # Don't need to pass everything as arguments, sub-threads have access to
-    # memory objects of the parent scope. This is a good way to access shared
-    # read-only memory object between threads.
-
-    def _parse_batch(batch: List, __batch_idx__: int):
-        """Takes a batch of items (and the necessary lookup dicts for the work), applies the work with _parse_item_pair() to each work item.
-
-        The results are added to a ListProxy, which is going to be a list() in shared memory from the multiprocessing Manager().
-        """
-
-        if len(batch) == 0:
-            print("[yellow]Batch list has 0 length")
-            return
-
-        res = [_parse_item(i, dicts) for i in batch]
-        results_list.extend(res)
+    filtered_words: List[DpdHeadwords] = [i for i in dpd_db if _keep(i)]
 
-        # Save the details of the first item of the batch for logging and review.
-        first_word = batch[0]
-        first_map_html = res[0]["freq_html"]
+    if not filtered_words:
+        print("[green]adding to db 0")
+        return
 
+    # counts and colour classes of all headwords at once
+    counts_matrix = make_counts_matrix(filtered_words, word_counts_df)
+    classes_matrix = colour_classes(counts_matrix)
+
+    items: List[MapItem] = [
+        (i.id, i.lemma_1, i.pos, i.stem, counts, classes)
+        for i, counts, classes in zip(
+            filtered_words, counts_matrix.tolist(), classes_matrix.tolist())]
+
+    # only the html is rendered in the worker processes,
+    # each compiling the template once
+    with get_context("fork").Pool(
+        use_n_processes,
+        initializer=init_mapmaker_worker,
+        initargs=(pth.freq_template_path,)
+    ) as pool:
+        add_to_db: List[ParsedResult] = list(
+            pool.imap(_parse_item, items, chunksize=100))
+
+    # Save a few maps for logging and review.
+    batch_size = max(len(filtered_words) // use_n_processes, 1)
+    for i, result in zip(
+        filtered_words[::batch_size], add_to_db[::batch_size]
+    ):
         with open(
             pth.freq_html_dir.joinpath(
-                first_word.lemma_1).with_suffix(".html"), "w") as f:
-            f.write(first_map_html)
-
-    for batch_idx, batch in enumerate(batches):
-        # Assign a Process() thread to each batch list.
-        p = Process(target=_parse_batch, args=(batch, batch_idx,))
-
-        # Start the Process's target function, i.e. _parse_batch()
-        p.start()
-
-        # Keep a handle to the process.
-        processes.append(p)
-
-    # At this point the thread workers are started.
-    #
-    # However, the main thread will not automatically wait for sub-threads to
-    # complete, it would simply continue (and exit), terminating the worker
-    # threads before they complete.
-
-    # Process.join() blocks the main thread (i.e. makes it wait) until the
-    # process whose join() method is called terminates.
-    for p in processes:
-        p.join()
-
-    # At this point all worker processes are completed and the main thread will
-    # continue.
-
-    # Convert the ListProxy from Manager() back to a regular list()
-    add_to_db: List[ParsedResult] = list(results_list)
+                i.lemma_1).with_suffix(".html"), "w") as f:
+            f.write(result["freq_html"])
 
     # Add the results to the database.
     print("[green]adding to db", end=" ")
@@ -1,26 +1,82 @@
-"""Get DB session - used ubiquitously."""
+"""Get DB session - used ubiquitously.
+
+There is one engine per db file and mode in each process, so every session
+on the same file shares its connection pool. Every new connection is tuned
+with the pragmas below. Exporters and the web app only read, so they can
+open the db in read_only mode."""
 
 import os
 import sys
 
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 
+# applied to every new connection
+db_pragmas = [
+    "PRAGMA mmap_size = 268435456",  # 256 MB
+    "PRAGMA cache_size = -65536",  # 64 MB
+    "PRAGMA temp_store = MEMORY",
+]
+
+# (db path, read_only): (process id, engine, sessionmaker)
+_engines: dict[tuple[str, bool], tuple[int, Engine, sessionmaker]] = {}
+
+
+def _make_engine(db_path: Path, read_only: bool) -> Engine:
+    # many callers open a session and never close it, so the shared pool
+    # keeps 5 connections for reuse and opens as many more as needed,
+    # instead of waiting for a connection to come back
+    if read_only:
+        db_uri = Path(db_path).resolve().as_uri()
+        db_eng = create_engine(
+            f"sqlite+pysqlite:///{db_uri}?mode=ro&uri=true",
+            echo=False, pool_size=5, max_overflow=-1)
+    else:
+        db_eng = create_engine(
+            f"sqlite+pysqlite:///{db_path}",
+            echo=False, pool_size=5, max_overflow=-1)
+
+    @event.listens_for(db_eng, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # wal lets readers carry on while a writer commits,
+        # it's saved in the db file, so only a writer can set it
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode = WAL")
+        for pragma in db_pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return db_eng
 
-def get_db_session(db_path: Path) -> Session:
+
+def _get_sessionmaker(db_path: Path, read_only: bool) -> sessionmaker:
+    """The sessionmaker of the shared engine, created on first use."""
+    key = (str(Path(db_path).resolve()), read_only)
+    pid = os.getpid()
+    if key in _engines:
+        engine_pid, db_eng, session_maker = _engines[key]
+        if engine_pid == pid:
+            return session_maker
+        # a forked process must not use its parent's pooled connections
+        db_eng.dispose(close=False)
+
+    db_eng = _make_engine(db_path, read_only)
+    session_maker = sessionmaker(db_eng)
+    _engines[key] = (pid, db_eng, session_maker)
+    return session_maker
+
+
+def get_db_session(db_path: Path, read_only: bool = False) -> Session:
     """Get the db session."""
     if not os.path.isfile(db_path):
         print(f"Database file doesn't exist: {db_path}")
         sys.exit(1)
 
     try:
-        db_eng = create_engine(f"sqlite+pysqlite:///{db_path}", echo=False)
-        # db_conn = db_eng.connect()
-
-        Session = sessionmaker(db_eng)
-        Session.configure(bind=db_eng)
-        db_sess = Session()
+        db_sess = _get_sessionmaker(db_path, read_only)()
 
     except Exception as e:
         print(f"Can't connect to database: {e}")
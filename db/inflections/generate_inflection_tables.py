@@ -6,8 +6,12 @@ import re
 import json
 import pickle
 
+from multiprocessing import get_context
 from rich import print
-from typing import List, Dict, Tuple
+from sqlalchemy import update
+from typing import List, Dict, Tuple, TypedDict
+
+import psutil
 
 from db.get_db_session import get_db_session
 from db.models import DpdHeadwords, InflectionTemplates
@@ -20,23 +24,51 @@ from tools.superscripter import superscripter_uni
 from tools.paths import ProjectPaths
 
 
-pth = ProjectPaths()
-db_session = get_db_session(pth.dpd_db_path)
-dpd_db = db_session.query(DpdHeadwords).all()
+class ProgData():
+    def __init__(self) -> None:
+        self.pth = ProjectPaths()
+        self.db_session = get_db_session(self.pth.dpd_db_path)
+        self.dpd_db = self.db_session.query(DpdHeadwords).all()
+        self.changed_templates: list = []
+        self.changed_headwords: list = []
+
+
+# a compiled table is a list of html strings and inflection cells,
+# (inflection, html before the word, html after the word)
+CompiledTable = List[str | Tuple[str, str, str]]
+
+# (like, compiled table)
+CompiledTemplate = Tuple[str, CompiledTable]
+
+# (id, lemma_1, pos, stem, pattern)
+InflectionItem = Tuple[int, str, str, str, str]
 
-changed_templates: list = []
-changed_headwords: list = []
 
-# !!! how is all_tipitaka_words getting generated?
+class InflectionResult(TypedDict):
+    id: int
+    inflections: str
+    inflections_html: str
 
-with open(pth.all_tipitaka_words_path, "rb") as f:
-    all_tipitaka_words: set = pickle.load(f)
+
+# shared with the worker processes
+compiled_templates: Dict[str, CompiledTemplate]
+all_tipitaka_words: set
+
+
+def init_inflections_worker(
+        templates: Dict[str, CompiledTemplate],
+        tipitaka_words: set
+) -> None:
+    global compiled_templates, all_tipitaka_words
+    compiled_templates = templates
+    all_tipitaka_words = tipitaka_words
 
 
 def main():
     """run it."""
     tic()
     print("[bright_yellow]generate inflection lists and html tables")
+    g = ProgData()
 
     # check config
     if (
@@ -48,84 +80,88 @@ def main():
         regenerate_all: bool = False
 
     if regenerate_all is not True:
-        test_changes()
+        test_changes(g)
 
     print("[green]generating html tables and lists")
-    add_to_db = []
-    for i in dpd_db:
-
-        test1 = i.lemma_1 in changed_headwords
-        test2 = i.pattern in changed_templates
-        test3 = regenerate_all is True
-
-        if test1 or test2 or test3:
-
-            # regenerate is true then delete the whole table
-            # regenerate is false then just delete the row
-            # pattern != "" then add html table and list
-            # stem contains "!" then add table and clean headword
-            # pattern == "" then no table, just add clean headword
-
-            if regenerate_all:
-                pass
-                # FIXME derived data table no longer exists!
-                # db_session.execute(DerivedData.__table__.delete()) # type: ignore
-
-            if i.pattern:
-                html, inflections_list = generate_inflection_table(i)
-                
-                i.inflections = ",".join(inflections_list)
-                i.inflections_html = html
-
-                if "!" in i.stem:
-                    i.inflections = i.lemma_clean
-                    i.inflections_html = html
-            else:
-                i.inflections = i.lemma_clean
-
 
-
-    db_session.commit()
-
-    print("[green]adding to db")
-
-    for row in add_to_db:
-        db_session.add(row)
-
-    with open(pth.changed_headwords_path, "wb") as f:
-        pickle.dump(changed_headwords, f)
-
-    with open(pth.template_changed_path, "wb") as f:
-        pickle.dump(changed_templates, f)
+    # regenerate is true then regenerate every row
+    # regenerate is false then just the changed rows
+    # pattern != "" then add html table and list
+    # stem contains "!" then add table and clean headword
+    # pattern == "" then no table, just add clean headword
+
+    changed_db = [
+        i for i in g.dpd_db
+        if i.lemma_1 in g.changed_headwords
+        or i.pattern in g.changed_templates
+        or regenerate_all is True]
+
+    # no pattern, just the clean headword
+    add_to_db: List[InflectionResult] = [
+        InflectionResult(
+            id=i.id,
+            inflections=i.lemma_clean,
+            inflections_html=i.inflections_html)
+        for i in changed_db if not i.pattern]
+
+    items: List[InflectionItem] = [
+        (i.id, i.lemma_1, i.pos, i.stem, i.pattern)
+        for i in changed_db if i.pattern]
+
+    templates = compile_templates(
+        g.db_session.query(InflectionTemplates).all())
+    with open(g.pth.all_tipitaka_words_path, "rb") as f:
+        tipitaka_words: set = pickle.load(f)
+
+    # the tables are generated in the worker processes
+    with get_context("fork").Pool(
+        psutil.cpu_count(),
+        initializer=init_inflections_worker,
+        initargs=(templates, tipitaka_words)
+    ) as pool:
+        add_to_db.extend(pool.imap(_parse_item, items, chunksize=100))
+
+    print("[green]adding to db", end=" ")
+    if add_to_db:
+        g.db_session.execute(update(DpdHeadwords), add_to_db)
+    print(len(add_to_db))
+
+    with open(g.pth.changed_headwords_path, "wb") as f:
+        pickle.dump(g.changed_headwords, f)
+
+    with open(g.pth.template_changed_path, "wb") as f:
+        pickle.dump(g.changed_templates, f)
 
     # # !!! find all unused patterns !!!
 
     if config_test("regenerate", "inflections", "yes"):
         config_update("regenerate", "inflections", "no")
 
-    db_session.commit()
-    db_session.close()
+    g.db_session.commit()
+    g.db_session.close()
     toc()
 
 
-def test_inflection_template_changed():
+def test_inflection_template_changed(g: ProgData):
     """test if the inflection template has changes since the last run"""
 
     try:
-        with open(pth.inflection_templates_pickle_path, "rb") as f:
+        with open(g.pth.inflection_templates_pickle_path, "rb") as f:
             old_templates: List[InflectionTemplates] = pickle.load(f)
     except Exception:
         old_templates = []
-    new_templates = db_session.query(InflectionTemplates).all()
+    new_templates = g.db_session.query(InflectionTemplates).all()
 
     print("[green]testing for changed templates")
+    old_data = {table.pattern: table.data for table in old_templates}
     for new_template in new_templates:
-        for old_template in old_templates:
-            if new_template.pattern == old_template.pattern:
-                if new_template.data != old_template.data:
-                    changed_templates.append(new_template.pattern)
-    if changed_templates:
-        print(f"	[red]{changed_templates}")
+        if (
+            new_template.pattern in old_data
+            and new_template.data != old_data[new_template.pattern]
+        ):
+            g.changed_templates.append(new_template.pattern)
+    if g.changed_templates:
+        print(f"	[red]{g.changed_templates}")
 
     print("[green]testing for added patterns")
     old_patterns: set = {table.pattern for table in old_templates}
@@ -137,7 +173,7 @@ def test_inflection_template_changed():
 
     if added_patterns != []:
         print(f"\t[red]{added_patterns}")
-        changed_templates.extend(added_patterns)
+        g.changed_templates.extend(added_patterns)
 
     print("[green]testing for deleted patterns")
     deleted_patterns = [
@@ -154,49 +190,49 @@ def test_inflection_template_changed():
 
     if changed_like != []:
         print(f"\t[red]{changed_like}")
-        changed_templates.extend(changed_like)
+        g.changed_templates.extend(changed_like)
 
     def save_pickle() -> None:
-        tables = db_session.query(InflectionTemplates).all()
-        with open(pth.inflection_templates_pickle_path, "wb") as f:
+        tables = g.db_session.query(InflectionTemplates).all()
+        with open(g.pth.inflection_templates_pickle_path, "wb") as f:
             pickle.dump(tables, f)
 
     save_pickle()
 
 
-def test_missing_stem() -> None:
+def test_missing_stem(g: ProgData) -> None:
     """test for missing stem in db"""
     print("[green]testing for missing stem")
 
-    for i in dpd_db:
+    for i in g.dpd_db:
         if not i.stem:
             print(
                 f"\t[red]{i.lemma_1} {i.pos} has a missing stem.", end=" ")
             new_stem = input("what is the new stem? ")
             i.stem = new_stem
-    db_session.commit()
+    g.db_session.commit()
 
 
-def test_missing_pattern() -> None:
+def test_missing_pattern(g: ProgData) -> None:
     """test for missing pattern in db"""
     print("[green]testing for missing pattern")
 
-    for i in dpd_db:
+    for i in g.dpd_db:
         if i.stem != "-" and not i.pattern:
             print(f"\t[red]{i.lemma_1} {i.pos} has a missing pattern.", end=" ")
             new_pattern = input("what is the new pattern? ")
             i.pattern = new_pattern
-    db_session.commit()
+    g.db_session.commit()
 
 
-def test_wrong_pattern() -> None:
+def test_wrong_pattern(g: ProgData) -> None:
     """test if pattern exists in inflection templates"""
     print("[green]testing for wrong patterns")
 
-    tables = db_session.query(InflectionTemplates).all()
+    tables = g.db_session.query(InflectionTemplates).all()
     pattern_list: list = [table.pattern for table in tables]
 
-    wrong_pattern_db = db_session.query(DpdHeadwords).filter(
+    wrong_pattern_db = g.db_session.query(DpdHeadwords).filter(
         DpdHeadwords.pattern.notin_(pattern_list)).filter(
             DpdHeadwords.pattern != "").all()
 
@@ -208,90 +244,76 @@ def test_wrong_pattern() -> None:
             new_pattern = input("what is the new pattern? ")
             i.pattern = new_pattern
 
-    db_session.commit()
+    g.db_session.commit()
 
 
-def test_changes_in_stem_pattern() -> None:
+def test_changes_in_stem_pattern(g: ProgData) -> None:
     """test for changes in stem and pattern since last run"""
     print("[green]testing for changes in stem and pattern")
 
     try:
-        with open(pth.headword_stem_pattern_dict_path, "rb") as f:
+        with open(g.pth.headword_stem_pattern_dict_path, "rb") as f:
             old_dict: dict = pickle.load(f)
     except FileNotFoundError:
         old_dict = {}
 
     new_dict: Dict[str, Dict] = {}
-    for i in dpd_db:
+    for i in g.dpd_db:
         new_dict[i.lemma_1] = {
             "stem": i.stem, "pattern": i.pattern}
 
     for headword, value in new_dict.items():
         if value != old_dict.get(headword, None):
             print(f"\t[red]{headword}")
-            changed_headwords.append(headword)
+            g.changed_headwords.append(headword)
 
     def save_pickle() -> None:
         headword_stem_pattern_dict: Dict[str, Dict] = {}
-        for i in dpd_db:
+        for i in g.dpd_db:
             headword_stem_pattern_dict[i.lemma_1] = {
                 "stem": i.stem, "pattern": i.pattern}
 
-        with open(pth.headword_stem_pattern_dict_path, "wb") as f:
+        with open(g.pth.headword_stem_pattern_dict_path, "wb") as f:
             pickle.dump(headword_stem_pattern_dict, f)
 
     save_pickle()
 
 
-def test_missing_inflection_list_html() -> None:
+def test_missing_inflection_list_html(g: ProgData) -> None:
     """test for missing inflections in dpd_headwords table"""
 
     print("[green]testing for missing inflection list and html tables")
 
-    for i in dpd_db:
+    for i in g.dpd_db:
         if not i.inflections:
             print(f"\t[red]{i.lemma_1}")
-            changed_headwords.append(i.lemma_1)
+            g.changed_headwords.append(i.lemma_1)
 
 
-def test_changes() -> None:
+def test_changes(g: ProgData) -> None:
     """run all the tests"""
-    test_inflection_template_changed()
-    test_missing_stem()
-    test_missing_pattern()
-    test_wrong_pattern()
-    test_changes_in_stem_pattern()
-    test_missing_inflection_list_html()
+    test_inflection_template_changed(g)
+    test_missing_stem(g)
+    test_missing_pattern(g)
+    test_wrong_pattern(g)
+    test_changes_in_stem_pattern(g)
+    test_missing_inflection_list_html(g)
 
 
-def generate_inflection_table(i: DpdHeadwords) -> Tuple[str, list]:
-    """generate the inflection table based on stem + pattern and template"""
+def compile_templates(
+        templates: List[InflectionTemplates]
+) -> Dict[str, CompiledTemplate]:
+    """Parse every template once into a compiled table."""
 
-    if i.it is None or i.it.data is None:
-        return "", []
+    return {
+        t.pattern: (t.like, compile_table(json.loads(t.data)))
+        for t in templates
+        if t.data is not None}
 
-    table_data = json.loads(i.it.data)
-    inflections_list: list = [i.lemma_clean]
 
-    # heading
-    html: str = "<p class='heading'>"
-    html += f"<b>{superscripter_uni(i.lemma_1)}</b> is <b>{i.pattern}</b> "
-    if i.it.like != "irreg":
-        if i.pos in CONJUGATIONS:
-            html += "conjugation "
-        elif i.pos in DECLENSIONS:
-            html += "declension "
-        html += f"(like <b>{i.it.like})</b>"
-    else:
-        if i.pos in CONJUGATIONS:
-            html += "conjugation "
-        if i.pos in DECLENSIONS:
-            html += "declension "
-        html += "(irregular)"
-    html += "</p>"
-
-    html += "<table class='inflection'>"
-    stem = re.sub(r"\!|\*", "", i.stem)
+def compile_table(table_data: list) -> CompiledTable:
+    """Compile the template data into html strings and inflection cells,
+    which only need the stem to be filled in."""
 
     # data is a nest of lists
     # list[] table
@@ -302,50 +324,107 @@ def generate_inflection_table(i: DpdHeadwords) -> Tuple[str, list]:
     # odd rows > 0 are inflections
     # even rows > 0 are grammar info
 
-    for row in enumerate(table_data):
-        row_number: int = row[0]
-        row_data: List[list] = row[1]
-        html += "<tr>"
-        for column in enumerate(row_data):
-            column_number: int = column[0]
-            cell_data: List = column[1]
+    compiled: CompiledTable = []
+    for row_number, row_data in enumerate(table_data):
+        compiled.append("<tr>")
+        for column_number, cell_data in enumerate(row_data):
             if row_number == 0:
                 if column_number == 0:
-                    html += "<th></th>"
+                    compiled.append("<th></th>")
                 if column_number % 2 == 1:
-                    html += f"<th>{cell_data[0]}</th>"
+                    compiled.append(f"<th>{cell_data[0]}</th>")
             elif row_number > 0:
                 if column_number == 0:
-                    html += f"<th>{cell_data[0]}</th>"
+                    compiled.append(f"<th>{cell_data[0]}</th>")
                 elif column_number % 2 == 1 and column_number > 0:
                     title: str = [row_data[column_number + 1]][0][0]
 
                     for inflection in cell_data:
                         if not inflection:
-                            html += f"<td title='{title}'></td>"
+                            compiled.append(f"<td title='{title}'></td>")
+                        elif len(cell_data) == 1:
+                            compiled.append(
+                                (inflection, f"<td title='{title}'>", "</td>"))
+                        elif inflection == cell_data[0]:
+                            compiled.append(
+                                (inflection, f"<td title='{title}'>", "<br>"))
+                        elif inflection != cell_data[-1]:
+                            compiled.append((inflection, "", "<br>"))
                         else:
-                            word_clean = f"{stem}{inflection}"
-                            if word_clean in all_tipitaka_words:
-                                word = f"{stem}<b>{inflection}</b>"
-                            else:
-                                word = f"<span class='gray'>{stem}<b>{inflection}</b></span>"
-
-                            if len(cell_data) == 1:
-                                html += f"<td title='{title}'>{word}</td>"
-                            else:
-                                if inflection == cell_data[0]:
-                                    html += f"<td title='{title}'>{word}<br>"
-                                elif inflection != cell_data[-1]:
-                                    html += f"{word}<br>"
-                                else:
-                                    html += f"{word}</td>"
-                            if word_clean not in inflections_list:
-                                inflections_list.append(word_clean)
-
-        html += "</tr>"
-    html += "</table>"
-
-    return html, inflections_list
+                            compiled.append((inflection, "", "</td>"))
+
+        compiled.append("</tr>")
+    return compiled
+
+
+def _parse_item(item: InflectionItem) -> InflectionResult:
+    id, lemma_1, pos, stem, pattern = item
+    lemma_clean = re.sub(r" \d.*$", "", lemma_1)
+
+    html, inflections_list = generate_inflection_table(
+        lemma_1, lemma_clean, pos, stem, pattern)
+    inflections = ",".join(inflections_list)
+    if "!" in stem:
+        inflections = lemma_clean
+
+    return InflectionResult(
+        id=id, inflections=inflections, inflections_html=html)
+
+
+def generate_inflection_table(
+        lemma_1: str,
+        lemma_clean: str,
+        pos: str,
+        stem: str,
+        pattern: str
+) -> Tuple[str, list]:
+    """generate the inflection table based on stem + pattern and template"""
+
+    if pattern not in compiled_templates:
+        return "", []
+
+    like, compiled_table = compiled_templates[pattern]
+    inflections_list: list = [lemma_clean]
+    inflections_set: set = {lemma_clean}
+
+    # heading
+    html: List[str] = ["<p class='heading'>"]
+    html.append(f"<b>{superscripter_uni(lemma_1)}</b> is <b>{pattern}</b> ")
+    if like != "irreg":
+        if pos in CONJUGATIONS:
+            html.append("conjugation ")
+        elif pos in DECLENSIONS:
+            html.append("declension ")
+        html.append(f"(like <b>{like})</b>")
+    else:
+        if pos in CONJUGATIONS:
+            html.append("conjugation ")
+        if pos in DECLENSIONS:
+            html.append("declension ")
+        html.append("(irregular)")
+    html.append("</p>")
+
+    html.append("<table class='inflection'>")
+    stem = re.sub(r"\!|\*", "", stem)
+
+    for part in compiled_table:
+        if isinstance(part, str):
+            html.append(part)
+        else:
+            inflection, before, after = part
+            word_clean = f"{stem}{inflection}"
+            if word_clean in all_tipitaka_words:
+                word = f"{stem}<b>{inflection}</b>"
+            else:
+                word = f"<span class='gray'>{stem}<b>{inflection}</b></span>"
+            html.append(f"{before}{word}{after}")
+            if word_clean not in inflections_set:
+                inflections_list.append(word_clean)
+                inflections_set.add(word_clean)
+
+    html.append("</table>")
+
+    return "".join(html), inflections_list
 
 
 if __name__ == "__main__":
@@ -6,15 +6,14 @@ and matching corresponding headwords."""
 import csv
 
 from rich import print
-from tools.lookup_is_another_value import is_another_value
 
 from tools.tic_toc import tic, toc, bip, bop
 from db.get_db_session import get_db_session
-from db.models import DpdHeadwords, Lookup
+from db.models import DpdHeadwords
 from tools.paths import ProjectPaths
 from tools.deconstructed_words import make_words_in_deconstructions
 from tools.headwords_clean_set import make_clean_headwords_set
-from tools.update_test_add import update_test_add
+from tools.lookup_writer import write_lookup_column
 from tools.pali_sort_key import pali_list_sorter
 
 
@@ -93,32 +92,10 @@ def add_i2h_to_db(db_session, i2h_dict):
     bip()
     print(f"[green]{'adding to db':<30}", end="")
 
-    lookup_table = (db_session.query(Lookup).all())
-    update_set, test_set, add_set = update_test_add(lookup_table, i2h_dict)
-
-    # update test add
-    for i in lookup_table:
-        if i.lookup_key in update_set:
-            i.headwords_pack(sorted(i2h_dict[i.lookup_key]))
-        elif i.lookup_key in test_set:
-            if is_another_value(i, "headwords"):
-                i.headwords = ""
-            else:
-                db_session.delete(i)    
-    
-    db_session.commit()
-
-    # add
-    add_to_db = []
-    for inflection, ids in i2h_dict.items():    
-        if inflection in add_set:
-            add_me = Lookup()
-            add_me.lookup_key = inflection
-            add_me.headwords_pack(sorted(ids))
-            add_to_db.append(add_me)
-
-    db_session.add_all(add_to_db)
-    db_session.commit()
+    headwords_dict = {
+        inflection: sorted(ids)
+        for inflection, ids in i2h_dict.items()}
+    write_lookup_column(db_session, "headwords", headwords_dict)
     db_session.close()
 
     print(f"{len(i2h_dict):>10,}{bop():>10}")
@@ -0,0 +1,46 @@
+// transliterate words into Devanagari, Sinhala and Thai using PathNirvana code
+// a long-lived worker speaking newline-delimited json over stdin and stdout
+// each input line is a json list of words
+// each output line is {"sinhala": [...], "devanagari": [...], "thai": [...]}
+// in the same order as the words
+
+import { createInterface } from "readline"
+
+import { TextProcessor, Script } from './pali-script.mjs'
+
+function toSinhala(text) {
+	text = TextProcessor.basicConvertFrom(text, Script.RO)
+	return text
+}
+
+function toDevanagari(text) {
+	text = TextProcessor.basicConvert(text, Script.HI)
+	return text
+}
+
+function toThai(text) {
+	text = TextProcessor.basicConvert(text, Script.THAI)
+	return text
+}
+
+const lines = createInterface({ input: process.stdin, terminal: false })
+
+for await (const line of lines) {
+	let sinhala = []
+	let devanagari = []
+	let thai = []
+
+	for (let word of JSON.parse(line)) {
+		let sinhala_word = toSinhala(word)
+		sinhala.push(sinhala_word)
+		devanagari.push(toDevanagari(sinhala_word))
+		thai.push(toThai(sinhala_word))
+	}
+
+	let translit = JSON.stringify({ sinhala, devanagari, thai }) + "\n"
+
+	// wait for python to read before taking the next line
+	if (!process.stdout.write(translit)) {
+		await new Promise(resolve => process.stdout.once("drain", resolve))
+	}
+}
@@ -9,14 +9,12 @@ from sqlalchemy.orm import Session
 from typing import DefaultDict
 
 from db.get_db_session import get_db_session
-from db.models import Lookup
 
-from tools.lookup_is_another_value import is_another_value
+from tools.lookup_writer import write_lookup_column
 from tools.pali_sort_key import pali_list_sorter
 from tools.paths import ProjectPaths
 from tools.tic_toc import tic, toc
 from tools.tsv_read_write import read_tsv
-from tools.update_test_add import update_test_add
 
 
 class ProgData():
@@ -24,7 +22,6 @@ class ProgData():
     variants_dict: DefaultDict[str, set[str]]
     spellings_dict: DefaultDict[str, set[str]]
     db_session: Session = get_db_session(pth.dpd_db_path)
-    lookup_table: list[Lookup] = db_session.query(Lookup).all()
 
 
 def load_variant_dict(pd):
@@ -41,46 +38,15 @@ def load_variant_dict(pd):
 
 def add_variants(pd: ProgData):
 
-    update_set, test_set, add_set = update_test_add(pd.lookup_table, pd.variants_dict)
-
-    lookup_table_update = pd.db_session \
-        .query(Lookup) \
-        .filter(Lookup.lookup_key.in_(update_set)) \
-        .all()
-    
     print(f"[green]{'update_set':<30}", end="")
+    variants_dict = {
+        variant: pali_list_sorter(main)
+        for variant, main in pd.variants_dict.items()}
+    counts = write_lookup_column(pd.db_session, "variant", variants_dict)
+    print(f"{counts.updated:>10,}")
 
-    # update test
-    if update_set:
-        for i in lookup_table_update:
-            if i.lookup_key in update_set:
-                sorted_variant = pali_list_sorter(pd.variants_dict[i.lookup_key])
-                i.variants_pack(sorted_variant)
-            
-            # test_set
-            elif i.lookup_key in test_set:
-                if is_another_value(i, "variant"):
-                    i.variant = ""
-                else:
-                    pd.db_session.delete(i)    
-    
-    print(f"{len(update_set):>10,}")
-
-    # add
     print(f"[green]{'add set':<30}", end="")
-
-    if add_set:
-        add_to_db = []
-        for variant, main in pd.variants_dict.items():
-            if variant in add_set:
-                add_me = Lookup()
-                add_me.lookup_key = variant
-                add_me.variants_pack(pali_list_sorter(main))
-                add_to_db.append(add_me)
-
-        pd.db_session.add_all(add_to_db)
-
-    print(f"{len(add_set):>10,}")
+    print(f"{counts.added:>10,}")
 
 
 def load_spelling_dict(pd: ProgData):
@@ -97,46 +63,15 @@ def load_spelling_dict(pd: ProgData):
 
 def add_spellings(pd: ProgData):
 
-    update_set, test_set, add_set = update_test_add(pd.lookup_table, pd.spellings_dict)
-
-    lookup_table_update_test = pd.db_session \
-        .query(Lookup) \
-        .filter(Lookup.lookup_key.in_(update_set)) \
-        .all()
-    
     print(f"[green]{'update_set':<30}", end="")
+    spellings_dict = {
+        mistake: pali_list_sorter(correction)
+        for mistake, correction in pd.spellings_dict.items()}
+    counts = write_lookup_column(pd.db_session, "spelling", spellings_dict)
+    print(f"{counts.updated:>10,}")
 
-    # update test add
-    if update_set:
-        for i in lookup_table_update_test:
-            if i.lookup_key in update_set:
-                sorted_spelling = pali_list_sorter(pd.spellings_dict[i.lookup_key])
-                i.spelling_pack(sorted_spelling)
-            
-            # test_set
-            elif i.lookup_key in test_set:
-                if is_another_value(i, "spelling"):
-                    i.spelling = ""
-                else:
-                    pd.db_session.delete(i)    
-    
-    print(f"{len(update_set):>10,}")
-
-    # add
     print(f"[green]{'add set':<30}", end="")
-
-    if add_set:
-        add_to_db = []
-        for mistake, correction in pd.spellings_dict.items():
-            if mistake in add_set:
-                add_me = Lookup()
-                add_me.lookup_key = mistake
-                add_me.spelling_pack(pali_list_sorter(correction))
-                add_to_db.append(add_me)
-
-        pd.db_session.add_all(add_to_db)
-
-    print(f"{len(add_set):>10,}")
+    print(f"{counts.added:>10,}")
 
 
 def main():
@@ -147,7 +82,6 @@ def main():
     add_variants(pd)
     load_spelling_dict(pd)
     add_spellings(pd)
-    pd.db_session.commit()
     pd.db_session.close()
     toc()
     
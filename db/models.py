@@ -7,6 +7,7 @@ from typing import Optional
 
 from sqlalchemy import and_
 from sqlalchemy import case
+from sqlalchemy import event
 from sqlalchemy import null
 from sqlalchemy import Column
 from sqlalchemy import DateTime
@@ -21,6 +22,7 @@ from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import declared_attr
 from sqlalchemy.orm import object_session
+from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 
 from tools.cache_load import load_cf_set, load_idioms_set
@@ -37,6 +39,23 @@ class Base(DeclarativeBase):
     pass
 
 
+class derived_property:
+    """A property worked out from column values once per instance.
+    The value is kept in the instance __dict__, which is looked up before
+    the class, so it's only cleared when one of the columns changes."""
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.func(instance)
+        return value
+
+
 class DbInfo(Base):
     """Storing general key-value data such as dpd_release_version and cached
     values, e.g. cf_set and so on."""
@@ -592,19 +611,19 @@ class DpdHeadwords(Base):
             (and_(cls.root_key != null(), cls.family_root != null()), #type:ignore
                  cls.root_key + ' ' + cls.family_root), else_="")    
     
-    @property
+    @derived_property
     def lemma_1_(self) -> str:
         return self.lemma_1.replace(" ", "_").replace(".", "_")
 
-    @property
+    @derived_property
     def lemma_link(self) -> str:
         return self.lemma_1.replace(" ", "%20")
 
-    @property
+    @derived_property
     def lemma_clean(self) -> str:
         return re.sub(r" \d.*$", "", self.lemma_1)
 
-    @property
+    @derived_property
     def root_clean(self) -> str:
         try:
             if self.root_key is None:
@@ -615,28 +634,28 @@ class DpdHeadwords(Base):
             print(f"{self.lemma_1}: {e}")
             return ""
     
-    @property
+    @derived_property
     def construction_line1(self) -> str:
         if self.construction:
             return re.sub("\n.*", "", self.construction)
         else:
             return ""
 
-    @property
+    @derived_property
     def family_compound_list(self) -> list:
         if self.family_compound:
             return self.family_compound.split(" ")
         else:
             return [self.family_compound]
 
-    @property
+    @derived_property
     def family_idioms_list(self) -> list:
         if self.family_idioms:
             return self.family_idioms.split(" ")
         else:
             return [self.family_idioms]
 
-    @property
+    @derived_property
     def family_set_list(self) -> list:
         if self.family_set:
             return self.family_set.split("; ")
@@ -645,58 +664,45 @@ class DpdHeadwords(Base):
 
     @property
     def root_count(self) -> int:
-        db_session = object_session(self)
-        if db_session is None:
-            raise Exception("No db_session")
-
-        return db_session\
-            .query(DpdHeadwords.id)\
-            .filter(DpdHeadwords\
-            .root_key == self.root_key)\
-            .count()
+        root_counts = session_aggregate(
+            self, "dpd_headwords_root_counts", make_root_counts)
+        return root_counts.get(self.root_key, 0)
 
     @property
     def pos_list(self) -> list:
-        db_session = object_session(self)
-        if db_session is None:
-            raise Exception("No db_session")
+        return list(session_aggregate(
+            self, "dpd_headwords_pos_list", make_pos_list))
 
-        pos_db = db_session \
-            .query(DpdHeadwords.pos) \
-            .group_by(DpdHeadwords.pos) \
-            .all()
-        return sorted([i.pos for i in pos_db])
-
-    @property
+    @derived_property
     def antonym_list(self) -> list:
         if self.antonym:
             return self.antonym.split(", ")
         else:
             return [self.antonym]
 
-    @property
+    @derived_property
     def synonym_list(self) -> list:
         if self.synonym:
             return self.synonym.split(", ")
         else:
             return [self.synonym]
 
-    @property
+    @derived_property
     def variant_list(self) -> list:
         if self.variant:
             return self.variant.split(", ")
         else:
             return [self.variant]
 
-    @property
+    @derived_property
     def source_link_1(self) -> str:
         return generate_link(self.source_1) if self.source_1 else ""
 
-    @property
+    @derived_property
     def source_link_2(self) -> str:
         return generate_link(self.source_2) if self.source_2 else ""
 
-    @property
+    @derived_property
     def source_link_sutta(self) -> str:
         if self.meaning_2:
             if (
@@ -723,35 +729,35 @@ class DpdHeadwords(Base):
         else:
             return ""
     
-    @property
+    @derived_property
     def sanskrit_clean(self) -> str:
         sanskrit_clean = re.sub(r"\[.+\]", "", self.sanskrit)
         return sanskrit_clean.strip()
 
     # derived data properties
 
-    @property
+    @derived_property
     def inflections_list(self) -> list:
         if self.inflections:
             return self.inflections.split(",")
         else:
             return []
 
-    @property
+    @derived_property
     def inflections_sinhala_list(self) -> list:
         if self.inflections_sinhala:
             return self.inflections_sinhala.split(",")
         else:
             return []
 
-    @property
+    @derived_property
     def inflections_devanagari_list(self) -> list:
         if self.inflections_devanagari:
             return self.inflections_devanagari.split(",")
         else:
             return []
 
-    @property
+    @derived_property
     def inflections_thai_list(self) -> list:
         if self.inflections_thai:
             return self.inflections_thai.split(",")
@@ -760,37 +766,37 @@ class DpdHeadwords(Base):
 
     # needs_button
 
-    @property
+    @derived_property
     def needs_grammar_button(self) -> bool:
         return bool(self.meaning_1)
 
-    @property
+    @derived_property
     def needs_example_button(self) -> bool:
         return bool(
             self.meaning_1 
             and self.example_1 
             and not self.example_2)
 
-    @property
+    @derived_property
     def needs_examples_button(self) -> bool:
         return bool(
             self.meaning_1 
             and self.example_1 
             and self.example_2)
 
-    @property
+    @derived_property
     def needs_conjugation_button(self) -> bool:
         return bool(self.pos in CONJUGATIONS)
     
-    @property
+    @derived_property
     def needs_declension_button(self) -> bool:
         return bool(self.pos in DECLENSIONS)
 
-    @property
+    @derived_property
     def needs_root_family_button(self) -> bool:
         return bool(self.family_root)
     
-    @property
+    @derived_property
     def needs_word_family_button(self) -> bool:
         return bool(self.family_word)
 
@@ -802,7 +808,7 @@ class DpdHeadwords(Base):
     def idioms_set(self) -> set[str]:
         return load_idioms_set( )
     
-    @property
+    @derived_property
     def needs_compound_family_button(self) -> bool:
         return bool(
             self.meaning_1
@@ -823,7 +829,7 @@ class DpdHeadwords(Base):
         #     and any(item in cf_set 
         #         for item in i.family_compound_list))
 
-    @property
+    @derived_property
     def needs_compound_families_button(self) -> bool:
         return bool(
             self.meaning_1
@@ -834,7 +840,7 @@ class DpdHeadwords(Base):
                 any(item in self.cf_set for item in self.family_compound_list)
                 or self.lemma_clean in self.cf_set)) #type:ignore
 
-    @property
+    @derived_property
     def needs_idioms_button(self) -> bool:
         return bool(
             self.meaning_1
@@ -848,21 +854,21 @@ class DpdHeadwords(Base):
     #     or (i.family_idioms and any(item in idioms_set 
     #             for item in i.family_idioms_list)))
 
-    @property
+    @derived_property
     def needs_set_button(self) -> bool:
         return bool(
             self.meaning_1
             and self.family_set
             and len(self.family_set_list) == 1)
 
-    @property
+    @derived_property
     def needs_sets_button(self) -> bool:
         return bool(
             self.meaning_1
             and self.family_set
             and len(self.family_set_list) > 1)
 
-    @property
+    @derived_property
     def needs_frequency_button(self) -> bool:
         return bool(self.pos not in EXCLUDE_FROM_FREQ)
 
@@ -871,6 +877,69 @@ class DpdHeadwords(Base):
             self.meaning_1}"""
 
 
+# derived properties of DpdHeadwords which are cached on the instance
+_dpd_headwords_derived_properties = [
+    name for name, attr in vars(DpdHeadwords).items()
+    if isinstance(attr, derived_property)]
+
+
+def clear_derived_properties(target, *args) -> None:
+    """Clear the cached derived properties of a headword,
+    so they are worked out again from its new column values."""
+    instance_dict = target.__dict__
+    for name in _dpd_headwords_derived_properties:
+        if name in instance_dict:
+            del instance_dict[name]
+
+
+for column in DpdHeadwords.__table__.columns:
+    event.listen(getattr(DpdHeadwords, column.key), "set", clear_derived_properties)
+event.listen(DpdHeadwords, "expire", clear_derived_properties)
+event.listen(DpdHeadwords, "refresh", clear_derived_properties)
+
+
+def make_root_counts(db_session: Session) -> dict[str, int]:
+    """Count of headwords of every root."""
+    return dict(
+        db_session
+            .query(DpdHeadwords.root_key, func.count(DpdHeadwords.id))
+            .group_by(DpdHeadwords.root_key)
+            .all())
+
+
+def make_pos_list(db_session: Session) -> list[str]:
+    """Sorted list of every pos in use."""
+    pos_db = db_session \
+        .query(DpdHeadwords.pos) \
+        .group_by(DpdHeadwords.pos) \
+        .all()
+    return sorted([i.pos for i in pos_db])
+
+
+# aggregates over the whole table, kept in Session.info
+_session_aggregate_keys = ["dpd_headwords_root_counts", "dpd_headwords_pos_list"]
+
+
+def session_aggregate(instance, key: str, make_aggregate):
+    """Make an aggregate once per session, instead of once per access."""
+    db_session = object_session(instance)
+    if db_session is None:
+        raise Exception("No db_session")
+    if key not in db_session.info:
+        db_session.info[key] = make_aggregate(db_session)
+    return db_session.info[key]
+
+
+def clear_session_aggregates(db_session: Session, *args) -> None:
+    """Changes have been written or rolled back, so make the aggregates again."""
+    for key in _session_aggregate_keys:
+        db_session.info.pop(key, None)
+
+
+event.listen(Session, "after_flush", clear_session_aggregates)
+event.listen(Session, "after_rollback", clear_session_aggregates)
+
+
 class FamilyCompound(Base):
     __tablename__ = "family_compound"
     compound_family: Mapped[str] = mapped_column(primary_key=True)
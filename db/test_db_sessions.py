@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""Check that get_db_session never runs out of pooled connections:
+open more sessions than the default pool size and overflow (5 + 10),
+keep them all open and run a query on each.
+
+Usage:
+    python db/test_db_sessions.py
+"""
+
+import sys
+import time
+
+from rich import print
+from sqlalchemy import text
+
+from db.get_db_session import get_db_session
+from tools.paths import ProjectPaths
+
+session_count = 20
+
+# a pool which has run out waits 30s before raising
+time_limit = 5
+
+
+def open_sessions(pth: ProjectPaths, read_only: bool) -> tuple[int, float]:
+    """Open session_count sessions, query each while all stay open,
+    return the number of queries which worked and the time taken."""
+
+    start = time.time()
+    sessions = []
+    ok = 0
+    try:
+        for __ in range(session_count):
+            db_session = get_db_session(pth.dpd_db_path, read_only=read_only)
+            sessions.append(db_session)
+            db_session.execute(text("SELECT count(*) FROM lookup")).scalar()
+            ok += 1
+    except Exception as e:
+        print(f"[red]{e}")
+    finally:
+        for db_session in sessions:
+            db_session.close()
+    return ok, time.time() - start
+
+
+def main():
+    print(f"[bright_yellow]opening {session_count} concurrent db sessions")
+    pth = ProjectPaths()
+
+    failed = False
+    for name, read_only in [("read only", True), ("read write", False)]:
+        ok, elapsed = open_sessions(pth, read_only)
+        if ok == session_count and elapsed < time_limit:
+            print(f"[green]{name:<20}[white]{ok:>10}{elapsed:>10.3f}")
+        else:
+            print(f"[red]{name:<20}[white]{ok:>10}{elapsed:>10.3f}")
+            failed = True
+
+    if failed:
+        print("[bright_red]failed")
+        sys.exit(1)
+    print("[bright_green]ok")
+
+
+if __name__ == "__main__":
+    main()
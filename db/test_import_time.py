@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+"""Check that importing db.models stays cheap: it must not open the db or
+config.ini, and its cumulative import time under python -X importtime must
+stay within budget. Every forked worker and every python -c tool pays it.
+
+Usage:
+    python db/test_import_time.py
+"""
+
+import subprocess
+import sys
+
+from rich import print
+
+module = "db.models"
+
+# cumulative import time of db.models, sqlalchemy included
+import_budget_ms = 800
+
+# best of, to smooth out a busy machine
+runs = 5
+
+# record the files and dbs opened while importing
+import_code = f"""
+import sys
+
+def audit(event, args):
+    if event == "open" and str(args[0]).endswith((".db", ".ini")):
+        print(f"open {{args[0]}}")
+    elif event == "sqlite3.connect":
+        print(f"connect {{args[0]}}")
+
+sys.addaudithook(audit)
+import {module}
+"""
+
+
+def import_module() -> tuple[float, list[str]]:
+    """Import the module in a fresh interpreter, return its cumulative
+    import time in ms and the files it opened."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", import_code],
+        capture_output=True, text=True, check=True)
+
+    cumulative_ms = 0.0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        __, cumulative, name = line.split("|")
+        if name.strip() == module:
+            cumulative_ms = int(cumulative) / 1000
+
+    return cumulative_ms, result.stdout.splitlines()
+
+
+def main():
+    print(f"[bright_yellow]testing {module} import time")
+
+    times = []
+    opened = []
+    for __ in range(runs):
+        cumulative_ms, opened = import_module()
+        times.append(cumulative_ms)
+    best_ms = min(times)
+
+    print(f"[green]{'import time':<20}[white]{best_ms:>10.1f} ms")
+    print(f"[green]{'budget':<20}[white]{import_budget_ms:>10} ms")
+    print(f"[green]{'files opened':<20}[white]{len(opened):>10}")
+    for line in opened:
+        print(f"[red]{line}")
+
+    if opened or best_ms > import_budget_ms:
+        print("[bright_red]failed")
+        sys.exit(1)
+    print("[bright_green]ok")
+
+
+if __name__ == "__main__":
+    main()
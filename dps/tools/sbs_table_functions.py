@@ -1,67 +1,89 @@
-"""Functions for properties in SBS table"""
+"""Functions for properties in SBS table.
+
+The maps are read from the index tsvs once per process and shared by every
+SBS row. A map is read again when its file's mtime changes."""
 
 import csv
 import os
 
+from pathlib import Path
+from typing import Callable
+
 from dps.tools.paths_dps import DPSPaths
 
-dpspth = DPSPaths()
+_dpspth = None
+
+# (map name, tsv path): (mtime, map)
+_map_cache: dict[tuple[str, str], tuple[int, dict]] = {}
+
+
+def get_dpspth() -> DPSPaths:
+    """Make DPSPaths and its dirs on first use, not at import."""
+    global _dpspth
+    if _dpspth is None:
+        _dpspth = DPSPaths()
+    return _dpspth
+
+
+def read_tsv_map(
+    tsv_path: Path,
+    key_column: int,
+    value_column: int,
+    key_type: Callable = str,
+    value_type: Callable = str
+) -> dict:
+    """Read two columns of a TSV file into a dictionary."""
+    tsv_map = {}
+    with open(tsv_path, 'r', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile, delimiter='\t')
+        next(reader)  # Skip header row
+        for row in reader:
+            tsv_map[key_type(row[key_column])] = value_type(row[value_column])
+    return tsv_map
+
+
+def load_cached_map(name: str, tsv_path: Path, load_map: Callable) -> dict:
+    """Get a map from the cache, loading it again if its file has changed.
+    The map is shared, so don't change it."""
+    mtime = os.stat(tsv_path).st_mtime_ns
+    key = (name, str(tsv_path))
+    if key in _map_cache:
+        cached_mtime, cached_map = _map_cache[key]
+        if cached_mtime == mtime:
+            return cached_map
+    tsv_map = load_map(tsv_path)
+    _map_cache[key] = (mtime, tsv_map)
+    return tsv_map
+
 
 class SBS_table_tools:
     def load_chant_index_map(self):
         """Load the chant-index mapping from a TSV file into a dictionary."""
-        chant_index_map = {}
-        if dpspth.sbs_index_path:
-            with open(dpspth.sbs_index_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile, delimiter='\t')
-                next(reader)  # Skip header row
-                for row in reader:
-                    index, chant = row[0], row[1]
-                    chant_index_map[chant] = int(index)
-        return chant_index_map
-
+        return load_cached_map(
+            "chant_index", get_dpspth().sbs_index_path,
+            lambda path: read_tsv_map(path, 1, 0, value_type=int))
 
     def load_chant_link_map(self):
         """Load the chant-link mapping from a TSV file into a dictionary."""
-        chant_link_map = {}
-        if dpspth.sbs_index_path:
-            with open(dpspth.sbs_index_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile, delimiter='\t')
-                next(reader)  # Skip header row
-                for row in reader:
-                    chant, link = row[1], row[4]
-                    chant_link_map[chant] = link
-        return chant_link_map
-
+        return load_cached_map(
+            "chant_link", get_dpspth().sbs_index_path,
+            lambda path: read_tsv_map(path, 1, 4))
 
     def load_class_link_map(self):
         """Load the class-link mapping from a TSV file into a dictionary."""
-        class_link_map = {}
-        if dpspth.class_index_path:
-            with open(dpspth.class_index_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile, delimiter='\t')
-                next(reader)  # Skip header row
-                for row in reader:
-                    class_num, link = int(row[0]), row[2]  # Convert class_num to integer
-                    class_link_map[class_num] = link
-        return class_link_map
-
+        return load_cached_map(
+            "class_link", get_dpspth().class_index_path,
+            lambda path: read_tsv_map(path, 0, 2, key_type=int))
 
     def load_sutta_link_map(self):
         """Load the sutta-link mapping from a TSV file into a dictionary."""
-        sutta_link_map = {}
-        if dpspth.sutta_index_path:
-            with open(dpspth.sutta_index_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile, delimiter='\t')
-                next(reader)  # Skip header row
-                for row in reader:
-                    sutta_num, link = row[0], row[2]
-                    sutta_link_map[sutta_num] = link
-        return sutta_link_map
-
-    
+        return load_cached_map(
+            "sutta_link", get_dpspth().sutta_index_path,
+            lambda path: read_tsv_map(path, 0, 2))
+
     def generate_sbs_audio(self, lemma_clean):
         """Generate the sbs_audio string based on the presence of an audio file."""
+        dpspth = get_dpspth()
         if dpspth.anki_media_dir:
             audio_path = os.path.join(dpspth.anki_media_dir, f"{lemma_clean}.mp3")
             if os.path.exists(audio_path):
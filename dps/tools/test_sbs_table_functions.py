@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+"""Count the index files opened to render SBS entries, and check that the
+maps are read once per process and read again when a file changes."""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from mako.template import Template
+from pathlib import Path
+from rich import print
+
+from db.models import DpdHeadwords, SBS
+from dps.tools.sbs_table_functions import SBS_table_tools, get_dpspth
+from tools.paths import ProjectPaths
+
+renders = 100
+
+# each index file opened on this list counts
+index_paths: list[str] = []
+open_count = 0
+
+
+def count_open(event, args):
+    global open_count
+    if event == "open" and str(args[0]) in index_paths:
+        open_count += 1
+
+
+def make_sbs() -> SBS:
+    """A transient SBS with every chant, class and sutta link filled in."""
+    sbs_table_tools = SBS_table_tools()
+    chants = list(sbs_table_tools.load_chant_link_map())[:4]
+    kwargs = {}
+    for counter, chant in enumerate(chants, start=1):
+        kwargs[f"sbs_example_{counter}"] = f"example {counter}"
+        kwargs[f"sbs_chapter_{counter}"] = f"chapter {counter}"
+        kwargs[f"sbs_chant_pali_{counter}"] = chant
+    kwargs["sbs_class_anki"] = next(iter(sbs_table_tools.load_class_link_map()))
+    kwargs["sbs_category"] = next(iter(sbs_table_tools.load_sutta_link_map()))
+    return SBS(**kwargs)
+
+
+def render_sbs(sbs_example_templ: Template, i: DpdHeadwords, sbs: SBS) -> str:
+    """Render the sbs examples and the sbs links of the definition."""
+    html = sbs_example_templ.render(i=i, sbs=sbs, make_link=False)
+    html += sbs.sbs_class_link
+    html += sbs.sbs_sutta_link
+    return html
+
+
+def count_opens(func) -> int:
+    global open_count
+    open_count = 0
+    func()
+    return open_count
+
+
+def main():
+    print("[bright_yellow]counting sbs index file opens")
+    pth = ProjectPaths()
+    sbs_example_templ = Template(filename=str(pth.sbs_example_templ_path))
+    i = DpdHeadwords(lemma_1="test 1")
+
+    # work on copies, so their mtimes can be changed
+    dpspth = get_dpspth()
+    temp_dir = tempfile.mkdtemp()
+    for attr in ["sbs_index_path", "class_index_path", "sutta_index_path"]:
+        temp_path = Path(temp_dir) / getattr(dpspth, attr).name
+        shutil.copy(getattr(dpspth, attr), temp_path)
+        setattr(dpspth, attr, temp_path)
+        index_paths.append(str(temp_path))
+    sys.addaudithook(count_open)
+
+    results = []
+
+    # chant index, chant link, class link and sutta link maps
+    first = count_opens(lambda: render_sbs(sbs_example_templ, i, make_sbs()))
+    results.append(("first render", first, 4))
+
+    def render_new_entries():
+        for __ in range(renders):
+            render_sbs(sbs_example_templ, i, make_sbs())
+    results.append(
+        (f"next {renders} renders", count_opens(render_new_entries), 0))
+
+    # the chant index and chant link maps are both read from sbs_index
+    stat = os.stat(dpspth.sbs_index_path)
+    os.utime(
+        dpspth.sbs_index_path,
+        ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    changed = count_opens(lambda: render_sbs(sbs_example_templ, i, make_sbs()))
+    results.append(("after file change", changed, 2))
+
+    shutil.rmtree(temp_dir)
+
+    failed = False
+    for name, count, expected in results:
+        if count == expected:
+            print(f"[green]{name:<20}[white]{count:>10}")
+        else:
+            print(f"[red]{name:<20}[white]{count:>10} [red]expected {expected}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
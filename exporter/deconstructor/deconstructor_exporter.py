@@ -54,7 +54,7 @@ def make_deconstructor_dict_data(g: ProgData) -> None:
 
     print(f"[green]{'making deconstructor data list':<40}")
 
-    db_session = get_db_session(g.pth.dpd_db_path)
+    db_session = get_db_session(g.pth.dpd_db_path, read_only=True)
     deconstructor_db = db_session \
         .query(Lookup) \
         .filter(Lookup.deconstructor!="") \
@@ -44,7 +44,7 @@ from exporter.ru_components.tools.tools_for_ru_exporter import make_ru_meaning_f
 def render_xhtml(pth: ProjectPaths, rupth: RuPaths, lang="en"):
 
     print(f"[green]{'querying dpd db':<40}", end="")
-    db_sesssion = get_db_session(pth.dpd_db_path)
+    db_sesssion = get_db_session(pth.dpd_db_path, read_only=True)
     if lang == "en":
         dpd_db = db_sesssion.query(DpdHeadwords).all()
     elif lang == "ru":
@@ -1,17 +1,21 @@
 """Compile HTML data for DpdHeadwords."""
 
 import psutil
+import sqlite3
 
+from collections import deque
+from pathlib import Path
+from sqlalchemy import and_, or_
 from sqlalchemy.sql import func
 
 
 from css_html_js_minify import css_minify, js_minify
 from mako.template import Template
 from minify_html import minify
-from multiprocessing.managers import ListProxy
-from multiprocessing import Process, Manager
+from multiprocessing import get_context
+from multiprocessing.pool import AsyncResult
 from rich import print
-from typing import List, Set, TypedDict, Tuple
+from typing import Deque, Iterator, List, Optional, Set, TypedDict, Tuple
 from typing import Union
 
 
@@ -20,6 +24,8 @@ from sqlalchemy.orm.session import Session
 from exporter.goldendict.helpers import TODAY
 from tools import time_log
 
+from db.get_db_session import get_db_session
+
 from db.models import DpdHeadwords, FamilyIdiom
 from db.models import DpdRoots
 from db.models import FamilyCompound
@@ -29,9 +35,28 @@ from db.models import FamilyWord
 from db.models import Russian
 from db.models import SBS
 
-from tools.configger import config_test
-from tools.exporter_functions import get_family_compounds, get_family_idioms
-from tools.exporter_functions import get_family_set
+from dps.tools.sbs_table_functions import get_dpspth
+
+from tools.configger import config_read, config_test
+from tools.export_render_cache import RenderCacheRow
+from tools.export_render_cache import connect_render_cache
+from tools.export_render_cache import fill_today
+from tools.export_render_cache import load_cached_entry
+from tools.export_render_cache import load_render_cache
+from tools.export_render_cache import make_content_hash
+from tools.export_render_cache import make_render_cache_row
+from tools.export_render_cache import make_settings_hash
+from tools.export_render_cache import module_files
+from tools.export_render_cache import prune_render_cache
+from tools.export_render_cache import row_values
+from tools.export_render_cache import save_render_cache
+from tools.export_render_cache import today_placeholder
+from tools.exporter_functions import FamiliesPrefetch
+from tools.exporter_functions import prefetch_families
+from tools.exporter_functions import get_family_compounds_prefetched
+from tools.exporter_functions import get_family_idioms_prefetched
+from tools.exporter_functions import get_family_set_prefetched
+from tools.exporter_functions import get_root_prefetched
 from tools.meaning_construction import (
     make_meaning_html,
     make_grammar_line,
@@ -49,8 +74,6 @@ from tools.utils import (
     DictEntry,
     RenderedSizes,
     default_rendered_sizes,
-    list_into_batches,
-    sum_rendered_sizes,
     squash_whitespaces)
 from exporter.ru_components.tools.tools_for_ru_exporter import make_ru_meaning_html, ru_replace_abbreviations, replace_english, ru_make_grammar_line, read_set_ru_from_tsv
 
@@ -74,18 +97,33 @@ class DpdHeadwordsTemplates:
         self.frequency_templ = Template(filename=str(paths.frequency_templ_path))
         self.feedback_templ = Template(filename=str(paths.feedback_templ_path))
 
+        with open(paths.dpd_css_path) as f:
+            inline_css = css_minify(f.read())
+
+        with open(paths.buttons_js_path) as f:
+            inline_js = js_minify(f.read())
+
         # internal or external css
         if config_test("dictionary", "external_css", "yes"):
             self.dpd_css = ""
             self.button_js = ""
         else:
-            with open(paths.dpd_css_path) as f:
-                dpd_css = f.read()
-                self.dpd_css = css_minify(dpd_css)
+            self.dpd_css = inline_css
+            self.button_js = inline_js
+
+        # the header is the same for every headword, so only render it once
+        header = render_header_templ(
+            paths, self.dpd_css, self.button_js, self.header_templ)
+        self.header_size = len(header)
+
+        # "Soft" minification for header to preserve links
+        self.header = squash_whitespaces(header)
 
-            with open(paths.buttons_js_path) as f:
-                button_js = f.read()
-                self.button_js = js_minify(button_js)
+        # bytes saved per headword by linking the shared dpd.css and buttons.js
+        # in the dictionary resources, instead of inlining them
+        inline_header = squash_whitespaces(render_header_templ(
+            paths, inline_css, inline_js, self.header_templ))
+        self.header_saved = len(inline_header) - len(self.header)
 
 DpdHeadwordsDbRowItems = Tuple[DpdHeadwords, FamilyRoot, FamilyWord, SBS, Russian]
 
@@ -247,14 +285,12 @@ def render_pali_word_dpd_html(
 
     html += "</body></html>"
 
-    # FIXME No need to render the same header for every file
-    header = render_header_templ(pth, tt.dpd_css, tt.button_js, tt.header_templ)
-    size_dict["dpd_header"] += len(header)
+    size_dict["dpd_header"] += tt.header_size
+    size_dict["dpd_header_saved"] += tt.header_saved
+    html = tt.header + minify(html)
 
-    # "Soft" minification for header to preserve links
-    html = squash_whitespaces(header) + minify(html)
-
-    synonyms: List[str] = i.inflections_list
+    # a copy, the cached list on the headword mustn't grow
+    synonyms: List[str] = list(i.inflections_list)
     synonyms = add_niggahitas(synonyms)
     for synonym in synonyms:
         if synonym in sandhi_contractions:
@@ -306,7 +342,9 @@ def generate_dpd_html(
         dps_data=False,
         lang="en",
         data_limit:int = 0
-) -> Tuple[List[DictEntry], RenderedSizes]:
+) -> Tuple[Iterator[DictEntry], RenderedSizes]:
+    """Returns a generator of DictEntry in lemma_1 order and a RenderedSizes
+    total, which is only complete once the generator has been consumed."""
     
     time_log.log("generate_dpd_html()")
 
@@ -335,8 +373,6 @@ def generate_dpd_html(
     else:
         show_ebt_count: bool = False
 
-    dpd_data_list: List[DictEntry] = []
-
     if lang == "en":
         pali_words_count = db_session \
             .query(func.count(DpdHeadwords.id)) \
@@ -350,7 +386,7 @@ def generate_dpd_html(
     
     # limit the data size for testing purposes
     if data_limit != 0:
-        pali_words_count = data_limit
+        pali_words_count = min(data_limit, pali_words_count)
         
     # If the work items per loop are too high, low-memory systems will slow down
     # when multi-threading.
@@ -363,113 +399,390 @@ def generate_dpd_html(
     else:
         limit = 5000
 
-    offset = 0
-
-    manager = Manager()
-    dpd_data_results_list: ListProxy = manager.list()
-    rendered_sizes_results_list: ListProxy = manager.list()
     num_logical_cores = psutil.cpu_count()
     print(f"num_logical_cores {num_logical_cores}")
 
-    time_log.log("while offset <= pali_words_count:")
-
-    while offset <= pali_words_count:
-
-        dpd_db_query = db_session \
-            .query(
-                DpdHeadwords, FamilyRoot, FamilyWord, SBS, Russian) \
-            .outerjoin(
-                FamilyRoot, DpdHeadwords.root_family_key == FamilyRoot.root_family_key) \
-            .outerjoin(
-                FamilyWord, DpdHeadwords.family_word == FamilyWord.word_family) \
-            .outerjoin(
-                Russian, DpdHeadwords.id == Russian.id) \
-            .outerjoin(
-                SBS, DpdHeadwords.id == SBS.id) \
-            .order_by(DpdHeadwords.lemma_1) \
+    render_data = DpdHeadwordsRenderData(
+        pth = pth,
+        word_templates = word_templates,
+        sandhi_contractions = sandhi_contractions,
+        cf_set = cf_set,
+        idioms_set = idioms_set,
+        make_link = make_link,
+        show_id = show_id,
+        show_ebt_count = show_ebt_count,
+        dps_data = dps_data
+    )
+
+    if config_test("dictionary", "render_cache", "yes"):
+        settings_hash = make_dpd_settings_hash(
+            paths, word_templates, lang, extended_synonyms, make_link,
+            show_id, show_ebt_count, dps_data, cf_set, idioms_set)
+        cache_path = pth.export_render_cache_path
+    else:
+        settings_hash = None
+        cache_path = None
+    cache_kind = f"dpd_{lang}"
+
+    # workers are forked, so they inherit the render settings
+    global worker_render_settings
+    worker_render_settings = (
+        render_data, lang, extended_synonyms, dps_data, settings_hash, cache_kind)
+
+    total_sizes = default_rendered_sizes()
+
+    def _dpd_data_stream() -> Iterator[DictEntry]:
+        """Render chunks of headwords in a long-lived pool and yield the
+        results in lemma_1 order. Only a bounded number of chunks are in
+        flight at any one time, so memory stays constant."""
+
+        time_log.log("render dpd chunks")
+
+        pool = get_context("fork").Pool(
+            num_logical_cores,
+            initializer=init_dpd_worker,
+            initargs=(pth.dpd_db_path, cache_path))
+        in_flight: Deque[AsyncResult] = deque()
+        max_in_flight = num_logical_cores * 2
+        counter = 0
+        rendered_counter = 0
+        seen_keys: Set[str] = set()
+
+        if cache_path:
+            cache_conn = connect_render_cache(cache_path)
+
+        def _collect(async_result: AsyncResult) -> Iterator[DictEntry]:
+            nonlocal counter, rendered_counter
+            results, new_cache_rows = async_result.get()
+            if new_cache_rows:
+                save_render_cache(cache_conn, cache_kind, new_cache_rows)
+                rendered_counter += len(new_cache_rows)
+            for entry, sizes in results:
+                add_rendered_sizes(total_sizes, sizes)
+                counter += 1
+                if counter % limit == 0:
+                    print(f"{counter:>10,} / {pali_words_count:<10,} {bop():>10}")
+                    bip()
+                yield entry
+
+        try:
+            id_chunks = iter_dpd_id_chunks(
+                db_session, lang, pali_words_count, dpd_chunk_size)
+            for id_chunk in id_chunks:
+                seen_keys.update(str(i) for i in id_chunk)
+                in_flight.append(
+                    pool.apply_async(render_dpd_chunk, (id_chunk,)))
+                if len(in_flight) >= max_in_flight:
+                    yield from _collect(in_flight.popleft())
+
+            while in_flight:
+                yield from _collect(in_flight.popleft())
+
+        finally:
+            pool.terminate()
+            pool.join()
+
+        print(f"{counter:>10,} / {pali_words_count:<10,} {bop():>10}")
+
+        if total_sizes["dpd_header_saved"]:
+            saved_mb = total_sizes["dpd_header_saved"] / 1024 / 1024
+            print(f"[green]{'shared css and js':<20}[white]{saved_mb:>10,.1f} MB saved")
+
+        if cache_path:
+            print(f"[green]{'rendered':<20}[white]{rendered_counter:>10,}")
+            print(f"[green]{'from render cache':<20}[white]{counter - rendered_counter:>10,}")
+            if data_limit == 0:
+                prune_render_cache(cache_conn, cache_kind, seen_keys)
+            cache_conn.close()
+
+        time_log.log("render dpd chunks done")
+
+    time_log.log("generate_dpd_html() return")
+    
+    return _dpd_data_stream(), total_sizes
+
+
+# the modules of the helpers called while rendering a headword
+dpd_helper_modules = [
+    "db.models",
+    "dps.tools.sbs_table_functions",
+    "exporter.goldendict.helpers",
+    "tools.exporter_functions",
+    "tools.link_generator",
+    "tools.meaning_construction",
+    "tools.niggahitas",
+    "tools.pali_sort_key",
+    "tools.pos",
+    "tools.superscripter",
+    "tools.utils",
+]
+ru_helper_modules = [
+    "exporter.ru_components.tools.tools_for_ru_exporter",
+]
+
+
+def make_dpd_settings_hash(
+        paths: Union[ProjectPaths, RuPaths],
+        word_templates: DpdHeadwordsTemplates,
+        lang: str,
+        extended_synonyms: bool,
+        make_link: bool,
+        show_id: bool,
+        show_ebt_count: bool,
+        dps_data: bool,
+        cf_set: Set[str],
+        idioms_set: Set[str]
+) -> str:
+    """Hash everything which is the same for every headword:
+    templates, css, js, exporter code and settings."""
+
+    files = [
+        paths.header_templ_path,
+        paths.dpd_definition_templ_path,
+        paths.button_box_templ_path,
+        paths.grammar_templ_path,
+        paths.example_templ_path,
+        paths.sbs_example_templ_path,
+        paths.inflection_templ_path,
+        paths.family_root_templ_path,
+        paths.family_word_templ_path,
+        paths.family_compound_templ_path,
+        paths.family_idiom_templ_path,
+        paths.family_set_templ_path,
+        paths.frequency_templ_path,
+        paths.feedback_templ_path,
+        Path(__file__),
+    ]
+    # the helpers called while rendering
+    files.extend(module_files(dpd_helper_modules))
+    if lang == "ru":
+        files.extend(module_files(ru_helper_modules))
+        files.append(paths.sets_ru_path)
+
+    # the sbs chant, class and sutta links are read from the sbs index files
+    dpspth = get_dpspth()
+    files.extend([
+        dpspth.sbs_index_path,
+        dpspth.class_index_path,
+        dpspth.sutta_index_path,
+    ])
+
+    settings = [
+        word_templates.dpd_css,
+        word_templates.button_js,
+        lang,
+        extended_synonyms,
+        make_link,
+        show_id,
+        show_ebt_count,
+        dps_data,
+        sorted(cf_set),
+        sorted(idioms_set),
+        config_read("dictionary", "link_url"),
+    ]
+
+    return make_settings_hash(files, settings)
+
+
+def make_dpd_content_hash(
+        db_parts: DpdHeadwordsDbParts,
+        sandhi_contractions: SandhiContractions,
+        settings_hash: str
+) -> str:
+    """Hash the rows of one headword and the sandhi contractions
+    of its inflections. Must be done before rendering,
+    which changes some of the columns."""
+
+    i = db_parts["pali_word"]
+    contractions = {}
+    for inflection in add_niggahitas(list(i.inflections_list)):
+        if inflection in sandhi_contractions:
+            contractions[inflection] = sorted(
+                sandhi_contractions[inflection]["contractions"])
+
+    return make_content_hash(settings_hash, [
+        row_values(i),
+        row_values(db_parts["pali_root"]),
+        row_values(db_parts["sbs"]),
+        row_values(db_parts["ru"]),
+        row_values(db_parts["family_root"]),
+        row_values(db_parts["family_word"]),
+        [row_values(fc) for fc in db_parts["family_compounds"]],
+        [row_values(fi) for fi in db_parts["family_idioms"]],
+        [row_values(fs) for fs in db_parts["family_set"]],
+        contractions,
+    ])
+
+
+# number of headwords each worker renders per task
+dpd_chunk_size = 100
+
+# set by generate_dpd_html before the pool is forked
+worker_render_settings: Tuple[
+    DpdHeadwordsRenderData, str, bool, bool, Optional[str], str]
+
+# each worker opens its own session
+worker_db_session: Session
+
+# and its own render cache connection
+worker_cache_conn: Optional[sqlite3.Connection]
+
+
+def iter_dpd_id_chunks(
+        db_session: Session,
+        lang: str,
+        pali_words_count: int,
+        chunk_size: int
+) -> Iterator[List[int]]:
+    """Keyset paginate through the headword ids in (lemma_1, id) order,
+    instead of LIMIT / OFFSET which rescans every previous page."""
+
+    last_lemma = None
+    last_id = None
+    remaining = pali_words_count
+
+    while remaining > 0:
+        id_query = db_session \
+            .query(DpdHeadwords.lemma_1, DpdHeadwords.id)
         
         if lang == "ru":
-            dpd_db_query = dpd_db_query.filter(
-                    Russian.id.isnot(None)
-                )
-
-        dpd_db = dpd_db_query.limit(limit).offset(offset).all()
-
-        def _add_parts(i: DpdHeadwordsDbRowItems) -> DpdHeadwordsDbParts:
-            pw: DpdHeadwords
-            fr: FamilyRoot
-            fw: FamilyWord
-            sbs: SBS
-            ru: Russian
-            pw, fr, fw, sbs, ru = i
-
-            return DpdHeadwordsDbParts(
-                pali_word = pw,
-                pali_root = pw.rt,
-                sbs = sbs,
-                ru = ru,
-                family_root = fr,
-                family_word = fw,
-                family_compounds = get_family_compounds(pw),
-                family_idioms = get_family_idioms(pw),
-                family_set = get_family_set(pw),
-            )
+            id_query = id_query \
+                .join(Russian, DpdHeadwords.id == Russian.id) \
+                .filter(Russian.id.isnot(None))
+
+        if last_lemma is not None:
+            id_query = id_query.filter(
+                or_(
+                    DpdHeadwords.lemma_1 > last_lemma,
+                    and_(
+                        DpdHeadwords.lemma_1 == last_lemma,
+                        DpdHeadwords.id > last_id)))
+
+        page = id_query \
+            .order_by(DpdHeadwords.lemma_1, DpdHeadwords.id) \
+            .limit(min(chunk_size, remaining)) \
+            .all()
+
+        if not page:
+            break
+
+        last_lemma, last_id = page[-1]
+        remaining -= len(page)
+        yield [i.id for i in page]
+
+
+def init_dpd_worker(db_path: Path, cache_path: Optional[Path]) -> None:
+    """Give each pool worker its own database session
+    and render cache connection."""
+    global worker_db_session, worker_cache_conn
+    worker_db_session = get_db_session(db_path, read_only=True)
+    if cache_path:
+        worker_cache_conn = connect_render_cache(cache_path)
+    else:
+        worker_cache_conn = None
+
+
+def render_dpd_chunk(
+        id_chunk: List[int]
+) -> Tuple[List[Tuple[DictEntry, RenderedSizes]], List[RenderCacheRow]]:
+    """Query and render a chunk of headwords inside a pool worker.
+    Only the rendered DictEntry and RenderedSizes go back to the parent,
+    together with the newly rendered entries for the render cache.
+    Headwords which haven't changed come straight from the render cache."""
+
+    (render_data, lang, extended_synonyms, dps_data,
+        settings_hash, cache_kind) = worker_render_settings
+
+    dpd_db = worker_db_session \
+        .query(
+            DpdHeadwords, FamilyRoot, FamilyWord, SBS, Russian) \
+        .outerjoin(
+            FamilyRoot, DpdHeadwords.root_family_key == FamilyRoot.root_family_key) \
+        .outerjoin(
+            FamilyWord, DpdHeadwords.family_word == FamilyWord.word_family) \
+        .outerjoin(
+            Russian, DpdHeadwords.id == Russian.id) \
+        .outerjoin(
+            SBS, DpdHeadwords.id == SBS.id) \
+        .filter(DpdHeadwords.id.in_(id_chunk)) \
+        .order_by(DpdHeadwords.lemma_1, DpdHeadwords.id) \
+        .all()
+
+    db_parts_list = make_dpd_db_parts(worker_db_session, dpd_db)
+
+    results: List[Tuple[DictEntry, RenderedSizes]] = []
+    new_cache_rows: List[RenderCacheRow] = []
+
+    today = str(TODAY)
+    if settings_hash is None or worker_cache_conn is None:
+        for db_parts in db_parts_list:
+            entry, sizes = render_pali_word_dpd_html(
+                db_parts, render_data, lang, extended_synonyms, dps_data)
+            results.append((fill_today(entry, today), sizes))
 
-        dpd_db_data = [_add_parts(i.tuple()) for i in dpd_db]
+    else:
+        keys = [str(db_parts["pali_word"].id) for db_parts in db_parts_list]
+        render_cache = load_render_cache(worker_cache_conn, cache_kind, keys)
+
+        for key, db_parts in zip(keys, db_parts_list):
+            content_hash = make_dpd_content_hash(
+                db_parts, render_data["sandhi_contractions"], settings_hash)
+            cached = load_cached_entry(
+                render_cache.get(key), content_hash, today)
+            if cached is None:
+                entry, sizes = render_pali_word_dpd_html(
+                    db_parts, render_data, lang, extended_synonyms, dps_data)
+                new_cache_rows.append(make_render_cache_row(
+                    key, content_hash, today, entry, sizes))
+                results.append((fill_today(entry, today), sizes))
+            else:
+                results.append(cached)
 
-        rendered_sizes: List[RenderedSizes] = []
+    # nothing is ever written back, so don't hold the objects in the session
+    worker_db_session.rollback()
+    worker_db_session.expunge_all()
 
-        batches: List[List[DpdHeadwordsDbParts]] = list_into_batches(dpd_db_data, num_logical_cores)
+    return results, new_cache_rows
 
-        processes: List[Process] = []
 
-        render_data = DpdHeadwordsRenderData(
-            pth = pth,
-            word_templates = word_templates,
-            sandhi_contractions = sandhi_contractions,
-            cf_set = cf_set,
-            idioms_set = idioms_set,
-            make_link = make_link,
-            show_id = show_id,
-            show_ebt_count = show_ebt_count,
-            dps_data = dps_data
+def make_dpd_db_parts(
+        db_session: Session,
+        dpd_db: list
+) -> List[DpdHeadwordsDbParts]:
+    """Assemble DpdHeadwordsDbParts for a page of query rows, with the
+    families and roots of the whole page prefetched in a few IN queries."""
+
+    rows: List[DpdHeadwordsDbRowItems] = [i.tuple() for i in dpd_db]
+    prefetch: FamiliesPrefetch = prefetch_families(
+        db_session, [i[0] for i in rows])
+
+    def _add_parts(i: DpdHeadwordsDbRowItems) -> DpdHeadwordsDbParts:
+        pw: DpdHeadwords
+        fr: FamilyRoot
+        fw: FamilyWord
+        sbs: SBS
+        ru: Russian
+        pw, fr, fw, sbs, ru = i
+
+        return DpdHeadwordsDbParts(
+            pali_word = pw,
+            pali_root = get_root_prefetched(pw, prefetch),
+            sbs = sbs,
+            ru = ru,
+            family_root = fr,
+            family_word = fw,
+            family_compounds = get_family_compounds_prefetched(pw, prefetch),
+            family_idioms = get_family_idioms_prefetched(pw, prefetch),
+            family_set = get_family_set_prefetched(pw, prefetch),
         )
 
-        def _parse_batch(batch: List[DpdHeadwordsDbParts]):
-            res: List[Tuple[DictEntry, RenderedSizes]] = \
-                [render_pali_word_dpd_html(i, render_data, lang, extended_synonyms, dps_data) for i in batch]
-
-            for i, j in res:
-                dpd_data_results_list.append(i)
-                rendered_sizes_results_list.append(j)
+    return [_add_parts(i) for i in rows]
 
-        for batch in batches:
-            p = Process(target=_parse_batch, args=(batch,))
 
-            p.start()
-            processes.append(p)
-
-        for p in processes:
-            p.join()
-        
-        if offset % limit == 0:
-            print(f"{offset:>10,} / {pali_words_count:<10,} {bop():>10}")
-            bip()
-
-        offset += limit
-
-    time_log.log("dpd_data_list = list...")
-    dpd_data_list = list(dpd_data_results_list)
-
-    time_log.log("rendered_sizes = list...")
-    rendered_sizes = list(rendered_sizes_results_list)
-
-    time_log.log("total_sizes = sum_ren...")
-    total_sizes = sum_rendered_sizes(rendered_sizes)
-
-    time_log.log("generate_dpd_html() return")
-    
-    return dpd_data_list, total_sizes
+def add_rendered_sizes(total: RenderedSizes, sizes: RenderedSizes) -> None:
+    """Add sizes to a running total in place."""
+    for k, v in sizes.items():
+        total[k] += v
 
 
 def render_header_templ(
@@ -803,7 +1116,7 @@ def render_grammar_templ(
             dps_data=dps_data,
             grammar=grammar,
             meaning=meaning,
-            today=TODAY))
+            today=today_placeholder))
 
 
 def render_example_templ(
@@ -818,7 +1131,7 @@ def render_example_templ(
         example_templ.render(
             i=i,
             make_link=make_link,
-            today=TODAY))
+            today=today_placeholder))
 
 
 def render_sbs_example_templ(
@@ -857,7 +1170,7 @@ def render_inflection_templ(
         inflection_templ.render(
             i=i,
             table=table,
-            today=TODAY,
+            today=today_placeholder,
             declensions=DECLENSIONS,
             conjugations=CONJUGATIONS))
 
@@ -874,7 +1187,7 @@ def render_family_root_templ(
         family_root_templ.render(
             i=i,
             fr=fr,
-            today=TODAY))
+            today=today_placeholder))
 
 
 def render_family_word_templ(
@@ -889,7 +1202,7 @@ def render_family_word_templ(
         family_word_templ.render(
             i=i,
             fw=fw,
-            today=TODAY))
+            today=today_placeholder))
 
 
 def render_family_compound_templ(
@@ -906,7 +1219,7 @@ def render_family_compound_templ(
             i=i,
             fc=fc,
             superscripter_uni=superscripter_uni,
-            today=TODAY))
+            today=today_placeholder))
 
 
 def render_family_idioms_templ(
@@ -923,7 +1236,7 @@ def render_family_idioms_templ(
             i=i,
             fi=fi,
             superscripter_uni=superscripter_uni,
-            today=TODAY))
+            today=today_placeholder))
 
 
 def render_family_set_templ(
@@ -939,7 +1252,7 @@ def render_family_set_templ(
             i=i,
             fs=fs,
             superscripter_uni=superscripter_uni,
-            today=TODAY))
+            today=today_placeholder))
 
 
 def render_frequency_templ(
@@ -958,7 +1271,7 @@ def render_frequency_templ(
     return str(
         frequency_templ.render(
             i=i,
-            today=TODAY,
+            today=today_placeholder,
             freq=freq))
 
 
@@ -972,4 +1285,4 @@ def render_feedback_templ(
     return str(
         feedback_templ.render(
             i=i,
-            today=TODAY))
+            today=today_placeholder))
@@ -1,19 +1,35 @@
 """Compile HTML data for Roots dictionary."""
 
 import re
+import sys
 
+from pathlib import Path
 from mako.template import Template
 from minify_html import minify
 from rich import print
 from sqlalchemy.orm import Session
 from typing import Dict, Tuple, List
 
-from export_dpd import render_header_templ
+from export_dpd import add_rendered_sizes, render_header_templ
 from exporter.goldendict.helpers import TODAY
 
 from db.models import DpdRoots, FamilyRoot
 from exporter.ru_components.tools.paths_ru import RuPaths
 from exporter.ru_components.tools.tools_for_ru_exporter import ru_replace_abbreviations
+from tools.configger import config_test
+from tools.export_render_cache import RenderCacheRow
+from tools.export_render_cache import connect_render_cache
+from tools.export_render_cache import fill_today
+from tools.export_render_cache import load_cached_entry
+from tools.export_render_cache import load_render_cache
+from tools.export_render_cache import make_content_hash
+from tools.export_render_cache import make_render_cache_row
+from tools.export_render_cache import make_settings_hash
+from tools.export_render_cache import module_files
+from tools.export_render_cache import prune_render_cache
+from tools.export_render_cache import row_values
+from tools.export_render_cache import save_render_cache
+from tools.export_render_cache import today_placeholder
 from tools.niggahitas import add_niggahitas
 from tools.pali_sort_key import pali_sort_key
 from tools.paths import ProjectPaths
@@ -45,10 +61,43 @@ def generate_root_html(
     roots_db = db_session.query(DpdRoots).all()
     root_db_length = len(roots_db)
 
+    if config_test("dictionary", "render_cache", "yes"):
+        settings_hash = make_root_settings_hash(pth, rupth, lang, dps_data)
+        cache_conn = connect_render_cache(pth.export_render_cache_path)
+        cache_kind = f"roots_{lang}"
+        render_cache = load_render_cache(
+            cache_conn, cache_kind, [r.root for r in roots_db])
+        family_roots_dict = make_family_roots_dict(db_session)
+    else:
+        settings_hash = None
+    new_cache_rows: List[RenderCacheRow] = []
+    today = str(TODAY)
+
     bip()
 
     for counter, r in enumerate(roots_db):
 
+        if counter % 100 == 0:
+            print(
+                f"{counter:>10,} / {root_db_length:<10,}{r.root:<20} {bop():>10}")
+            bip()
+
+        if settings_hash:
+            content_hash = make_content_hash(settings_hash, [
+                row_values(r),
+                roots_count_dict.get(r.root),
+                family_roots_dict.get(r.root, []),
+            ])
+            cached = load_cached_entry(
+                render_cache.get(r.root), content_hash, today)
+            if cached is not None:
+                res, root_size_dict = cached
+                root_data_list.append(res)
+                add_rendered_sizes(size_dict, root_size_dict)
+                continue
+
+        root_size_dict = default_rendered_sizes()
+
         # replace \n with html line break
         if r.panini_root:
             r.panini_root = r.panini_root.replace("\n", "<br>")
@@ -62,23 +111,23 @@ def generate_root_html(
 
         definition = render_root_definition_templ(pth, r, roots_count_dict, rupth, lang, dps_data)
         html += definition
-        size_dict["root_definition"] += len(definition)
+        root_size_dict["root_definition"] += len(definition)
 
         root_buttons = render_root_buttons_templ(pth, r, db_session, rupth, lang)
         html += root_buttons
-        size_dict["root_buttons"] += len(root_buttons)
+        root_size_dict["root_buttons"] += len(root_buttons)
 
         root_info = render_root_info_templ(pth, r, rupth, lang)
         html += root_info
-        size_dict["root_info"] += len(root_info)
+        root_size_dict["root_info"] += len(root_info)
 
         root_matrix = render_root_matrix_templ(pth, r, roots_count_dict, rupth, lang)
         html += root_matrix
-        size_dict["root_matrix"] += len(root_matrix)
+        root_size_dict["root_matrix"] += len(root_matrix)
 
         root_families = render_root_families_templ(pth, r, db_session, rupth, lang)
         html += root_families
-        size_dict["root_families"] += len(root_families)
+        root_size_dict["root_families"] += len(root_families)
 
         html += "</body></html>"
         
@@ -97,7 +146,7 @@ def generate_root_html(
             synonyms.add(re.sub("√", "", fr.root_family))
 
         synonyms = set(add_niggahitas(list(synonyms)))
-        size_dict["root_synonyms"] += len(str(synonyms))
+        root_size_dict["root_synonyms"] += len(str(synonyms))
 
         res = DictEntry(
             word = r.root,
@@ -106,16 +155,75 @@ def generate_root_html(
             synonyms = list(synonyms),
         )
 
-        root_data_list.append(res)
+        root_data_list.append(fill_today(res, today))
+        add_rendered_sizes(size_dict, root_size_dict)
 
-        if counter % 100 == 0:
-            print(
-                f"{counter:>10,} / {root_db_length:<10,}{r.root:<20} {bop():>10}")
-            bip()
+        if settings_hash:
+            new_cache_rows.append(make_render_cache_row(
+                r.root, content_hash, today, res, root_size_dict))
+
+    if settings_hash:
+        save_render_cache(cache_conn, cache_kind, new_cache_rows)
+        prune_render_cache(
+            cache_conn, cache_kind, {r.root for r in roots_db})
+        cache_conn.close()
+        print(f"[green]{'rendered':<20}[white]{len(new_cache_rows):>10,}")
+        print(f"[green]{'from render cache':<20}[white]{root_db_length - len(new_cache_rows):>10,}")
 
     return root_data_list, size_dict
 
 
+# the modules of the helpers called while rendering a root,
+# besides export_dpd for the header
+root_helper_modules = [
+    "db.models",
+    "exporter.goldendict.helpers",
+    "exporter.ru_components.tools.tools_for_ru_exporter",
+    "tools.niggahitas",
+    "tools.pali_sort_key",
+    "tools.utils",
+]
+
+
+def make_root_settings_hash(
+        pth: ProjectPaths,
+        rupth: RuPaths,
+        lang: str,
+        dps_data: bool
+) -> str:
+    """Hash the templates, exporter code and settings of the roots."""
+
+    if lang == "en":
+        paths = pth
+    elif lang == "ru":
+        paths = rupth
+
+    files = [
+        pth.header_templ_path,
+        paths.root_definition_templ_path,
+        paths.root_button_templ_path,
+        paths.root_info_templ_path,
+        paths.root_matrix_templ_path,
+        paths.root_families_templ_path,
+        Path(__file__),
+        Path(sys.modules[render_header_templ.__module__].__file__ or ""),
+    ]
+    files.extend(module_files(root_helper_modules))
+
+    return make_settings_hash(files, [lang, dps_data])
+
+
+def make_family_roots_dict(db_session: Session) -> Dict[str, List[dict]]:
+    """All the root families of each root, for the render cache hash."""
+
+    family_roots_dict: Dict[str, List[dict]] = {}
+    for fr in db_session.query(FamilyRoot).all():
+        family_roots_dict.setdefault(fr.root_key, []).append(row_values(fr))
+    for frs in family_roots_dict.values():
+        frs.sort(key=lambda x: x["root_family"])
+    return family_roots_dict
+
+
 def render_root_definition_templ(
                         pth: ProjectPaths,
                         r: DpdRoots, 
@@ -142,7 +250,7 @@ def render_root_definition_templ(
         root_definition_templ.render(
             r=r,
             count=count,
-            today=TODAY,
+            today=today_placeholder,
             dps_data=dps_data))
 
 
@@ -193,7 +301,7 @@ def render_root_info_templ(
         root_info_templ.render(
             r=r,
             root_info=root_info,
-            today=TODAY))
+            today=today_placeholder))
 
 
 def render_root_matrix_templ(
@@ -224,7 +332,7 @@ def render_root_matrix_templ(
             r=r,
             count=count,
             root_matrix=root_matrix,
-            today=TODAY))
+            today=today_placeholder))
 
 
 def render_root_families_templ(
@@ -254,4 +362,4 @@ def render_root_families_templ(
         root_families_templ.render(
             r=r,
             frs=frs,
-            today=TODAY))
+            today=today_placeholder))
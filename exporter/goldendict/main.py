@@ -3,11 +3,15 @@
 """Export DPD for GoldenDict and MDict."""
 
 import csv
+import json
 import pickle
 
+from itertools import chain
+from pathlib import Path
+
 from rich import print
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Iterable, Iterator, List
 
 from export_dpd import generate_dpd_html
 from export_roots import generate_root_html
@@ -42,14 +46,15 @@ class ProgData():
     def __init__(self) -> None:
         self.pth = ProjectPaths()
         self.rupth = RuPaths()
-        self.db_session: Session = get_db_session(self.pth.dpd_db_path)
+        self.db_session: Session = get_db_session(self.pth.dpd_db_path, read_only=True)
         self.sandhi_contractions = make_sandhi_contraction_dict(self.db_session)
         self.cf_set: set = load_cf_set()
         self.idioms_set: set = load_idioms_set()
         self.roots_count_dict = make_roots_count_dict(self.db_session)
         self.rendered_sizes: List[RenderedSizes] = []
         self.data_limit = int(config_read("dictionary", "data_limit") or "0")
-        self.dict_data: list[DictEntry]
+        self.dict_data: Iterable[DictEntry]
+        self.limited_data: list[DictEntry] = []
 
         # config tests
         self.make_mdict: bool = False
@@ -115,15 +120,20 @@ def main():
     help_data_list, sizes = generate_help_html(g.db_session, g.pth, g.rupth, g.lang, g.dps_data)
     g.rendered_sizes.append(sizes)
 
-    g.db_session.close()
-
-    g.dict_data = (
-        dpd_data_list +
-        root_data_list +
-        variant_spelling_data_list +
-        epd_data_list +
+    # dpd_data_list is a generator which renders as it is consumed,
+    # so the db_session stays open until the export is finished
+    g.dict_data = collect_limited_datalist(g, chain(
+        dpd_data_list,
+        root_data_list,
+        variant_spelling_data_list,
+        epd_data_list,
         help_data_list
-    )
+    ))
+
+    time_log.log("export_to_goldendict()")
+    prepare_export_to_goldendict_mdict(g)
+
+    g.db_session.close()
 
     time_log.log("write_limited_datalist()")
     write_limited_datalist(g)
@@ -131,9 +141,6 @@ def main():
     time_log.log("write_size_dict()")
     write_size_dict(g.pth, sum_rendered_sizes(g.rendered_sizes))
 
-    time_log.log("export_to_goldendict()")
-    prepare_export_to_goldendict_mdict(g)
-
     toc()
     time_log.log("exporter.py::main() return")
 
@@ -173,10 +180,42 @@ the Digital Pāḷi Dictionary website</a></p>
         icon_path=g.paths.icon_path
     )
 
-    export_to_goldendict_with_pyglossary(dict_info, dict_var, g.dict_data)
-    
     if g.make_mdict:
-        export_to_mdict(dict_info, dict_var, g.dict_data)
+        # mdict needs a second pass over the data, so spool it to disk
+        # once and stream it to each writer, instead of holding it in RAM
+        spool_path = g.pth.dict_data_spool_path
+        spool_dict_data(g.dict_data, spool_path)
+        export_to_goldendict_with_pyglossary(
+            dict_info, dict_var, read_spooled_dict_data(spool_path))
+        export_to_mdict(
+            dict_info, dict_var, read_spooled_dict_data(spool_path))
+        spool_path.unlink()
+    else:
+        export_to_goldendict_with_pyglossary(dict_info, dict_var, g.dict_data)
+
+
+def spool_dict_data(dict_data: Iterable[DictEntry], spool_path: Path) -> None:
+    """Write the dict data to disk, one json line per entry."""
+
+    bip()
+    print(f"[green]{'spooling dict data':<40}", end="")
+
+    count = 0
+    with open(spool_path, "w", encoding="utf-8") as f:
+        for item in dict_data:
+            f.write(json.dumps(item, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+
+    print(f"{count:>10,}{bop():>10}")
+
+
+def read_spooled_dict_data(spool_path: Path) -> Iterator[DictEntry]:
+    """Stream the spooled dict data back, one entry at a time."""
+
+    with open(spool_path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
 
 
 def write_size_dict(pth: ProjectPaths, size_dict):
@@ -192,14 +231,22 @@ def write_size_dict(pth: ProjectPaths, size_dict):
     print(f"{bop():>37}")
 
 
+def collect_limited_datalist(
+        g: ProgData, dict_data: Iterable[DictEntry]
+) -> Iterator[DictEntry]:
+    """Pass the data through, keeping a limited dataset on the side."""
+
+    for item in dict_data:
+        if item["word"].startswith("ab"):
+            g.limited_data.append(item)
+        yield item
+
+
 def write_limited_datalist(g: ProgData):
     """A limited dataset for troubleshooting purposes"""
 
-    limited_data = [
-        item for item in g.dict_data if item["word"].startswith("ab")]
-
     with open("temp/limited_data_list", "wb") as file:
-        pickle.dump(limited_data, file)
+        pickle.dump(g.limited_data, file)
 
 
 if __name__ == "__main__":
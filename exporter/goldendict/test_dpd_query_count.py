@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+"""Count the database queries issued by generate_dpd_html, in the parent
+and in every pool worker, and check that they grow with the number of
+pages, not the number of headwords."""
+
+import math
+import psutil
+import sys
+
+from multiprocessing import Value
+from rich import print
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import export_dpd
+
+from db.get_db_session import get_db_session
+from tools.cache_load import load_cf_set, load_idioms_set
+from tools.configger import config_read
+from tools.paths import ProjectPaths
+from tools.sandhi_contraction import make_sandhi_contraction_dict
+from tools.tic_toc import tic, toc
+
+# queries per page: keyset ids, headwords join, compounds, idioms, sets, roots
+queries_per_page = 6
+
+# queries per process: session setup, cf_set and idioms_set caches
+queries_per_process = 10
+
+# shared with the forked workers
+query_count = Value("i", 0)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    with query_count.get_lock():
+        query_count.value += 1
+
+
+def main():
+    tic()
+    print("[bright_yellow]counting dpd export queries")
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+    data_limit = int(config_read("dictionary", "data_limit") or "0")
+
+    sandhi_contractions = make_sandhi_contraction_dict(db_session)
+    cf_set = load_cf_set()
+    idioms_set = load_idioms_set()
+
+    query_count.value = 0
+    dpd_data, sizes = export_dpd.generate_dpd_html(
+        db_session, pth, pth, sandhi_contractions, cf_set, idioms_set,
+        data_limit=data_limit)
+    headwords_count = sum(1 for __ in dpd_data)
+    db_session.close()
+
+    pages = math.ceil(headwords_count / export_dpd.dpd_chunk_size)
+    processes = psutil.cpu_count() + 1
+    budget = (
+        queries_per_page * pages
+        + queries_per_process * processes)
+
+    print(f"[green]{'headwords':<20}[white]{headwords_count:>10,}")
+    print(f"[green]{'pages':<20}[white]{pages:>10,}")
+    print(f"[green]{'queries':<20}[white]{query_count.value:>10,}")
+    print(f"[green]{'budget':<20}[white]{budget:>10,}")
+
+    toc()
+
+    if query_count.value <= budget:
+        print("[green]queries are O(pages)")
+    else:
+        print("[red]too many queries, something is querying per headword!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,19 @@ every inflected word-form."""
 
 import csv
 import pickle
+import psutil
 
 from css_html_js_minify import css_minify, js_minify
 from json import loads
 from mako.template import Template
+from multiprocessing import get_context
 from rich import print
+from typing import Dict, List, Tuple
 
 
 from db.get_db_session import get_db_session
 from db.models import DpdHeadwords
 from db.models import InflectionTemplates
-from db.models import Lookup
 
 from exporter.ru_components.tools.paths_ru import RuPaths
 from exporter.ru_components.tools.tools_for_ru_exporter import ru_replace_abbreviations
@@ -23,14 +25,13 @@ from exporter.ru_components.tools.tools_for_ru_exporter import ru_replace_abbrev
 from tools.configger import config_test
 from tools.deconstructed_words import make_words_in_deconstructions
 from tools.goldendict_exporter import DictInfo, DictVariables, export_to_goldendict_with_pyglossary
-from tools.lookup_is_another_value import is_another_value
+from tools.lookup_writer import write_lookup_column
 from tools.mdict_exporter2 import export_to_mdict
 from tools.niggahitas import add_niggahitas
 from tools.pali_sort_key import pali_sort_key
 from tools.paths import ProjectPaths
 from tools.tic_toc import bip, bop
 from tools.tic_toc import tic, toc
-from tools.update_test_add import update_test_add
 from tools.utils import DictEntry
 
 
@@ -158,6 +159,117 @@ def render_header_templ(
     return str(header_templ.render(css=css, js=js))
 
 
+# (lemma_clean, pos, stem, pattern)
+GrammarItem = Tuple[str, str, str, str]
+
+# (inflection, grammar, html cells of the grammar) in table order
+CompiledGrammar = List[Tuple[str, str, str]]
+
+# {inflected_word: ({data_line: None}, {html_line: None})}
+# dicts are used as ordered sets
+GrammarShard = Dict[str, Tuple[Dict[tuple, None], Dict[str, None]]]
+
+grammar_shard_size = 2000
+
+# shared with the worker processes
+compiled_templates: Dict[str, CompiledGrammar]
+all_words_set: set
+
+
+def init_grammar_worker(
+        templates: Dict[str, CompiledGrammar],
+        words_set: set
+) -> None:
+    global compiled_templates, all_words_set
+    compiled_templates = templates
+    all_words_set = words_set
+
+
+def make_grammar_cells(grammar: str) -> str:
+    """The html table cells of the grammatical categories."""
+
+    cells = ""
+    if grammar.startswith("reflx"):
+        grammatical_categories = [grammar.split()[0] + " " + grammar.split()[1]]
+        grammatical_categories += grammar.split()[2:]
+        for grammatical_category in grammatical_categories:
+            cells += f"<td>{grammatical_category}</td>"
+    elif grammar.startswith("in comps"):
+        cells += f"<td colspan='3'>{grammar}</td>"
+    else:
+        grammatical_categories = grammar.split()
+        # adding empty values if there are less than 3
+        while len(grammatical_categories) < 3:
+            grammatical_categories.append("")
+        for grammatical_category in grammatical_categories:
+            cells += f"<td>{grammatical_category}</td>"
+    return cells
+
+
+def compile_grammar_templates(
+        templates: List[InflectionTemplates]
+) -> Dict[str, CompiledGrammar]:
+    """Parse every template once into its inflections and grammar."""
+
+    compiled: Dict[str, CompiledGrammar] = {}
+    for template in templates:
+        template_data = loads(template.data)
+        compiled_grammar: CompiledGrammar = []
+
+        # data is a nest of lists
+        # list[] table
+        # list[[]] row
+        # list[[[]]] cell
+        # row 0 is the top header
+        # column 0 is the grammar header
+        # odd rows > 0 are inflections
+        # even rows > 0 are grammar info
+
+        for row_number, row_data in enumerate(template_data):
+            for column_number, cell_data in enumerate(row_data):
+                if (
+                    row_number > 0                      #   skip the top header
+                    and column_number > 0               #   skip the side header
+                    and column_number % 2 == 1          #   skip even numbers = grammar info 
+                    and row_data[0][0] != "in comps"    #   skip this row
+                ):
+                    grammar: str = [row_data[column_number+1]][0][0]
+                    cells = make_grammar_cells(grammar)
+                    for inflection in cell_data:
+                        if inflection:
+                            compiled_grammar.append((inflection, grammar, cells))
+
+        compiled[template.pattern] = compiled_grammar
+    return compiled
+
+
+def _parse_shard(shard: List[GrammarItem]) -> GrammarShard:
+    """Find the grammar of every inflected word of a shard of headwords."""
+
+    grammar_shard: GrammarShard = {}
+    for lemma_clean, pos, stem, pattern in shard:
+
+        # indeclinables have no inflections
+        if stem == "-":
+            continue
+
+        # words with '*' in stem are irregular inflections, remove the * for clean processing. 
+        if stem == "*":
+            stem = ""
+
+        for inflection, grammar, cells in compiled_templates.get(pattern, []):
+            inflected_word = f"{stem}{inflection}"
+            if inflected_word in all_words_set:
+                data_line = (lemma_clean, pos, grammar)
+                html_line = f"<tr><td><b>{pos}</b></td>{cells}<td>of</td><td>{lemma_clean}</td></tr>"
+                data_lines, html_lines = grammar_shard.setdefault(
+                    inflected_word, ({}, {}))
+                data_lines[data_line] = None
+                html_lines[html_line] = None
+
+    return grammar_shard
+
+
 def generate_grammar_dict(g: ProgData):
     print("[green]generating grammar dictionary")
 
@@ -166,10 +278,6 @@ def generate_grammar_dict(g: ProgData):
     # 2. grammar_dict_table is just an html table {inflection: "html"}
     # 3. grammar_dict_html is full html page with header, style etc. {inflection: "html"}
 
-    grammar_dict = {}
-    grammar_dict_table = {}
-    grammar_dict_html = {}
-
     # create the header from a template
     header_templ = Template(filename=str(g.pth.header_grammar_dict_templ_path))
     html_header = render_header_templ(
@@ -179,160 +287,69 @@ def generate_grammar_dict(g: ProgData):
     
     html_table_header = "<body><div class='grammar_dict'><table class='grammar_dict'>"
 
-    # process the inflections of each word in DpdHeadwords
+    # process the inflections of each word in DpdHeadwords,
+    # in shards across all cores, merged back in order
     bip()
-    for counter, i in enumerate(g.db):
-
-        # words with ! in the stem are inflected forms 
-        # and wil get dealt with under the main headwords 
-        if "!" in i.stem:
-            pass
-        
-        # words with '*' in stem are irregular inflections, remove the * for clean processing. 
-        if i.stem == "*":
-            i.stem = ""
-        
-        # process indeclinables
-        if i.stem == "-":
-            continue
-            data_line = (i.lemma_clean, i.pos, "indeclinable")
-            html_line = f"<tr><td><b>{i.pos}</b></td><td colspan='5'>indeclinable</td></tr>"
-
-            # grammar_dict update
-            if i.lemma_clean not in grammar_dict:
-                grammar_dict[i.lemma_clean] = [data_line]
-            else:
-                if data_line not in grammar_dict[i.lemma_clean]:
-                    grammar_dict[i.lemma_clean].append(data_line)
-
-            # grammar_dict_html update
-            if i.lemma_clean not in grammar_dict_html:
-                grammar_dict_html[i.lemma_clean] = f"{html_header}{html_line}"
-                grammar_dict_table[i.lemma_clean] = f"{html_table_header}{html_line}"
-            else:
-                if html_line not in grammar_dict_html[i.lemma_clean]:
-                    grammar_dict_html[i.lemma_clean] += html_line
-                    grammar_dict_table[i.lemma_clean] += html_line
-
-        # all other words need an inflection table generated 
-        # to find out their grammatical category, i.e. masc nom sg
-        else:
-            # get template
-            template = g.db_session \
-                .query(InflectionTemplates) \
-                .filter(InflectionTemplates.pattern == i.pattern) \
-                .first()
-
-            if template is not None:
-                template_data = loads(template.data)
-                
-                # data is a nest of lists
-                # list[] table
-                # list[[]] row
-                # list[[[]]] cell
-                # row 0 is the top header
-                # column 0 is the grammar header
-                # odd rows > 0 are inflections
-                # even rows > 0 are grammar info
-
-                for row_number, row_data in enumerate(template_data):
-                    for column_number, cell_data in enumerate(row_data):
-
-                        if (
-                            row_number > 0                      #   skip the top header
-                            and column_number > 0               #   skip the side header
-                            and column_number % 2 == 1          #   skip even numbers = grammar info 
-                            and row_data[0][0] != "in comps"    #   skip this row
-                        ):
-                            grammar: str = [row_data[column_number+1]][0][0]
-
-                            for inflection in cell_data:
-                                if inflection:
-                                    inflected_word = f"{i.stem}{inflection}"
-                                    if inflected_word in g.all_words_set:
-
-                                        data_line = (i.lemma_clean, i.pos, grammar)
-                                        html_line = "<tr>"
-                                        html_line += f"<td><b>{i.pos}</b></td>"
-                                        # get grammatical_categories from grammar
-                                        grammatical_categories = []
-                                        if grammar.startswith("reflx"):
-                                            grammatical_categories.append(grammar.split()[0] + " " + grammar.split()[1])
-                                            grammatical_categories += grammar.split()[2:]
-                                            for grammatical_category in grammatical_categories:
-                                                html_line += f"<td>{grammatical_category}</td>"
-                                        elif grammar.startswith("in comps"):
-                                            html_line += f"<td colspan='3'>{grammar}</td>"
-                                        else:
-                                            grammatical_categories = grammar.split()
-                                            # adding empty values if there are less than 3
-                                            while len(grammatical_categories) < 3:
-                                                grammatical_categories.append("")
-                                            for grammatical_category in grammatical_categories:
-                                                html_line += f"<td>{grammatical_category}</td>"
-                                        html_line += "<td>of</td>"
-                                        html_line += f"<td>{i.lemma_clean}</td>"
-                                        html_line += "</tr>"
-
-                                        # grammar_dict update
-                                        if inflected_word not in grammar_dict:
-                                            grammar_dict[inflected_word] = [data_line]
-                                        else:
-                                            if data_line not in grammar_dict[inflected_word]:
-                                                grammar_dict[inflected_word].append(data_line)
-
-                                        # grammar_dict_html update
-                                        if inflected_word not in grammar_dict_html:
-                                            grammar_dict_html[inflected_word] = f"{html_header}{html_line}"
-                                            grammar_dict_table[inflected_word] = f"{html_table_header}{html_line}"
-                                        else:
-                                            if html_line not in grammar_dict_html[inflected_word]:
-                                                grammar_dict_html[inflected_word] += html_line
-                                                grammar_dict_table[inflected_word] += html_line
-
-        if counter % 5000 == 0:
-            print(f"{counter:>10,} / {len(g.db):<10,} {i.lemma_1[:20]:<20} {bop():>10}") 
-            bip()
+    templates = compile_grammar_templates(
+        g.db_session.query(InflectionTemplates).all())
+    items: List[GrammarItem] = [
+        (i.lemma_clean, i.pos, i.stem, i.pattern) for i in g.db]
+    shards = [
+        items[start:start + grammar_shard_size]
+        for start in range(0, len(items), grammar_shard_size)]
+
+    grammar_lines: GrammarShard = {}
+    with get_context("fork").Pool(
+        psutil.cpu_count(),
+        initializer=init_grammar_worker,
+        initargs=(templates, g.all_words_set)
+    ) as pool:
+        for grammar_shard in pool.imap(_parse_shard, shards):
+            for inflected_word, (data_lines, html_lines) in grammar_shard.items():
+                if inflected_word not in grammar_lines:
+                    grammar_lines[inflected_word] = (data_lines, html_lines)
+                else:
+                    grammar_lines[inflected_word][0].update(data_lines)
+                    grammar_lines[inflected_word][1].update(html_lines)
+    print(f"{len(items):>10,} / {len(g.db):<10,} {'headwords':<20} {bop():>10}")
 
     if g.lang == "ru":
-
-        # !!! FIXME very slow!
-
-        print_counter = 0
+        # the same lines repeat across many words,
+        # so each one only gets replaced once
         print("[green]replacing abbreviations: en > ru")
-        for inflected_word, html_content in grammar_dict_html.items():
-            # Replace abbreviations in each HTML line
-            html_lines = html_content.split('<tr>')
-            for i, line in enumerate(html_lines):
-                if line:
-                    # Replace abbreviations in the line
-                    line = ru_replace_abbreviations(line, kind="gram")
-                    # Update the HTML lines with the modified line
-                    html_lines[i] = line
-            # Join the modified lines back into a single HTML string
-            grammar_dict_html[inflected_word] = '<tr>'.join(html_lines)
+        ru_lines: Dict[str, str] = {}
 
-            print_counter += 1
-            if print_counter % 5000 == 0:
-                print(f"{print_counter:>10,} / {len(grammar_dict_html):<10,}{inflected_word[:20]:<20} {bop():>10}")
-                bip()
+        def ru_replace_line(line: str) -> str:
+            if line and line not in ru_lines:
+                ru_lines[line] = ru_replace_abbreviations(line, kind="gram")
+            return ru_lines.get(line, line)
 
+        html_page_header = "<tr>".join(
+            ru_replace_line(line) for line in html_header.split("<tr>"))
+    else:
+        html_page_header = html_header
 
+    grammar_dict = {}
+    grammar_dict_table = {}
+    grammar_dict_html = {}
 
     # FIXME what about using Jinja template here?
 
-    # clean up the html
-    for item in grammar_dict_html:
-        grammar_dict_html[item] += "</table></div></body></html>"
+    # !!! FIXME find out how to remove headings from table with only 1 row
 
-    for item in grammar_dict_table:
-        grammar_dict_table[item] += "</table></div>"
+    for inflected_word, (data_lines, html_lines) in grammar_lines.items():
+        grammar_dict[inflected_word] = list(data_lines)
+        html_table = "".join(html_lines)
+        grammar_dict_table[inflected_word] = \
+            f"{html_table_header}{html_table}</table></div></tbody></table></div>"
 
-    # !!! FIXME find out how to remove headings from table with only 1 row
+        if g.lang == "ru":
+            html_table = "".join(
+                f"<tr>{ru_replace_line(html_line[4:])}"
+                for html_line in html_lines)
+        grammar_dict_html[inflected_word] = \
+            f"{html_page_header}{html_table}</table></div></body></html>"
 
-    for item in grammar_dict_table:
-        grammar_dict_table[item] += "</tbody></table></div>"
-    
     g.grammar_dict = grammar_dict
     g.grammar_dict_table = grammar_dict_table
     g.grammar_dict_html = grammar_dict_html
@@ -361,33 +378,7 @@ def add_to_lookup_table(g: ProgData):
 
     print(f"[green]{'saving to Lookup table':<40}{len(g.grammar_dict):>10,}")
 
-    lookup_table = g.db_session.query(Lookup).all()
-    results = update_test_add(lookup_table, g.grammar_dict)
-    update_set, test_set, add_set = results
-
-    # update test add
-    for i in lookup_table:
-        if i.lookup_key in update_set:
-            i.grammar_pack(g.grammar_dict[i.lookup_key])
-        elif i.lookup_key in test_set:
-            if is_another_value(i, "grammar"):
-                i.grammar = ""
-            else:
-                g.db_session.delete(i)                
-    
-    g.commit_db()
-
-    # add
-    add_to_db = []
-    for inflection, grammar_data in g.grammar_dict.items():
-        if inflection in add_set:
-            add_me = Lookup()
-            add_me.lookup_key = inflection
-            add_me.grammar_pack(grammar_data)
-            add_to_db.append(add_me)
-
-    g.db_session.add_all(add_to_db)
-    g.commit_db()
+    write_lookup_column(g.db_session, "grammar", g.grammar_dict)
 
 
 def make_data_lists(g: ProgData):
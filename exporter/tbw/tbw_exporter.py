@@ -50,7 +50,7 @@ def exporte_tbw():
     
     print(f"[green]{'making db searches':<40}", end="")
 
-    db_session = get_db_session(pth.dpd_db_path)
+    db_session = get_db_session(pth.dpd_db_path, read_only=True)
     dpd_db = db_session.query(DpdHeadwords)
 
     deconstr_db = db_session.query(Lookup).filter(Lookup.deconstructor != "").all()
@@ -5,13 +5,13 @@
 import csv
 import json
 import os
-import pandas as pd
 import re
 import sqlite3
 
 from rich import print
 from mako.template import Template
 from sqlalchemy.orm import Session
+from typing import Iterator
 from zipfile import ZipFile, ZIP_DEFLATED
 
 from db.get_db_session import get_db_session
@@ -30,7 +30,7 @@ from exporter.goldendict.helpers import TODAY
 class ProgData():
     def __init__(self) -> None:
         self.pth = ProjectPaths()
-        self.db_session: Session = get_db_session(self.pth.dpd_db_path)
+        self.db_session: Session = get_db_session(self.pth.dpd_db_path, read_only=True)
         self.dpd_db = self.make_dpd_db()
         
         self.all_headwords_clean: set[str]
@@ -38,10 +38,6 @@ class ProgData():
         self.tpr_data_list: list[dict[str, str]]
         self.deconstructor_data_list: list[dict[str, str]]
         self.i2h_data_list: list[dict[str, str]]
-        
-        self.tpr_df: pd.DataFrame
-        self.i2h_df: pd.DataFrame
-        self.deconstr_df: pd.DataFrame
     
     def make_dpd_db(self):
         dpd_db = self.db_session.query(DpdHeadwords).all()
@@ -384,39 +380,67 @@ def write_tsvs(g: ProgData):
         writer.writerows(g.deconstructor_data_list)
 
 
-def copy_to_sqlite_db(g: ProgData):
-    print("[green]copying data_list to tpr db", end=" ")
+def make_tpr_tables(
+    g: ProgData
+) -> list[tuple[str, list[str], list[dict[str, str]]]]:
+    """The name, columns and data of each tpr table,
+    in the order of the sql updater."""
+
+    return [
+        (
+            "dpd_inflections_to_headwords",
+            ["inflection", "headwords"],
+            g.i2h_data_list),
+        (
+            "dpd",
+            ["word", "definition", "book_id"],
+            g.tpr_data_list),
+        (
+            "dpd_word_split",
+            ["word", "breakup"],
+            g.deconstructor_data_list),
+    ]
+
+
+def table_rows(
+    columns: list[str],
+    data_list: list[dict[str, str]]
+) -> Iterator[tuple[str, ...]]:
+    """Yield the values of each row in column order, with progress."""
+
+    for counter, data in enumerate(data_list):
+        row = tuple(data[column] for column in columns)
+        if counter % 50000 == 0:
+            print(f"{counter:>10,} / {len(data_list):<10,}{row[0]:<10}")
+        yield row
+
+
+def sql_value(value: str | int) -> str:
+    """A value as an sql literal, with quotes escaped."""
+    if isinstance(value, int):
+        return str(value)
+    return "'" + value.replace("'", "''") + "'"
 
-    # data frames
-    tpr_df = pd.DataFrame(g.tpr_data_list)
-    i2h_df = pd.DataFrame(g.i2h_data_list)
-    deconstr_df = pd.DataFrame(g.deconstructor_data_list)
+
+def copy_to_sqlite_db(g: ProgData):
+    print("[green]copying data_list to tpr db")
 
     try:
         conn = sqlite3.connect(
-            '../../.local/share/tipitaka_pali_reader/tipitaka_pali.db')
-        c = conn.cursor()
-
-        # dpd table
-        c.execute("DROP TABLE if exists dpd")
-        c.execute("CREATE TABLE dpd (word, definition, book_id)")
-        tpr_df.to_sql('dpd', conn, if_exists='append', index=False)
-
-        # inflection_to_headwords
-        c.execute("DROP TABLE if exists dpd_inflections_to_headwords")
-        c.execute(
-            "CREATE TABLE dpd_inflections_to_headwords (inflection, headwords)")
-        i2h_df.to_sql(
-            'dpd_inflections_to_headwords',
-            conn, if_exists='append', index=False)
-
-        # dpd_word_split
-        c.execute("DROP TABLE if exists dpd_word_split")
-        c.execute(
-            "CREATE TABLE dpd_word_split (word, breakup)")
-        deconstr_df.to_sql(
-            'dpd_word_split',
-            conn, if_exists='append', index=False)
+            '../../.local/share/tipitaka_pali_reader/tipitaka_pali.db',
+            isolation_level=None)
+
+        # all tables in one transaction
+        conn.execute("BEGIN")
+        for table_name, columns, data_list in make_tpr_tables(g):
+            print(f"writing {table_name}")
+            conn.execute(f"DROP TABLE if exists {table_name}")
+            conn.execute(f"CREATE TABLE {table_name} ({', '.join(columns)})")
+            placeholders = ", ".join("?" for __ in columns)
+            conn.executemany(
+                f"INSERT INTO {table_name} VALUES ({placeholders})",
+                table_rows(columns, data_list))
+        conn.execute("COMMIT")
         print("[white]ok")
 
         conn.close()
@@ -425,60 +449,29 @@ def copy_to_sqlite_db(g: ProgData):
         print("[red] an error occurred copying to db")
         print(f"[red]{e}")
 
-    g.tpr_df = tpr_df
-    g.i2h_df = i2h_df
-    g.deconstr_df = deconstr_df
-
-
 
 def tpr_updater(g: ProgData):
+    """Write the sql updater one row at a time."""
     print("[green]making tpr sql updater")
 
-    sql_string = ""
-    sql_string += "BEGIN TRANSACTION;\n"
-    sql_string += "DELETE FROM dpd;\n"
-    sql_string += "DELETE FROM dpd_inflections_to_headwords;\n"
-    sql_string += "DELETE FROM dpd_word_split;\n"
-    sql_string += "COMMIT;\n"
-    sql_string += "BEGIN TRANSACTION;\n"
-
-    print("writing inflections to headwords")
-
-    for row in range(len(g.i2h_df)):
-        inflection = g.i2h_df.iloc[row, 0]
-        headword = g.i2h_df.iloc[row, 1]
-        headword = headword.replace("'", "''")  #type:ignore
-        if row % 50000 == 0:
-            print(f"{row:>10,} / {len(g.i2h_df):<10,}{inflection:<10}")
-        sql_string += f"""INSERT INTO "dpd_inflections_to_headwords" \
-("inflection", "headwords") VALUES ('{inflection}', '{headword}');\n"""
-
-    print("writing dpd")
-
-    for row in range(len(g.tpr_df)):
-        word = g.tpr_df.iloc[row, 0]
-        definition = g.tpr_df.iloc[row, 1]
-        definition = definition.replace("'", "''") #type:ignore
-        book_id = g.tpr_df.iloc[row, 2]
-        if row % 50000 == 0:
-            print(f"{row:>10,} / {len(g.tpr_df):<10,}{word:<10}")
-        sql_string += f"""INSERT INTO "dpd" ("word","definition","book_id")\
- VALUES ('{word}', '{definition}', {book_id});\n"""
-
-    print("writing deconstructor")
-
-    for row in range(len(g.deconstr_df)):
-        word = g.deconstr_df.iloc[row, 0]
-        breakup = g.deconstr_df.iloc[row, 1]
-        if row % 50000 == 0:
-            print(f"{row:>10,} / {len(g.deconstr_df):<10,}{word:<10}")
-        sql_string += f"""INSERT INTO "dpd_word_split" ("word","breakup")\
- VALUES ('{word}', '{breakup}');\n"""
-
-    sql_string += "COMMIT;\n"
-
     with open(g.pth.tpr_sql_file_path, "w") as f:
-        f.write(sql_string)
+        f.write("BEGIN TRANSACTION;\n")
+        f.write("DELETE FROM dpd;\n")
+        f.write("DELETE FROM dpd_inflections_to_headwords;\n")
+        f.write("DELETE FROM dpd_word_split;\n")
+        f.write("COMMIT;\n")
+        f.write("BEGIN TRANSACTION;\n")
+
+        for table_name, columns, data_list in make_tpr_tables(g):
+            print(f"writing {table_name}")
+            column_names = ", ".join(f'"{column}"' for column in columns)
+            for row in table_rows(columns, data_list):
+                values = ", ".join(sql_value(value) for value in row)
+                f.write(
+                    f"""INSERT INTO "{table_name}" ({column_names}) \
+VALUES ({values});\n""")
+
+        f.write("COMMIT;\n")
 
 
 def copy_zip_to_tpr_downloads(g: ProgData):
@@ -1,25 +1,24 @@
 """Flask app for browser-based DPD lookup."""
 
-from curses.ascii import isalpha
+import csv
+import os
+
 from flask import Flask, render_template
 from markupsafe import Markup
-from flask import request
+from flask import g, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from db.get_db_session import get_db_session
-from db.models import (
-    DpdHeadwords,
-    DpdRoots,
-    FamilyRoot,
-    Lookup,
-    SBS,
-    Russian)
-from tools.pali_sort_key import pali_sort_key
+from db.models import DbInfo, Lookup
+from tools.configger import config_read, config_test
 from tools.paths import ProjectPaths
 
 from rich import print
 
-from modules import HeadwordData
-from modules import RootsData
+from html_cache import HtmlCache
+from modules import load_headwords_data
+from modules import load_roots_data
 from modules import DeconstructorData
 from modules import VariantData
 from modules import SpellingData
@@ -29,10 +28,6 @@ from modules import AbbreviationsData
 
 from exporter.goldendict.helpers import make_roots_count_dict
 
-from tools.exporter_functions import get_family_compounds
-from tools.exporter_functions import get_family_idioms
-from tools.exporter_functions import get_family_set
-
 
 pth = ProjectPaths()
 app = Flask(__name__)
@@ -42,112 +37,173 @@ app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:////{pth.dpd_db_path}"
 db = SQLAlchemy(app)
 
-db_session = get_db_session(pth.dpd_db_path)
+db_session = get_db_session(pth.dpd_db_path, read_only=True)
 roots_count_dict = make_roots_count_dict(db_session)
+db_session.close()
 
 with open(pth.buttons_js_path) as f:
     js = f.read()
 
+html_cache = HtmlCache(
+    int(config_read("web_app", "cache_size", "10000") or "0"))
+
+# (db file and wal file mtimes, version of the db used in the cache key)
+db_version_info: tuple[tuple[int, int], str] = ((0, 0), "")
+
+
+def get_db_mtimes() -> tuple[int, int]:
+    """The mtimes of the db file and its wal file. In wal mode a commit
+    only writes to the wal file, the db file changes at a checkpoint."""
+
+    wal_path = pth.dpd_db_path.with_name(f"{pth.dpd_db_path.name}-wal")
+    try:
+        wal_mtime = os.stat(wal_path).st_mtime_ns
+    except FileNotFoundError:
+        wal_mtime = 0
+    return os.stat(pth.dpd_db_path).st_mtime_ns, wal_mtime
+
+
+def get_db_version() -> str:
+    """The dpd_release_version of the db, only re-read from the db
+    when the db has changed. Any change, such as an edit in the gui,
+    makes a new version, so the cached html of the old one isn't served."""
+
+    global db_version_info
+    mtimes = get_db_mtimes()
+    if mtimes != db_version_info[0]:
+        db_session = get_db_session(pth.dpd_db_path, read_only=True)
+        try:
+            version = db_session.query(DbInfo.value)\
+                .filter_by(key="dpd_release_version")\
+                .scalar()
+        finally:
+            db_session.close()
+        db_version_info = (mtimes, f"{version or ''} {mtimes[0]} {mtimes[1]}")
+    return db_version_info[1]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    """Count the db queries of each request."""
+    if has_request_context():
+        g.query_count = g.get("query_count", 0) + 1
+
+
+@app.after_request
+def report_query_count(response):
+    query_count = g.get("query_count", 0)
+    response.headers["X-Query-Count"] = str(query_count)
+    return response
+
+
 @app.route("/", methods=['GET'])
 def home():
     query = request.args.get('query', '')
     query = clean_query(query)
     print(query)
-    result = []
     html = ""
-    
+
     if query:
-        if query.isalpha():
+        db_version = get_db_version()
+        html = html_cache.get(query, db_version)
+        if html is None:
+            html = make_lookup_html(query)
+            html_cache.put(query, db_version, html)
+
+    return render_template("home.html", html=html)
+
+
+@app.route("/stats", methods=['GET'])
+def stats():
+    return html_cache.stats()
+
+
+def make_lookup_html(query: str) -> str:
+    """Render the html of all the results of a query."""
+
+    html = ""
+
+    if query.isalpha():
+        result = db.session.query(Lookup)\
+            .filter(Lookup.lookup_key==(query))\
+            .first()
+
+        if not result:
+            query = query.lower()
             result = db.session.query(Lookup)\
                 .filter(Lookup.lookup_key==(query))\
                 .first()
-            
-            if not result:
-                query = query.lower()
-                result = db.session.query(Lookup)\
-                    .filter(Lookup.lookup_key==(query))\
-                    .first()
-            
-            if result:
-                # headwords
-                if result.headwords:
-                    headwords = result.headwords_unpack
-                    results = db.session\
-                        .query(DpdHeadwords)\
-                        .filter(DpdHeadwords.id.in_(headwords))\
-                        .all()
-                    for i in results:
-                        fc = get_family_compounds(i)
-                        fi = get_family_idioms(i)
-                        fs = get_family_set(i)
-                        sbs = db.session.query(SBS).filter_by(id=i.id).first()
-                        ru = db.session.query(Russian).filter_by(id=i.id).first()
-                        d = HeadwordData(i, fc, fi, fs, sbs, ru)
-                        html += render_template("dpd_headword.html", d=d)
-                
-                # roots
-                if result.roots:
-                    roots_list = result.roots_unpack
-                    root_results = db.session\
-                        .query(DpdRoots)\
-                        .filter(DpdRoots.root.in_(roots_list))\
-                        .all()
-                    for r in root_results:
-                        frs = db.session \
-                            .query(FamilyRoot) \
-                            .filter(FamilyRoot.root_key == r.root)
-                        frs = sorted(frs, key=lambda x: pali_sort_key(x.root_family))
-                        d = RootsData(r, frs, roots_count_dict)
-                        html += render_template("root.html", d=d)
-
-                # deconstructor
-                if result.deconstructor:
-                    d = DeconstructorData(result)
-                    html += render_template("deconstructor.html", d=d)
-
-                # variant
-                if result.variant:
-                    d = VariantData(result)
-                    html += render_template("variant.html", d=d)
-
-                # spelling mistake
-                if result.spelling:
-                    d = SpellingData(result)
-                    html += render_template("spelling.html", d=d)
-
-                if result.grammar:
-                    d = GrammarData(result)
-                    html += render_template("grammar.html", d=d)
-                
-                if result.help:
-                    d = HelpData(result)
-                    html += render_template("help.html", d=d)
-
-                if result.abbrev:
-                    d = AbbreviationsData(result)
-                    html += render_template("abbreviations.html", d=d)
-
-                return render_template("home.html", html=html)
-        
-        else:
-            query = int(query)
-            headword = db.session\
-                .query(DpdHeadwords)\
-                .filter(DpdHeadwords.id == query)\
-                .first()
-            if headword:
-                print(headword)
-                fc = get_family_compounds(headword)
-                fi = get_family_idioms(headword)
-                fs = get_family_set(headword)
-                sbs = db.session.query(SBS).filter_by(id=query).first()
-                ru = db.session.query(Russian).filter_by(id=query).first()
-                d = HeadwordData(   headword, fc, fi, fs, sbs, ru)
-                html += render_template("dpd_headword.html", d=d)
 
-                return render_template("home.html", html=html)
-    
-    return render_template("home.html", html="")
+        if result:
+            # headwords
+            if result.headwords:
+                headwords = result.headwords_unpack
+                for d in load_headwords_data(db.session, headwords):
+                    html += render_template("dpd_headword.html", d=d)
+
+            # roots
+            if result.roots:
+                roots_list = result.roots_unpack
+                for d in load_roots_data(
+                        db.session, roots_list, roots_count_dict):
+                    html += render_template("root.html", d=d)
+
+            # deconstructor
+            if result.deconstructor:
+                d = DeconstructorData(result)
+                html += render_template("deconstructor.html", d=d)
+
+            # variant
+            if result.variant:
+                d = VariantData(result)
+                html += render_template("variant.html", d=d)
+
+            # spelling mistake
+            if result.spelling:
+                d = SpellingData(result)
+                html += render_template("spelling.html", d=d)
+
+            if result.grammar:
+                d = GrammarData(result)
+                html += render_template("grammar.html", d=d)
+
+            if result.help:
+                d = HelpData(result)
+                html += render_template("help.html", d=d)
+
+            if result.abbrev:
+                d = AbbreviationsData(result)
+                html += render_template("abbreviations.html", d=d)
+
+    elif query.isdigit():
+        headwords_data = load_headwords_data(db.session, [int(query)])
+        if headwords_data:
+            d = headwords_data[0]
+            html += render_template("dpd_headword.html", d=d)
+
+    return html
+
+
+def warm_up_cache():
+    """Render the most frequent words in the tipitaka into the cache."""
+
+    warm_up_size = int(config_read("web_app", "warm_up_size", "1000") or "0")
+    warm_up_size = min(warm_up_size, html_cache.max_size)
+    if not os.path.exists(pth.tipitaka_word_count_path):
+        print("[red]tipitaka word count not found, skipping warm-up")
+        return
+
+    print(f"[green]warming up the cache with [white]{warm_up_size:,} [green]words")
+    db_version = get_db_version()
+    with open(pth.tipitaka_word_count_path) as f:
+        reader = csv.reader(f, delimiter="\t")
+        with app.test_request_context():
+            for counter, row in enumerate(reader):
+                if counter >= warm_up_size:
+                    break
+                query = clean_query(row[0])
+                if query:
+                    html_cache.put(query, db_version, make_lookup_html(query))
 
 
 def clean_query(query):
@@ -155,6 +211,13 @@ def clean_query(query):
 
 
 def run_app():
+    # debug runs the app in a reloader process, which imports this module
+    # again, so only warm up the cache in the process which serves requests
+    if (
+        config_test("web_app", "warm_up", "yes")
+        and os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+    ):
+        warm_up_cache()
     app.run(debug=True, port=8888)
 
 
@@ -0,0 +1,55 @@
+"""A bounded LRU cache of rendered html, for the web app lookups."""
+
+import threading
+
+from collections import OrderedDict
+from typing import Optional
+
+
+class HtmlCache():
+    """Rendered html keyed by (query, db_version).
+    When full, the least recently used entry is evicted.
+    A new db version never hits the old entries, which age out.
+    Flask serves requests in threads, so every access holds the lock."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, query: str, db_version: str) -> Optional[str]:
+        key = (query, db_version)
+        with self.lock:
+            html = self.cache.get(key)
+            if html is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.cache.move_to_end(key)
+        return html
+
+    def put(self, query: str, db_version: str, html: str) -> None:
+        if self.max_size <= 0:
+            return
+        key = (query, db_version)
+        with self.lock:
+            self.cache[key] = html
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict[str, int | float]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.cache),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
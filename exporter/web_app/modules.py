@@ -1,10 +1,26 @@
-from db.models import DpdRoots, Lookup
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from db.models import DpdHeadwords
+from db.models import DpdRoots
+from db.models import FamilyRoot
+from db.models import FamilyWord
+from db.models import Lookup
+from db.models import Russian
+from db.models import SBS
 
 from tools.configger import config_test
+from tools.exporter_functions import get_family_compounds_prefetched
+from tools.exporter_functions import get_family_idioms_prefetched
+from tools.exporter_functions import get_family_set_prefetched
+from tools.exporter_functions import get_root_prefetched
+from tools.exporter_functions import prefetch_families
 from tools.meaning_construction import summarize_construction
 from tools.meaning_construction import make_meaning_html
 from tools.meaning_construction import make_grammar_line
 from tools.meaning_construction import degree_of_completion
+from tools.pali_sort_key import pali_sort_key
 from tools.date_and_time import year_month_day_dash
 
 
@@ -33,20 +49,109 @@ class HeadwordData():
 
     @staticmethod
     def convert_newlines(obj):
-        for attr_name in dir(obj):
-            if (
-                not attr_name.startswith('_')
-                and "html" not in attr_name
-            ):  # skip private and protected attributes
-                attr_value = getattr(obj, attr_name)
+        """Replace newlines in the string columns.
+        Only columns are touched, not properties or relationships,
+        which can query the db or read files."""
+        if obj is None:
+            return obj
+        for column in inspect(obj).mapper.column_attrs:
+            if "html" not in column.key:
+                attr_value = getattr(obj, column.key)
                 if isinstance(attr_value, str):
-                    try:
-                        setattr(obj, attr_name, attr_value.replace("\n", "<br>"))
-                    except AttributeError:
-                        continue  # skip attributes that don't have a setter
+                    setattr(obj, column.key, attr_value.replace("\n", "<br>"))
         return obj
 
 
+def load_headwords_data(
+        db_session: Session,
+        headword_ids: list[int]
+) -> list[HeadwordData]:
+    """Load all the data of some headwords in a constant number of queries:
+    headwords, roots, family roots, word families, compound families,
+    idioms, sets, sbs and russian."""
+
+    headwords = db_session \
+        .query(DpdHeadwords) \
+        .filter(DpdHeadwords.id.in_(headword_ids)) \
+        .all()
+    if not headwords:
+        return []
+
+    prefetch = prefetch_families(db_session, headwords)
+
+    root_keys = {i.root_key for i in headwords}
+    family_roots = {
+        (fr.root_key, fr.root_family): fr for fr in db_session
+            .query(FamilyRoot)
+            .filter(FamilyRoot.root_key.in_(root_keys))}
+
+    word_families = {i.family_word for i in headwords}
+    family_words = {
+        fw.word_family: fw for fw in db_session
+            .query(FamilyWord)
+            .filter(FamilyWord.word_family.in_(word_families))}
+
+    ids = [i.id for i in headwords]
+    sbs_dict = {
+        sbs.id: sbs for sbs in db_session
+            .query(SBS)
+            .filter(SBS.id.in_(ids))}
+    ru_dict = {
+        ru.id: ru for ru in db_session
+            .query(Russian)
+            .filter(Russian.id.in_(ids))}
+
+    headwords_data = []
+    for i in headwords:
+        # fill the relationships used in the template, so they don't lazy load
+        set_committed_value(i, "rt", get_root_prefetched(i, prefetch))
+        set_committed_value(
+            i, "fr", family_roots.get((i.root_key, i.family_root)))
+        set_committed_value(i, "fw", family_words.get(i.family_word))
+        sbs = sbs_dict.get(i.id)
+        ru = ru_dict.get(i.id)
+        set_committed_value(i, "sbs", sbs)
+        set_committed_value(i, "ru", ru)
+
+        headwords_data.append(HeadwordData(
+            i,
+            get_family_compounds_prefetched(i, prefetch),
+            get_family_idioms_prefetched(i, prefetch),
+            get_family_set_prefetched(i, prefetch),
+            sbs,
+            ru))
+
+    return headwords_data
+
+
+def load_roots_data(
+        db_session: Session,
+        roots_list: list[str],
+        roots_count_dict: dict[str, int]
+) -> list["RootsData"]:
+    """Load some roots and their root families in two queries."""
+
+    root_results = db_session \
+        .query(DpdRoots) \
+        .filter(DpdRoots.root.in_(roots_list)) \
+        .all()
+
+    frs_dict: dict[str, list[FamilyRoot]] = {}
+    for fr in db_session \
+            .query(FamilyRoot) \
+            .filter(FamilyRoot.root_key.in_(roots_list)):
+        frs_dict.setdefault(fr.root_key, []).append(fr)
+
+    roots_data = []
+    for r in root_results:
+        frs = sorted(
+            frs_dict.get(r.root, []),
+            key=lambda x: pali_sort_key(x.root_family))
+        roots_data.append(RootsData(r, frs, roots_count_dict))
+
+    return roots_data
+
+
 class RootsData():
     def __init__(self, r, frs, roots_count_dict) -> None:
         self.r: DpdRoots = r
@@ -1,26 +1,44 @@
 #!/usr/bin/env python3
 
-"""Rebuild the database from scratch from files in backup_tsv folder."""
+"""Rebuild the database from scratch from files in backup_tsv folder.
+
+The tsvs are streamed into the tables in chunks of core inserts,
+with load-time pragmas. Indexes are created once the data is in."""
 
 import csv
 import sys
 
+from itertools import islice
+from pathlib import Path
 from rich import print
+from typing import Iterable, Iterator
 
-from sqlalchemy.orm.session import Session
+from sqlalchemy import bindparam, create_engine, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable
 
-from db.get_db_session import get_db_session
-from db.db_helpers import create_db_if_not_exists
-from db.models import DpdHeadwords, DpdRoots, Russian, SBS
+from db.models import Base, DpdHeadwords, DpdRoots, Russian, SBS
+from dps.tools.sbs_table_functions import SBS_table_tools
 from tools.tic_toc import tic, toc
 from tools.paths import ProjectPaths
 from tools.configger import config_update, config_test
 
+# rows per executemany
+insert_chunk_size = 10000
+
+# the db is built from scratch, so there is nothing to protect while loading
+load_pragmas = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA cache_size = -262144",  # 256 MB
+    "PRAGMA temp_store = MEMORY",
+]
+
 
 def main():
     tic()
     print("[bright_yellow]rebuilding db from tsvs")
-    
+
     if config_test("regenerate", "db_rebuild", "no"):
         config_update("regenerate", "db_rebuild", "yes")
 
@@ -34,8 +52,6 @@ def main():
         # else:
         pth.dpd_db_path.unlink()
 
-    create_db_if_not_exists(pth.dpd_db_path)
-
     for p in [
         pth.pali_root_path,
         pth.pali_word_path,
@@ -46,95 +62,133 @@ def main():
             print(f"[bright_red]TSV backup file does not exist: {p}")
             sys.exit(1)
 
-    db_session = get_db_session(pth.dpd_db_path)
+    db_eng = create_engine(f"sqlite+pysqlite:///{pth.dpd_db_path}", echo=False)
+    with db_eng.connect() as conn:
+        for pragma in load_pragmas:
+            conn.exec_driver_sql(pragma)
+        create_tables(conn)
 
-    make_pali_word_table_data(pth, db_session)
-    make_pali_root_table_data(pth, db_session)
-    make_russian_table_data(pth, db_session)
-    make_ru_root_table_data(pth, db_session)
-    make_sbs_table_data(pth, db_session)
+        make_pali_word_table_data(pth, conn)
+        make_pali_root_table_data(pth, conn)
+        make_russian_table_data(pth, conn)
+        make_ru_root_table_data(pth, conn)
+        make_sbs_table_data(pth, conn)
+
+        print("[green]creating indexes")
+        create_indexes(conn)
+
+        print("[green]committing to db")
+        conn.commit()
+
+        print("[green]analyzing db")
+        conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+    db_eng.dispose()
 
-    print("[green]committing to db")
-    db_session.commit()
-    db_session.close()
     print("[bright_green]database restored successfully")
     toc()
 
 
-def make_pali_word_table_data(pth: ProjectPaths, db_session: Session):
-    """Read TSV and return DpdHeadwords table data."""
-    print("[green]creating DpdHeadwords table data")
-    with open(pth.pali_word_path, 'r', newline='') as tsvfile:
+def create_tables(conn: Connection):
+    """Create all the tables without their indexes."""
+    for table in Base.metadata.sorted_tables:
+        conn.execute(CreateTable(table))
+
+
+def create_indexes(conn: Connection):
+    """Create the indexes of all the tables."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn)
+
+
+def read_tsv_rows(
+    tsv_path: Path,
+    exclude_columns: tuple[str, ...] = ()
+) -> Iterator[dict[str, str]]:
+    """Stream the rows of a backup tsv as dicts of column name and value."""
+    with open(tsv_path, 'r', newline='') as tsvfile:
         csvreader = csv.reader(tsvfile, delimiter="\t", quotechar='"')
         columns = next(csvreader)
         for row in csvreader:
-            data = {}
-            for col_name, value in zip(columns, row):
-                if col_name not in ("user_id", "created_at", "updated_at"):
-                    data[col_name] = value
-            db_session.add(DpdHeadwords(**data))
+            yield {
+                col_name: value
+                for col_name, value in zip(columns, row)
+                if col_name not in exclude_columns}
 
 
-def make_pali_root_table_data(pth: ProjectPaths, db_session: Session):
-    """Read TSV and return DpdRoots table data."""
+def insert_rows(conn: Connection, table, rows: Iterable[dict[str, str]]):
+    """Insert rows into a table in chunks of executemany."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, insert_chunk_size)):
+        conn.execute(insert(table), chunk)
+
+
+def make_pali_word_table_data(pth: ProjectPaths, conn: Connection):
+    """Read TSV and insert DpdHeadwords table data."""
+    print("[green]creating DpdHeadwords table data")
+    insert_rows(
+        conn, DpdHeadwords, read_tsv_rows(
+            pth.pali_word_path,
+            ("user_id", "created_at", "updated_at")))
+
+
+def make_pali_root_table_data(pth: ProjectPaths, conn: Connection):
+    """Read TSV and insert DpdRoots table data."""
     print("[green]creating DpdRoots table data")
-    with open(pth.pali_root_path, 'r', newline='') as tsvfile:
-        csvreader = csv.reader(tsvfile, delimiter="\t", quotechar='"')
-        columns = next(csvreader)
-        for row in csvreader:
-            data = {}
-            for col_name, value in zip(columns, row):
-                if col_name not in (
-                    "created_at", "updated_at",
-                        "root_info", "root_matrix",
-                        "root_ru_meaning", "sanskrit_root_ru_meaning"):
-                    data[col_name] = value
-            db_session.add(DpdRoots(**data))
-
-
-def make_russian_table_data(pth: ProjectPaths, db_session: Session):
-    """Read TSV and return Russian table data."""
+    insert_rows(
+        conn, DpdRoots, read_tsv_rows(
+            pth.pali_root_path,
+            ("created_at", "updated_at",
+                "root_info", "root_matrix",
+                "root_ru_meaning", "sanskrit_root_ru_meaning")))
+
+
+def make_russian_table_data(pth: ProjectPaths, conn: Connection):
+    """Read TSV and insert Russian table data."""
     print("[green]creating Russian table data")
-    with open(pth.russian_path, 'r', newline='') as tsvfile:
-        csvreader = csv.reader(tsvfile, delimiter="\t", quotechar='"')
-        columns = next(csvreader)
-        for row in csvreader:
-            data = {}
-            for col_name, value in zip(columns, row):
-                data[col_name] = value
-            db_session.add(Russian(**data))
+    insert_rows(conn, Russian, read_tsv_rows(pth.russian_path))
 
 
-def make_ru_root_table_data(pth: ProjectPaths, db_session: Session):
-    """Read TSV and return ru columns from DpdRoots."""
+def make_ru_root_table_data(pth: ProjectPaths, conn: Connection):
+    """Read TSV and update ru columns in DpdRoots,
+    adding any roots which don't exist yet."""
     print("[green]populating ru columns in DpdRoots table")
-    with open(pth.ru_root_path, 'r', newline='') as tsvfile:
-        csvreader = csv.reader(tsvfile, delimiter="\t", quotechar='"')
-        columns = next(csvreader)
-        for row in csvreader:
-            data = {}
-            for col_name, value in zip(columns, row):
-                # Include 'root' in the data dictionary
-                data[col_name] = value
-            existing_record = db_session.query(DpdRoots).filter_by(root=data['root']).first()
-            if existing_record:
-                for key, value in data.items():
-                    setattr(existing_record, key, value)
-            else:
-                db_session.add(DpdRoots(**data))
-
-
-def make_sbs_table_data(pth: ProjectPaths, db_session: Session):
-    """Read TSV and return SBS table data."""
+
+    existing_roots = set(conn.execute(select(DpdRoots.root)).scalars())
+    updates = []
+    additions = []
+    for data in read_tsv_rows(pth.ru_root_path):
+        if data["root"] in existing_roots:
+            # the root is only used to find the row
+            data["b_root"] = data.pop("root")
+            updates.append(data)
+        else:
+            additions.append(data)
+
+    if updates:
+        conn.execute(
+            update(DpdRoots).where(DpdRoots.root == bindparam("b_root")),
+            updates)
+    insert_rows(conn, DpdRoots, additions)
+
+
+def make_sbs_table_data(pth: ProjectPaths, conn: Connection):
+    """Read TSV and insert SBS table data,
+    calculating sbs_index like SBS.__init__ does."""
     print("[green]creating SBS table data")
-    with open(pth.sbs_path, 'r', newline='') as tsvfile:
-        csvreader = csv.reader(tsvfile, delimiter="\t", quotechar='"')
-        columns = next(csvreader)
-        for row in csvreader:
-            data = {}
-            for col_name, value in zip(columns, row):
-                data[col_name] = value
-            db_session.add(SBS(**data))
+    chant_index_map = SBS_table_tools().load_chant_index_map()
+
+    def _sbs_rows() -> Iterator[dict[str, str]]:
+        for data in read_tsv_rows(pth.sbs_path):
+            chants = [data.get(f"sbs_chant_pali_{n}") for n in range(1, 5)]
+            indexes = [
+                chant_index_map[chant] for chant in chants
+                if chant in chant_index_map]
+            data["sbs_index"] = str(min(indexes)) if indexes else ""
+            yield data
+
+    insert_rows(conn, SBS, _sbs_rows())
 
 
 if __name__ == "__main__":
@@ -26,11 +26,12 @@ def main():
     db_session.execute(Russian.__table__.delete()) # type: ignore
     db_session.execute(SBS.__table__.delete()) # type: ignore
 
-    make_pali_word_table_data(pth, db_session)
-    make_pali_root_table_data(pth, db_session)
-    make_russian_table_data(pth, db_session)
-    make_ru_root_table_data(pth, db_session)
-    make_sbs_table_data(pth, db_session)
+    conn = db_session.connection()
+    make_pali_word_table_data(pth, conn)
+    make_pali_root_table_data(pth, conn)
+    make_russian_table_data(pth, conn)
+    make_ru_root_table_data(pth, conn)
+    make_sbs_table_data(pth, conn)
 
     db_session.commit()
     db_session.close()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import sqlite3
 import tarfile
 import os
 
@@ -17,6 +18,12 @@ def create_tarball_bz2(pth: ProjectPaths):
     source_file = pth.dpd_db_path
     destination_dir = pth.share_dir
 
+    # move everything from the write-ahead log into the db file,
+    # so the tarball holds a self-contained db
+    conn = sqlite3.connect(source_file)
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+
     with tarfile.open(tarball_name, "w:bz2") as tar:
         tar.add(source_file, arcname="dpd.db")
     print(f"{bop()} sec")
@@ -7,13 +7,20 @@ import json
 from db.get_db_session import get_db_session
 from tools.paths import ProjectPaths
 
-pth = ProjectPaths()
-db_session = get_db_session(pth.dpd_db_path)
-
+_db_session = None
 _cf_set_cache = None
 _idioms_set_cache = None
 
 
+def _get_db_session():
+    """Open the db session on first use, not at import."""
+    global _db_session
+    if _db_session is None:
+        pth = ProjectPaths()
+        _db_session = get_db_session(pth.dpd_db_path)
+    return _db_session
+
+
 def load_cf_set() -> set[str]:
     """generate a list of all compounds families"""
     from db.models import DbInfo 
@@ -22,7 +29,7 @@ def load_cf_set() -> set[str]:
     if _cf_set_cache is not None:
         return _cf_set_cache
     else:
-        cf_set_cache = db_session \
+        cf_set_cache = _get_db_session() \
             .query(DbInfo) \
             .filter_by(key="cf_set") \
                 .first()
@@ -41,7 +48,7 @@ def load_idioms_set() -> set[str]:
     if _idioms_set_cache is not None:
         return _idioms_set_cache
     else:
-        idioms_set_cache = db_session \
+        idioms_set_cache = _get_db_session() \
             .query(DbInfo) \
             .filter_by(key="idioms_set") \
             .first()
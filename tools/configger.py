@@ -23,7 +23,8 @@ DEFAULT_CONFIG = {
     "deconstructor": {
         "include_cloud": "no",
         "all_texts": "no",
-        "run_on_cloud": "no"
+        "run_on_cloud": "no",
+        "multiprocess": "no"
     },
     "gui": {
         "theme": "DarkGrey10",
@@ -55,6 +56,7 @@ DEFAULT_CONFIG = {
         "show_dps_data": "no",
         "data_limit": "0",
         "external_css": "no",
+        "render_cache": "yes",
     },
     "exporter" : {
         "language": "en",
@@ -82,6 +84,11 @@ DEFAULT_CONFIG = {
     },
     "tpr": {
         "db_path": ""
+    },
+    "web_app": {
+        "cache_size": "10000",
+        "warm_up": "no",
+        "warm_up_size": "1000"
     }
 }
 
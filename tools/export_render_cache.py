@@ -0,0 +1,174 @@
+"""Render cache for the GoldenDict and MDict exporters.
+
+Every rendered DictEntry is saved in a side sqlite file under a hash of
+everything which went into rendering it: its db rows, the templates,
+the css and js, the exporter code and the export settings.
+On the next export only entries whose hash has changed are rendered again."""
+
+import hashlib
+import importlib
+import json
+import sqlite3
+
+from pathlib import Path
+from sqlalchemy import inspect
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from tools.utils import DictEntry, RenderedSizes
+
+# (key, content_hash, today, entry, sizes)
+RenderCacheRow = Tuple[str, str, str, str, str]
+
+
+# The feedback links have the date of the export in them. Entries are
+# rendered with this placeholder instead, and cached with it, so a new day
+# doesn't mean rendering every entry again.
+today_placeholder = "{{today}}"
+
+
+def fill_today(entry: DictEntry, today: str) -> DictEntry:
+    """A copy of entry with today's date in place of today_placeholder."""
+    return {
+        **entry,
+        "definition_html":
+            entry["definition_html"].replace(today_placeholder, today)}
+
+
+def make_settings_hash(paths: Iterable[Path], settings: List[Any]) -> str:
+    """Hash the files and settings which are the same for every entry,
+    e.g. templates, css, js, exporter code and config options."""
+
+    settings_hash = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            settings_hash.update(f.read())
+    settings_hash.update(
+        json.dumps(settings, default=str, sort_keys=True, ensure_ascii=False)
+        .encode())
+    return settings_hash.hexdigest()
+
+
+def module_files(module_names: Iterable[str]) -> List[Path]:
+    """The source files of some modules, e.g. the helpers a renderer calls,
+    to add to the files of make_settings_hash."""
+    return [
+        Path(importlib.import_module(name).__file__ or "")
+        for name in module_names]
+
+
+def row_values(row) -> Optional[Dict[str, Any]]:
+    """All column values of a db row, or None."""
+    if row is None:
+        return None
+    return {
+        attr.key: getattr(row, attr.key)
+        for attr in inspect(row).mapper.column_attrs}
+
+
+def make_content_hash(settings_hash: str, parts: List[Any]) -> str:
+    """Hash the settings and the content of one entry.
+    parts can be row_values, lists of row_values or any json data."""
+
+    content_hash = hashlib.sha256(settings_hash.encode())
+    content_hash.update(
+        json.dumps(parts, default=str, sort_keys=True, ensure_ascii=False)
+        .encode())
+    return content_hash.hexdigest()
+
+
+def connect_render_cache(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS render_cache (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            today TEXT NOT NULL,
+            entry TEXT NOT NULL,
+            sizes TEXT NOT NULL,
+            PRIMARY KEY (kind, key)
+        )""")
+    return conn
+
+
+def load_render_cache(
+        conn: sqlite3.Connection,
+        kind: str,
+        keys: List[str]
+) -> Dict[str, RenderCacheRow]:
+    """Load the cached rows of some keys."""
+
+    render_cache: Dict[str, RenderCacheRow] = {}
+    # stay below sqlite's maximum number of variables
+    for start in range(0, len(keys), 500):
+        batch = keys[start:start + 500]
+        placeholders = ",".join("?" * len(batch))
+        for row in conn.execute(
+            f"""SELECT key, content_hash, today, entry, sizes
+            FROM render_cache
+            WHERE kind = ? AND key IN ({placeholders})""",
+            [kind, *batch]
+        ):
+            render_cache[row[0]] = row
+    return render_cache
+
+
+def load_cached_entry(
+        row: Optional[RenderCacheRow],
+        content_hash: str,
+        today: str
+) -> Optional[Tuple[DictEntry, RenderedSizes]]:
+    """The cached entry if its hash is still the same, else None.
+    The entry is cached with today_placeholder, which gets today's date."""
+
+    if row is None or row[1] != content_hash:
+        return None
+
+    __, __, __, entry_json, sizes_json = row
+    entry: DictEntry = json.loads(entry_json)
+    sizes: RenderedSizes = json.loads(sizes_json)
+    return fill_today(entry, today), sizes
+
+
+def make_render_cache_row(
+        key: str,
+        content_hash: str,
+        today: str,
+        entry: DictEntry,
+        sizes: RenderedSizes
+) -> RenderCacheRow:
+    return (
+        key,
+        content_hash,
+        today,
+        json.dumps(entry, ensure_ascii=False),
+        json.dumps(sizes))
+
+
+def save_render_cache(
+        conn: sqlite3.Connection,
+        kind: str,
+        rows: List[RenderCacheRow]
+) -> None:
+    """Save newly rendered entries, replacing older versions."""
+    conn.executemany(
+        """INSERT OR REPLACE INTO render_cache
+        (kind, key, content_hash, today, entry, sizes)
+        VALUES (?, ?, ?, ?, ?, ?)""",
+        [(kind, *row) for row in rows])
+    conn.commit()
+
+
+def prune_render_cache(
+        conn: sqlite3.Connection,
+        kind: str,
+        keep_keys: set[str]
+) -> None:
+    """Delete entries which no longer exist, after a complete export."""
+    cached_keys = [
+        row[0] for row in conn.execute(
+            "SELECT key FROM render_cache WHERE kind = ?", (kind,))]
+    conn.executemany(
+        "DELETE FROM render_cache WHERE kind = ? AND key = ?",
+        [(kind, key) for key in cached_keys if key not in keep_keys])
+    conn.commit()
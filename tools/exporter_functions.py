@@ -1,8 +1,10 @@
 from sqlalchemy.orm import object_session
+from sqlalchemy.orm.session import Session
 
-from typing import List
+from typing import Dict, Iterable, List, Optional, TypedDict
 
 from db.models import DpdHeadwords, FamilyIdiom
+from db.models import DpdRoots
 from db.models import FamilyCompound
 from db.models import FamilySet
 
@@ -82,3 +84,101 @@ def get_family_set(i: DpdHeadwords) -> List[FamilySet]:
     fs = list(fs)
 
     return fs
+
+
+class FamiliesPrefetch(TypedDict):
+    """Families and roots of a page of headwords, keyed by primary key."""
+    family_compounds: Dict[str, FamilyCompound]
+    family_idioms: Dict[str, FamilyIdiom]
+    family_sets: Dict[str, FamilySet]
+    roots: Dict[str, DpdRoots]
+
+
+def prefetch_families(
+        db_session: Session,
+        headwords: List[DpdHeadwords]
+) -> FamiliesPrefetch:
+    """Load the compound, idiom and set families and the roots of a whole
+    page of headwords, with one IN query per table
+    instead of one query per headword."""
+
+    fc_keys = set()
+    fi_keys = set()
+    fs_keys = set()
+    root_keys = set()
+
+    for i in headwords:
+        if i.family_compound:
+            fc_keys.update(i.family_compound_list)
+        else:
+            fc_keys.add(i.lemma_clean)
+        if i.family_idioms:
+            fi_keys.update(i.family_idioms_list)
+        else:
+            fi_keys.add(i.lemma_clean)
+        fs_keys.update(i.family_set_list)
+        if i.root_key is not None:
+            root_keys.add(i.root_key)
+
+    def _query_in(table, column, keys: set) -> list:
+        if not keys:
+            return []
+        return db_session.query(table).filter(column.in_(keys)).all()
+
+    return FamiliesPrefetch(
+        family_compounds={
+            fc.compound_family: fc for fc in _query_in(
+                FamilyCompound, FamilyCompound.compound_family, fc_keys)},
+        family_idioms={
+            fi.idiom: fi for fi in _query_in(
+                FamilyIdiom, FamilyIdiom.idiom, fi_keys)},
+        family_sets={
+            fs.set: fs for fs in _query_in(
+                FamilySet, FamilySet.set, fs_keys)},
+        roots={
+            rt.root: rt for rt in _query_in(
+                DpdRoots, DpdRoots.root, root_keys)},
+    )
+
+
+def _pick_in_order(keys: Iterable[str], lookup: dict) -> list:
+    """Items found in lookup, in the order of keys, without duplicates."""
+    return [lookup[key] for key in dict.fromkeys(keys) if key in lookup]
+
+
+def get_family_compounds_prefetched(
+        i: DpdHeadwords, prefetch: FamiliesPrefetch
+) -> List[FamilyCompound]:
+    """Same as get_family_compounds, from a prefetch."""
+    if i.family_compound:
+        return _pick_in_order(
+            i.family_compound_list, prefetch["family_compounds"])
+    else:
+        return _pick_in_order(
+            [i.lemma_clean], prefetch["family_compounds"])
+
+
+def get_family_idioms_prefetched(
+        i: DpdHeadwords, prefetch: FamiliesPrefetch
+) -> List[FamilyIdiom]:
+    """Same as get_family_idioms, from a prefetch."""
+    if i.family_idioms:
+        return _pick_in_order(
+            i.family_idioms_list, prefetch["family_idioms"])
+    else:
+        return _pick_in_order(
+            [i.lemma_clean], prefetch["family_idioms"])
+
+
+def get_family_set_prefetched(
+        i: DpdHeadwords, prefetch: FamiliesPrefetch
+) -> List[FamilySet]:
+    """Same as get_family_set, from a prefetch."""
+    return _pick_in_order(i.family_set_list, prefetch["family_sets"])
+
+
+def get_root_prefetched(
+        i: DpdHeadwords, prefetch: FamiliesPrefetch
+) -> Optional[DpdRoots]:
+    """Same as the i.rt relationship, from a prefetch."""
+    return prefetch["roots"].get(i.root_key)
@@ -9,7 +9,7 @@ from pathlib import Path
 from pyglossary import Glossary
 from rich import print
 from subprocess import Popen
-from typing import Optional
+from typing import Iterable, Optional
 
 
 from tools.date_and_time import make_timestamp
@@ -81,10 +81,11 @@ class DictVariables():
 def export_to_goldendict_with_pyglossary(
     dict_info: DictInfo,
     dict_var: DictVariables,
-    dict_data: list[DictEntry]
+    dict_data: Iterable[DictEntry]
 ) -> None:
     
-    """Export to GoldenDict using Pyglossary."""
+    """Export to GoldenDict using Pyglossary.
+    dict_data can be a generator, it is consumed once."""
     
     print(f"[green]{'exporting to goldendict with pyglossary':<40}")
 
@@ -158,7 +159,7 @@ def add_js(glos: Glossary, dict_var: DictVariables) -> Glossary:
     return glos
 
 
-def add_data(glos: Glossary, dict_data: list[DictEntry]) -> Glossary:
+def add_data(glos: Glossary, dict_data: Iterable[DictEntry]) -> Glossary:
     """Add dictionary data to glossary."""
     
     bip()
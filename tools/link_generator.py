@@ -1,19 +1,30 @@
 """Generating links for suttas based on the desired website"""
 
 import re
-from tools.configger import config_test_option, config_update_default_value, config_read
 
 
 def load_link():
+    # configger reads config.ini when it's imported
+    from tools.configger import config_test_option, config_update_default_value, config_read
+
     if not config_test_option("dictionary", "link_url"):
         config_update_default_value("dictionary", "link_url")
     return config_read("dictionary", "link_url")
 
 
-base_url = load_link()
+_base_url = None
+
+
+def get_base_url() -> str:
+    """Read the link url from config on first use, not at import."""
+    global _base_url
+    if _base_url is None:
+        _base_url = load_link()
+    return _base_url
 
 
 def generate_link(source: str) -> str:
+    base_url = get_base_url()
 
     # List of functions to check each pattern
     pattern_funcs = [link_vin, link_vin_pat, link_pat, link_dn_mn, link_an, link_sn, 
@@ -0,0 +1,120 @@
+"""Write one column of the Lookup table in bulk.
+
+The new values are staged in a temp table and applied with a few set-based
+sql statements, instead of loading the whole Lookup table as ORM objects:
+1. update: keys in the new values and in Lookup get the new value
+2. delete: keys only in Lookup with no value in any other column
+3. clear: keys only in Lookup with a value in another column
+4. add: keys only in the new values get a new row
+
+The values are packed with the Lookup *_pack method of the column."""
+
+from typing import Any, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from db.models import Lookup
+
+
+class LookupWriteCounts(NamedTuple):
+    updated: int
+    deleted: int
+    cleared: int
+    added: int
+
+
+# the Lookup method which packs each column
+pack_methods = {
+    "headwords": "headwords_pack",
+    "roots": "roots_pack",
+    "deconstructor": "deconstructor_pack",
+    "variant": "variants_pack",
+    "spelling": "spelling_pack",
+    "grammar": "grammar_pack",
+    "help": "help_pack",
+    "abbrev": "abbrev_pack",
+    "sinhala": "sinhala_pack",
+    "devanagari": "devanagari_pack",
+    "thai": "thai_pack",
+}
+
+
+def pack_lookup_values(
+        column_name: str,
+        new_values: dict[str, Any]
+) -> dict[str, str]:
+    """Pack each value with the Lookup *_pack method of the column.
+    Empty values can't be packed, so they are skipped."""
+
+    if column_name not in pack_methods:
+        raise ValueError(f"{column_name} is not a packed Lookup column")
+    lookup = Lookup()
+    pack = getattr(lookup, pack_methods[column_name])
+
+    packed_values: dict[str, str] = {}
+    for lookup_key, value in new_values.items():
+        if value:
+            pack(value)
+            packed_values[lookup_key] = getattr(lookup, column_name)
+    return packed_values
+
+
+def write_lookup_column(
+        db_session: Session,
+        column_name: str,
+        new_values: dict[str, Any]
+) -> LookupWriteCounts:
+    """Replace the contents of a Lookup column with new_values,
+    a dict of lookup_key and unpacked column value, and commit."""
+
+    packed_values = pack_lookup_values(column_name, new_values)
+    columns = [column.name for column in Lookup.__table__.columns]
+    other_columns = [
+        column for column in columns
+        if column not in ["lookup_key", column_name]]
+    no_other_value = " AND ".join(
+        f"lookup.{column} = ''" for column in other_columns)
+    not_new = "lookup_key NOT IN (SELECT lookup_key FROM lookup_new)"
+
+    db_session.execute(text("DROP TABLE IF EXISTS temp.lookup_new"))
+    db_session.execute(text(
+        "CREATE TEMP TABLE lookup_new "
+        "(lookup_key TEXT PRIMARY KEY, value TEXT NOT NULL)"))
+    if packed_values:
+        db_session.execute(
+            text("INSERT INTO lookup_new VALUES (:lookup_key, :value)"),
+            [{"lookup_key": key, "value": value}
+                for key, value in packed_values.items()])
+
+    updated = db_session.execute(text(f"""
+        UPDATE lookup
+        SET {column_name} = lookup_new.value
+        FROM lookup_new
+        WHERE lookup.lookup_key = lookup_new.lookup_key
+        AND lookup.{column_name} != lookup_new.value""")).rowcount
+
+    deleted = db_session.execute(text(f"""
+        DELETE FROM lookup
+        WHERE {not_new}
+        AND {no_other_value}""")).rowcount
+
+    cleared = db_session.execute(text(f"""
+        UPDATE lookup
+        SET {column_name} = ''
+        WHERE {column_name} != ''
+        AND {not_new}""")).rowcount
+
+    # the column defaults are python-side, so fill them in here
+    empty_columns = ", ".join(other_columns)
+    empty_values = ", ".join("''" for __ in other_columns)
+    added = db_session.execute(text(f"""
+        INSERT INTO lookup (lookup_key, {column_name}, {empty_columns})
+        SELECT lookup_key, value, {empty_values}
+        FROM lookup_new
+        WHERE lookup_key NOT IN (SELECT lookup_key FROM lookup)""")).rowcount
+
+    db_session.execute(text("DROP TABLE temp.lookup_new"))
+    db_session.commit()
+
+    return LookupWriteCounts(updated, deleted, cleared, added)
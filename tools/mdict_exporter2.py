@@ -4,6 +4,7 @@
 
 from functools import reduce
 from rich import print
+from typing import Iterable
 from tools.goldendict_exporter import DictInfo, DictVariables
 from tools.tic_toc import bip, bop
 from tools.utils import DictEntry
@@ -34,6 +35,14 @@ def make_synonyms(all_items, item):
     return all_items
 
 
+def add_h3_header(item: DictEntry) -> DictEntry:
+    """A copy of item, with MDict for GoldenDict and the word as h3 tag."""
+    definition_html = item['definition_html'].replace("GoldenDict", "MDict")
+    return {
+        **item,
+        'definition_html': f"<h3>{item['word']}</h3>{definition_html}"}
+
+
 def add_css_js(dict_var: DictVariables) -> list:
     """Add CSS and JS and create a list with the format:
     (file_path, file_content_binary)"""
@@ -67,22 +76,20 @@ def add_css_js(dict_var: DictVariables) -> list:
 def export_to_mdict(
         dict_info: DictInfo,
         dict_var: DictVariables,
-        dict_data: list[DictEntry],
+        dict_data: Iterable[DictEntry],
         h3_header = True
 ) -> None:
 
-    """Export to MDict"""
+    """Export to MDict.
+    dict_data can be a generator, it is consumed once and not edited."""
 
     print(f"[green]{'exporting to mdict'}")
 
     bip()
     printer("adding 'mdict' and h3 tag")
     if h3_header:
-        for i in dict_data:
-            i['definition_html'] = \
-                i['definition_html'].replace("GoldenDict", "MDict")
-            i['definition_html'] = \
-                f"<h3>{i['word']}</h3>{i['definition_html']}"
+        # added while reducing synonyms
+        dict_data = map(add_h3_header, dict_data)
         printer_ok()
     else:
         printer_no()    
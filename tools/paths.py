@@ -67,6 +67,9 @@ class ProjectPaths:
         self.buttons_js_path = base_dir / "exporter/goldendict/javascript//buttons.js"
         self.sorter_js_path = base_dir / "exporter/goldendict/javascript//sorter.js"
 
+        # exporter/goldendict/
+        self.export_render_cache_path = base_dir / "exporter/goldendict/render_cache.db"
+
         # exporter/share
         self.share_dir = base_dir / "exporter/share"
         self.dpd_zip_path = base_dir / "exporter/share/dpd.zip"
@@ -132,6 +135,9 @@ class ProjectPaths:
         self.tpr_i2h_tsv_path = base_dir / "exporter/tpr/output/i2h.tsv"
         self.tpr_deconstructor_tsv_path = base_dir / "exporter/tpr/output/deconstructor.tsv"
 
+        # db/frequency
+        self.freq_template_path = base_dir / "db/frequency/frequency.html"
+
         # db/frequency/output
         self.frequency_output_dir = base_dir / "db/frequency/output/"
         self.raw_text_dir = base_dir / "db/frequency/output/raw_text/"
@@ -167,6 +173,7 @@ class ProjectPaths:
 
         # db/inflections/
         self.inflection_templates_path = base_dir / "db/inflections/inflection_templates.xlsx"
+        self.translit_worker_path = base_dir / "db/inflections/transliterate_worker.mjs"
 
         # exporter/other_dictionaries/css
         self.whitney_css_dir = base_dir / "exporter/other_dictionaries/code/whitney/whitney.css/"
@@ -239,6 +246,7 @@ class ProjectPaths:
         self.text_set_path = base_dir / "db/deconstructor/assets/text_set"
         self.neg_inflections_set_path = base_dir / "db/deconstructor/assets/neg_inflections_set"
         self.matches_dict_path = base_dir / "db/deconstructor/assets/matches_dict"
+        self.sandhi_cache_path = base_dir / "db/deconstructor/assets/split_cache.db"
 
         # db/deconstructor/output
         self.sandhi_output_dir = base_dir / "db/deconstructor/output/"
@@ -253,6 +261,7 @@ class ProjectPaths:
         self.sandhi_timer_path = base_dir / "db/deconstructor/output/timer.tsv"
         self.rule_counts_path = base_dir / "db/deconstructor/output/rule_counts/rule_counts.tsv"
         self.sandhi_log_path = base_dir / "db/deconstructor/output/logfile.log"
+        self.sandhi_checkpoint_path = base_dir / "db/deconstructor/output/checkpoint.tsv"
 
         # db/deconstructor/output/rule_counts
         self.rule_counts_dir = base_dir / "db/deconstructor/output/rule_counts/"
@@ -287,12 +296,9 @@ class ProjectPaths:
         self.all_tipitaka_words_path = base_dir / "share/all_tipitaka_words"
         self.template_changed_path = base_dir / "share/changed_templates"
         self.changed_headwords_path = base_dir / "share/changed_headwords"
-        self.lookup_to_translit_path = base_dir / "share/lookup_to_translit.json"
-        self.lookup_from_translit_path = base_dir / "share/lookup_from_translit.json"
         self.inflection_templates_pickle_path = base_dir / "share/inflection_templates"
         self.headword_stem_pattern_dict_path = base_dir / "share/headword_stem_pattern_dict"
-        self.inflections_to_translit_json_path = base_dir / "share/inflections_to_translit.json"
-        self.inflections_from_translit_json_path = base_dir / "share/inflections_from_translit.json"
+        self.translit_cache_path = base_dir / "share/translit_cache.db"
 
         # resources/bw/js
         self.i2h_js_path = base_dir / "resources/bw2/js/dpd_i2h.js"
@@ -301,6 +307,7 @@ class ProjectPaths:
 
         # temp
         self.temp_dir = base_dir / "temp/"
+        self.dict_data_spool_path = base_dir / "temp/dict_data_spool.jsonl"
 
         # tests/
         self.antonym_dict_path = base_dir / "tests/test_antonyms.json"
@@ -0,0 +1,267 @@
+"""Transliteration cache for the inflections and Lookup table.
+
+Every word is transliterated into Sinhala, Devanagari and Thai twice, once
+with aksharamukha and once with the Path Nirvana node.js script, which
+produces a different orthography. Both results are saved in a side sqlite
+file under the IAST word, so the next run only transliterates new words.
+The cache is cleared whenever a transliterator changes."""
+
+import hashlib
+import importlib.metadata
+import json
+import sqlite3
+
+from aksharamukha import transliterate
+from multiprocessing import Manager, Process
+from multiprocessing.managers import ListProxy
+from pathlib import Path
+from subprocess import PIPE, Popen
+from typing import Dict, List, TypedDict
+
+import psutil
+from rich import print
+
+from tools.utils import list_into_batches
+
+
+# words per line sent to the node.js worker
+node_chunk_size = 500
+
+
+class WordTranslit(TypedDict):
+    sinhala: List[str]
+    devanagari: List[str]
+    thai: List[str]
+
+
+class NodeTransliterator():
+    """A long-lived path nirvana node.js worker.
+    Each chunk of words is sent as one line of json and its
+    transliterations read back before the next chunk is sent."""
+
+    def __init__(self, node_worker_path: Path):
+        self.process = Popen(
+            ["node", node_worker_path],
+            stdin=PIPE,
+            stdout=PIPE,
+            encoding="utf-8")
+
+    def transliterate(self, words: List[str]) -> Dict[str, List[str]]:
+        assert self.process.stdin and self.process.stdout
+        self.process.stdin.write(json.dumps(words, ensure_ascii=False) + "\n")
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError(
+                f"node.js transliterator exited with {self.process.wait()}")
+        return json.loads(line)
+
+    def close(self) -> None:
+        assert self.process.stdin
+        self.process.stdin.close()
+        self.process.wait()
+
+
+def make_transliterator_hash(node_paths: List[Path]) -> str:
+    """Hash the aksharamukha version and the node.js scripts."""
+
+    translit_hash = hashlib.sha256(
+        importlib.metadata.version("aksharamukha").encode())
+    for path in node_paths:
+        with open(path, "rb") as f:
+            translit_hash.update(f.read())
+    return translit_hash.hexdigest()
+
+
+def connect_translit_cache(
+        db_path: Path,
+        transliterator_hash: str
+) -> sqlite3.Connection:
+    """Connect to the cache and clear it if a transliterator has changed."""
+
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS translit_cache (
+            word TEXT PRIMARY KEY,
+            sinhala TEXT NOT NULL,
+            devanagari TEXT NOT NULL,
+            thai TEXT NOT NULL
+        )""")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS translit_info (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )""")
+
+    row = conn.execute(
+        "SELECT value FROM translit_info WHERE key = 'transliterator_hash'"
+    ).fetchone()
+    if row is None or row[0] != transliterator_hash:
+        conn.execute("DELETE FROM translit_cache")
+        conn.execute(
+            "INSERT OR REPLACE INTO translit_info VALUES (?, ?)",
+            ("transliterator_hash", transliterator_hash))
+        conn.commit()
+    return conn
+
+
+def load_translit_cache(
+        conn: sqlite3.Connection,
+        words: List[str]
+) -> Dict[str, WordTranslit]:
+    """Load the cached transliterations of some words."""
+
+    translit_dict: Dict[str, WordTranslit] = {}
+    # stay below sqlite's maximum number of variables
+    for start in range(0, len(words), 500):
+        batch = words[start:start + 500]
+        placeholders = ",".join("?" * len(batch))
+        for word, sinhala, devanagari, thai in conn.execute(
+            f"""SELECT word, sinhala, devanagari, thai
+            FROM translit_cache
+            WHERE word IN ({placeholders})""",
+            batch
+        ):
+            translit_dict[word] = WordTranslit(
+                sinhala=json.loads(sinhala),
+                devanagari=json.loads(devanagari),
+                thai=json.loads(thai))
+    return translit_dict
+
+
+def save_translit_cache(
+        conn: sqlite3.Connection,
+        translit_dict: Dict[str, WordTranslit]
+) -> None:
+    conn.executemany(
+        "INSERT OR REPLACE INTO translit_cache VALUES (?, ?, ?, ?)",
+        [(
+            word,
+            json.dumps(translit["sinhala"], ensure_ascii=False),
+            json.dumps(translit["devanagari"], ensure_ascii=False),
+            json.dumps(translit["thai"], ensure_ascii=False))
+            for word, translit in translit_dict.items()])
+    conn.commit()
+
+
+def _transliterate_batch(
+    words: List[str],
+    node_worker_path: Path,
+    results_list: ListProxy,
+):
+    """Transliterate a batch of words with aksharamukha and path nirvana."""
+
+    # aksharamukha works much faster with large text files than smaller lists
+    words_string = "".join(f"{word}\n" for word in words)
+
+    sinhala: str = transliterate.process(
+        "IASTPali",
+        "Sinhala",
+        words_string,
+        post_options=["SinhalaPali"],
+    )  # type:ignore
+
+    devanagari: str = transliterate.process(
+        "IASTPali",
+        "Devanagari",
+        words_string,
+    )  # type:ignore
+
+    thai: str = transliterate.process(
+        "IASTPali",
+        "Thai",
+        words_string,
+    )  # type:ignore
+
+    word_sets: Dict[str, Dict[str, set]] = {
+        word: {"sinhala": {s}, "devanagari": {d}, "thai": {t}}
+        for word, s, d, t in zip(
+            words,
+            sinhala.split("\n"),
+            devanagari.split("\n"),
+            thai.split("\n"))}
+
+    # path nirvana transliteration using node.js
+    # pali-script.mjs produces different orthography from akshramusha
+
+    node_transliterator = NodeTransliterator(node_worker_path)
+    for start in range(0, len(words), node_chunk_size):
+        chunk = words[start:start + node_chunk_size]
+        new_translit = node_transliterator.transliterate(chunk)
+        for script in ["sinhala", "devanagari", "thai"]:
+            for word, word_translit in zip(chunk, new_translit[script]):
+                word_sets[word][script].add(word_translit)
+    node_transliterator.close()
+
+    results_list.append({
+        word: WordTranslit(
+            sinhala=sorted(sets["sinhala"]),
+            devanagari=sorted(sets["devanagari"]),
+            thai=sorted(sets["thai"]))
+        for word, sets in word_sets.items()})
+
+
+def transliterate_words(
+    words: List[str],
+    cache_path: Path,
+    node_worker_path: Path,
+) -> Dict[str, WordTranslit]:
+    """Transliterate a list of words, only sending the words which
+    are not in the cache to the transliterators."""
+
+    node_paths = [node_worker_path, node_worker_path.parent / "pali-script.mjs"]
+    conn = connect_translit_cache(
+        cache_path, make_transliterator_hash(node_paths))
+
+    unique_words = sorted(set(words))
+    translit_dict = load_translit_cache(conn, unique_words)
+    new_words = [word for word in unique_words if word not in translit_dict]
+
+    print(f"[green]{'cached words':<20}[white]{len(translit_dict):>10,}")
+    print(f"[green]{'new words':<20}[white]{len(new_words):>10,}")
+
+    if new_words:
+        num_logical_cores = psutil.cpu_count()
+        batches: List[List[str]] = list_into_batches(
+            new_words, num_logical_cores)
+
+        processes: List[Process] = []
+        manager = Manager()
+        results_list: ListProxy = manager.list()
+
+        for batch in batches:
+            p = Process(
+                target=_transliterate_batch,
+                args=(
+                    batch,
+                    node_worker_path,
+                    results_list,
+                ),
+            )
+            p.start()
+            processes.append(p)
+
+        for p in processes:
+            p.join()
+
+        new_translit_dict: Dict[str, WordTranslit] = {}
+        for results in results_list:
+            new_translit_dict.update(results)
+        save_translit_cache(conn, new_translit_dict)
+        translit_dict.update(new_translit_dict)
+
+        # a failed batch has no results, so its words would just be missing
+        failed_batches = [
+            f"batch {counter} of {len(batches)} "
+            f"({len(batch):,} words, {batch[0]} to {batch[-1]}) "
+            f"exited with {p.exitcode}"
+            for counter, (batch, p) in enumerate(zip(batches, processes), start=1)
+            if p.exitcode != 0]
+        if failed_batches:
+            conn.close()
+            raise RuntimeError(
+                "transliteration failed, see the error above: "
+                + "; ".join(failed_batches))
+
+    conn.close()
+    return translit_dict
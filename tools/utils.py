@@ -8,6 +8,7 @@ class DictEntry(TypedDict):
 
 class RenderedSizes(TypedDict):
     dpd_header: int
+    dpd_header_saved: int
     dpd_summary: int
     dpd_button_box: int
     dpd_grammar: int
@@ -44,6 +45,7 @@ class RenderedSizes(TypedDict):
 def default_rendered_sizes() -> RenderedSizes:
     return RenderedSizes(
         dpd_header = 0,
+        dpd_header_saved = 0,
         dpd_summary = 0,
         dpd_button_box = 0,
         dpd_grammar = 0,
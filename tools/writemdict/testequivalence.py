@@ -0,0 +1,151 @@
+"""
+testequivalence.py - tests that MDictWriter writes the same files as before
+it used precomputed sort keys, parallel compression and streamed record blocks.
+
+The reference writer sorts with the original mdict_cmp comparator, compresses
+every block in this process and builds the whole record section in memory.
+
+Usage:
+    python -m tools.writemdict.testequivalence
+"""
+
+import functools
+import io
+import locale
+import random
+import string
+import struct
+import sys
+
+from tools.writemdict.writemdict import MDictWriter, _MdxRecordBlock, regex_strip
+from tools.writemdict.writemdict import _compress_block
+
+
+def mdict_cmp(item1, item2, is_mdd):
+    # The original comparator, with prevent_link_to_link=True
+
+    key1 = item1[0].lower()
+    key2 = item2[0].lower()
+    if not is_mdd:
+        key1 = regex_strip.sub('', key1)
+        key2 = regex_strip.sub('', key2)
+    key1 = locale.strxfrm(key1)
+    key2 = locale.strxfrm(key2)
+    if key1 > key2:
+        return 1
+    elif key1 < key2:
+        return -1
+    if len(key1) > len(key2):
+        return -1
+    elif len(key1) < len(key2):
+        return 1
+    key1 = key1.rstrip(string.punctuation)
+    key2 = key2.rstrip(string.punctuation)
+    if key1 > key2:
+        return -1
+    elif key1 < key2:
+        return 1
+
+    value1 = item1[1].lower()
+    value2 = item2[1].lower()
+    if value1.startswith("@@@link=") and value2.startswith("@@@link="):
+        return 0
+    if value1.startswith("@@@link="):
+        return 1
+    if value2.startswith("@@@link="):
+        return -1
+    return 0
+
+
+class ReferenceMDictWriter(MDictWriter):
+
+    def __init__(self, d, title, description, **kwargs):
+        MDictWriter.__init__(self, d, title, description, processes=1, **kwargs)
+
+    def _mdict_sort_key(self, item):
+        cmp = functools.partial(mdict_cmp, is_mdd=self._is_mdd)
+        return functools.cmp_to_key(cmp)(item)
+
+    def _write_record_sect(self, outfile):
+        blocks = [
+            _compress_block(
+                self._offset_table, block_range, _MdxRecordBlock,
+                self._python_encoding, self._compression_type, self._version)
+            for block_range in self._record_block_ranges]
+        recordb_index = b"".join(
+            _MdxRecordBlock(len(comp_data), decomp_size, self._version)
+            .get_index_entry()
+            for comp_data, decomp_size in blocks)
+        if self._version == "2.0":
+            format = b">QQQQ"
+        else:
+            format = b">LLLL"
+        outfile.write(struct.pack(format,
+                            len(blocks),
+                            self._num_entries,
+                            len(recordb_index),
+                            sum(len(comp_data) for comp_data, __ in blocks)))
+        outfile.write(recordb_index)
+        for comp_data, __ in blocks:
+            outfile.write(comp_data)
+
+
+def make_test_data(num_words=20000):
+    # Keys with case variants, punctuation and spaces, and @@@LINK= synonyms
+    # which share their key with a definition.
+    random.seed(108)
+    letters = "aāiīuūeokgṅcjñṭḍṇtdnpbmyrlvsh"
+    data = []
+    for i in range(num_words):
+        word = "".join(
+            random.choice(letters) for __ in range(random.randint(1, 8)))
+        key = random.choice(
+            [word, word.upper(), f"{word}!", f"-{word}", f"{word} {i % 3}"])
+        if i % 4 == 0:
+            data.append((key, f"@@@LINK={word}"))
+        data.append((key, f"<p>{word} {'x' * random.randint(0, 300)} {i}</p>"))
+        if i % 7 == 0:
+            data.append((key, f"@@@link={word}{i}"))
+    return data
+
+
+def make_test_mdd(num_files=200):
+    random.seed(108)
+    return {
+        f"\\images\\{i}.png": bytes(random.getrandbits(8) for __ in range(1000))
+        for i in range(num_files)}
+
+
+def write_bytes(writer_class, d, **kwargs):
+    writer = writer_class(d, title="test", description="test", **kwargs)
+    outfile = io.BytesIO()
+    writer.write(outfile)
+    return outfile.getvalue()
+
+
+def main():
+    data = make_test_data()
+    tests = [
+        ("mdx", data, {}),
+        ("mdx small blocks", data, {"block_size": 4096}),
+        ("mdx version 1.2", data, {"version": "1.2"}),
+        ("mdx utf16", data, {"encoding": "utf16"}),
+        ("mdx encrypted index", data, {"encrypt_index": True}),
+        ("mdx no compression", data, {"compression_type": 0}),
+        ("mdd", make_test_mdd(), {"is_mdd": True, "block_size": 8192}),
+    ]
+
+    failed = 0
+    for name, d, kwargs in tests:
+        new = write_bytes(MDictWriter, d, processes=2, **kwargs)
+        reference = write_bytes(ReferenceMDictWriter, d, **kwargs)
+        if new == reference:
+            print(f"{name:<25}ok")
+        else:
+            print(f"{name:<25}FAILED")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
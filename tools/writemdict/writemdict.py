@@ -30,13 +30,13 @@ from __future__ import unicode_literals
 import re
 import string
 import struct
-import functools
 import locale
 
 import zlib
 import datetime
 
 from html import escape
+from multiprocessing import get_context
 from tools.writemdict.ripemd128 import ripemd128
 from tools.writemdict.pureSalsa20 import Salsa20
 
@@ -50,6 +50,9 @@ from tools.writemdict.pureSalsa20 import Salsa20
 # Not using lzo compression.
 HAVE_LZO = False
 
+# punctuation and spaces are ignored when sorting mdx keys
+regex_strip = re.compile('[%s ]+' % string.punctuation)
+
 class ParameterError(Exception):
     ### Raised when some parameter to MdxWriter is invalid or uninterpretable.
     pass
@@ -149,17 +152,53 @@ def encrypt_key(dict_key, **kwargs):
     return _hexdump(output_key)
 
 
+def _compress_block(offset_table, block_range, block_type, python_encoding,
+                    compression_type, version):
+    # Builds and compresses the data of one block.
+    #
+    # block_range is a tuple (start, end) of indices into offset_table.
+    #
+    # Returns a tuple of the compressed block and its decompressed size.
+    start, end = block_range
+    decomp_data = b"".join(
+        block_type._block_entry(t, python_encoding, version)
+        for t in offset_table[start:end])
+    return _mdx_compress(decomp_data, compression_type), len(decomp_data)
+
+
+# The arguments of _compress_block, apart from block_range,
+# set in each worker process of the compression pool.
+_block_worker_args = ()
+
+
+def _init_block_worker(*args):
+    # The workers are forked, so the offset table is shared, not pickled.
+    global _block_worker_args
+    _block_worker_args = args
+
+
+def _compress_block_worker(block_range):
+    offset_table, *args = _block_worker_args
+    return _compress_block(offset_table, block_range, *args)
+
+
 class _OffsetTableEntry(object):
     # Each OffsetTableEntry represents one key/record pair of the dictionary.
     # In addition to the values themselves, it contains information about
     # the offset at which this entry will be placed (i.e. the total length
     # of records before it) which is required by the MDX format.
-    def __init__(self, key, key_null, key_len, offset, record_null):
+    #
+    # The record is only encoded when its block is compressed, so the whole
+    # encoded dictionary never has to be held in memory.
+    __slots__ = ("key", "key_null", "key_len", "offset", "record", "record_len")
+
+    def __init__(self, key, key_null, key_len, offset, record, record_len):
         self.key = key
         self.key_null = key_null
         self.key_len = key_len
         self.offset = offset
-        self.record_null = record_null
+        self.record = record
+        self.record_len = record_len
 
 
 class MDictWriter(object):
@@ -174,10 +213,11 @@ class MDictWriter(object):
                  register_by=None,
                  user_email=None,
                  user_device_id=None,
-                 is_mdd=False):
+                 is_mdd=False,
+                 processes=None):
         """
-        Prepares the records. A subsequent call to write() writes
-        the mdx or mdd file.
+        Prepares the records and compresses the key blocks. A subsequent call
+        to write() compresses the record blocks and writes the mdx or mdd file.
 
         d is a dictionary. The keys should be (unicode) strings. If used for an mdx
           file (the parameter is_mdd is False), then the values should also be
@@ -232,6 +272,10 @@ class MDictWriter(object):
         is_mdd is a boolean specifying whether the file written will be an mdx file
           or an mdd file. By default this is False, meaning that an mdd file will
           be written.
+
+        processes is the number of worker processes used to compress the blocks.
+          By default this is the number of cores. With 1, or only one block,
+          the blocks are compressed in this process.
         """
 
         self._num_entries = len(d)
@@ -248,6 +292,7 @@ class MDictWriter(object):
         self._user_device_id = user_device_id
         self._compression_type = compression_type
         self._is_mdd = is_mdd
+        self._processes = processes
 
         # encoding is set to the string used in the mdx header.
         # python_encoding is passed on to the python .encode()
@@ -283,8 +328,23 @@ class MDictWriter(object):
         self._build_offset_table(d)
         self._build_key_blocks()
         self._build_keyb_index()
-        self._build_record_blocks()
-        self._build_recordb_index()
+        self._build_record_block_ranges()
+
+    def _mdict_sort_key(self, item):
+        # Returns the key of item, a (key, record) tuple, for sorting following
+        # the mdict standard. It is computed once per item.
+        #
+        # Keys are compared in lower case using the locale, and in an mdx file
+        # without punctuation and spaces. Among equal keys, @@@LINK= records
+        # come after the others, and otherwise the order of the items is kept.
+        key = item[0].lower()
+        if self._is_mdd:
+            return (locale.strxfrm(key), False)
+        key = regex_strip.sub('', key)
+
+        # dpd: link to link bug prevention (08.03.2023)
+        is_link = item[1][:8].lower().startswith("@@@link=")
+        return (locale.strxfrm(key), is_link)
 
     def _build_offset_table(self, d):
         # Sets self._offset_table to a table of entries _OffsetTableEntry objects e.
@@ -294,81 +354,17 @@ class MDictWriter(object):
         #  e.key_null: encoded version of the key, null-terminated
         #  e.key_len: the length of the key, in either bytes or 2-byte units, not counting the null character
         #        (as required by the MDX format in the keyword index)
-        #  e.offset: the cumulative sum of len(record_null) for preceding records
-        #  e.record_null: encoded version of the record, null-terminated
+        #  e.offset: the cumulative sum of record_len for preceding records
+        #  e.record: the record, as given
+        #  e.record_len: the length of the encoded record, null-terminated in an mdx file
         #
         # Also sets self._total_record_len to the total length of all record fields.
-        def mdict_cmp(item1, item2, prevent_link_to_link=True, sort_definitions=False):
-            # sort following mdict standard
-
-            key1 = item1[0]
-            key2 = item2[0]
-
-            key1 = key1.lower()
-            key2 = key2.lower()
-            if not self._is_mdd:
-                key1 = regex_strip.sub('', key1)
-                key2 = regex_strip.sub('', key2)
-            # locale key
-            key1 = locale.strxfrm(key1)
-            key2 = locale.strxfrm(key2)
-            if key1 > key2:
-                return 1
-            elif key1 < key2:
-                return -1
-            # reverse
-            if len(key1) > len(key2):
-                return -1
-            elif len(key1) < len(key2):
-                return 1
-            key1 = key1.rstrip(string.punctuation)
-            key2 = key2.rstrip(string.punctuation)
-            if key1 > key2:
-                return -1
-            elif key1 < key2:
-                return 1
-
-            # dpd: link to link bug prevention (08.03.2023)
-            if prevent_link_to_link or sort_definitions:
-                #if key1 & key2 are equal: compare the values
-                #if value 1&2 are links to another definition: dont change order
-                value1 = item1[1].lower()
-                value2 = item2[1].lower()
-                if value1.startswith("@@@link=") and value2.startswith("@@@link="):
-                    if sort_definitions:
-                        value1 = locale.strxfrm(value1)
-                        value2 = locale.strxfrm(value2)
-                        if value1 > value2:
-                            return 1
-                        if value1 < value2:
-                            return -1
-                    return 0
-                #if value1 is link, but value2 is not: link->lower pos
-                if value1.startswith("@@@link="):
-                    return 1
-                #if value2 is link, but value1 is not: link->lower pos
-                if value2.startswith("@@@link="):
-                    return -1
-                #disabled by default: sorting definitions is probably not neccessary..
-                if sort_definitions:
-                    #if value1&2 are both normal definitions, only compare the fist 50 characters 
-                    # (otherwise its probably some long html where the difference could just be some css)
-                    value1 = value1[:50]
-                    value2 = value2[:50]
-                    if value1 > value2:
-                        return 1
-                    if value1 < value2:
-                        return -1
-            return 0
-
-        pattern = '[%s ]+' % string.punctuation
-        regex_strip = re.compile(pattern)
 
         if isinstance(d, dict):
             items = list(d.items())
         else:
             items = list(d)
-        items.sort(key=functools.cmp_to_key(mdict_cmp))
+        items.sort(key=self._mdict_sort_key)
 
         self._offset_table = []
         offset = 0
@@ -377,26 +373,27 @@ class MDictWriter(object):
             key_null = (key+"\0").encode(self._python_encoding)
             key_len = len(key_enc) // self._encoding_length
 
-            # set record_null to a the the value of the record. If it's
-            # an MDX file, append an extra null character.
+            # If it's an MDX file, the record gets an extra null character.
             if self._is_mdd:
-                record_null = record
+                record_len = len(record)
             else:
-                record_null = (record+"\0").encode(self._python_encoding)
+                record_len = len((record+"\0").encode(self._python_encoding))
             self._offset_table.append(_OffsetTableEntry(
                 key=key_enc,
                 key_null=key_null,
                 key_len=key_len,
-                record_null=record_null,
+                record=record,
+                record_len=record_len,
                 offset=offset))
-            offset += len(record_null)
+            offset += record_len
         self._total_record_len = offset
 
     def _split_blocks(self, block_type):
         # Split either the records or the keys into blocks for compression.
         #
-        # Returns a list of _MdxBlock, where the decompressed size of each block is (as
-        # far as practicable) less than self._block_size.
+        # Returns a list of (start, end) ranges of self._offset_table, where the
+        # decompressed size of each block is (as far as practicable) less than
+        # self._block_size.
         #
         # block_type should be a subclass of _MdxBlock, i.e. either _MdxRecordBlock or
         # _MdxKeyBlock.
@@ -423,20 +420,43 @@ class MDictWriter(object):
             else:
                 flush = False
             if flush:
-                blocks.append(block_type(
-                    self._offset_table[this_block_start:ind], self._compression_type, self._version))
+                blocks.append((this_block_start, ind))
                 cur_size = 0
                 this_block_start = ind
             if t is not None:  # mentally add this entry to list of things
                 cur_size += block_type._len_block_entry(t)
         return blocks
 
+    def _compress_blocks(self, block_type, block_ranges):
+        # Yields a tuple of the compressed block and its decompressed size
+        # for each range in block_ranges, in order.
+        #
+        # The blocks are compressed in a pool of forked worker processes.
+
+        args = (self._offset_table, block_type, self._python_encoding,
+                self._compression_type, self._version)
+        if self._processes == 1 or len(block_ranges) < 2:
+            for block_range in block_ranges:
+                yield _compress_block(args[0], block_range, *args[1:])
+        else:
+            with get_context("fork").Pool(
+                    self._processes, _init_block_worker, args) as pool:
+                yield from pool.imap(_compress_block_worker, block_ranges)
+
     def _build_key_blocks(self):
         # Sets self._key_blocks to a list of _MdxKeyBlocks.
-        self._key_blocks = self._split_blocks(_MdxKeyBlock)
-
-    def _build_record_blocks(self):
-        self._record_blocks = self._split_blocks(_MdxRecordBlock)
+        block_ranges = self._split_blocks(_MdxKeyBlock)
+        compressed_blocks = self._compress_blocks(_MdxKeyBlock, block_ranges)
+        self._key_blocks = [
+            _MdxKeyBlock(
+                self._offset_table[start:end], comp_data, decomp_size, self._version)
+            for (start, end), (comp_data, decomp_size)
+            in zip(block_ranges, compressed_blocks)]
+
+    def _build_record_block_ranges(self):
+        # Sets self._record_block_ranges to the ranges of the record blocks,
+        # which are only compressed while writing.
+        self._record_block_ranges = self._split_blocks(_MdxRecordBlock)
 
     def _build_keyb_index(self):
         # Sets self._keyb_index to a bytes object, containing the index of key blocks, in
@@ -456,16 +476,6 @@ class MDictWriter(object):
         else:
             self._keyb_index = decomp_data
 
-    def _build_recordb_index(self):
-        # Sets self._recordb_index to a bytes object, containing the index of key blocks,
-        # in a format suitable for direct writing to the file.
-
-        # Also sets self._recordb_index_size.
-
-        self._recordb_index = b"".join(
-            (b.get_index_entry() for b in self._record_blocks))
-        self._recordb_index_size = len(self._recordb_index)
-
     def _write_key_sect(self, outfile):
         # Writes the key section header, key block index, and all the key blocks to
         # outfile.
@@ -503,28 +513,44 @@ class MDictWriter(object):
         # Writes the record section header, record block index, and all the record blocks
         # to outfile.
         #
-        # outfile: a file-like object, opened in binary mode.
+        # outfile: a file-like object, opened in binary mode. It must be seekable.
+        #
+        # Each record block is written as soon as it is compressed. The header and
+        # the index depend on the compressed sizes, so space is left for them and
+        # they are filled in afterwards.
 
-        recordblocks_total_size = sum(
-            (len(b.get_block()) for b in self._record_blocks))
         if self._version == "2.0":
             format = b">QQQQ"
         else:
             format = b">LLLL"
+        recordb_index_size = (
+            len(self._record_block_ranges) * _MdxRecordBlock.len_index_entry(self._version))
+        header_pos = outfile.tell()
+        outfile.write(b"\0" * (struct.calcsize(format) + recordb_index_size))
+
+        record_blocks = []
+        for comp_data, decomp_size in self._compress_blocks(
+                _MdxRecordBlock, self._record_block_ranges):
+            outfile.write(comp_data)
+            record_blocks.append(
+                _MdxRecordBlock(len(comp_data), decomp_size, self._version))
+        end_pos = outfile.tell()
+
+        recordblocks_total_size = sum(b.get_comp_size() for b in record_blocks)
+        outfile.seek(header_pos)
         outfile.write(struct.pack(format,
-                            len(self._record_blocks),
+                            len(record_blocks),
                             self._num_entries,
-                            self._recordb_index_size,
+                            recordb_index_size,
                             recordblocks_total_size))
-        outfile.write(self._recordb_index)
-        for b in self._record_blocks:
-            outfile.write(b.get_block())
+        outfile.write(b"".join(b.get_index_entry() for b in record_blocks))
+        outfile.seek(end_pos)
 
     def write(self, outfile):
         """ 
         Write the mdx file to outfile.
         
-        outfile: a file-like object, opened in binary mode.
+        outfile: a file-like object, opened in binary mode. It must be seekable.
         """
 
         self._write_header(outfile)
@@ -629,23 +655,15 @@ class _MdxBlock(object):
     # record blocks and keyword blocks, to allow the two sections to
     # be built in a uniform manner.
     #
+    # The data of a block is built and compressed by _compress_block().
 
-    def __init__(self, offset_table, compression_type, version):
-        # Builds the data from offset_table.
-        #
-        # offset_table is a iterable containing _OffsetTableEntry objects.
-
-        decomp_data = b"".join(
-            type(self)._block_entry(t, version)
-            for t in offset_table)
-        self._decomp_size = len(decomp_data)
-        self._comp_data = _mdx_compress(decomp_data, compression_type)
-        self._comp_size = len(self._comp_data)
+    def __init__(self, comp_size, decomp_size, version):
+        self._comp_size = comp_size
+        self._decomp_size = decomp_size
         self._version = version
 
-    def get_block(self):
-        # Returns a bytes object, containing the data for this block.
-        return self._comp_data
+    def get_comp_size(self):
+        return self._comp_size
 
     def get_index_entry(self):
         # Returns a bytes object, containing the entry for this block in the
@@ -654,7 +672,7 @@ class _MdxBlock(object):
         raise NotImplementedError()
 
     @staticmethod
-    def _block_entry(__t__, __version__):
+    def _block_entry(__t__, __python_encoding__, __version__):
         # Returns the data corresponding to a single entry in offset.
         #
         # t is an _OffsetTableEntry object
@@ -673,17 +691,11 @@ class _MdxRecordBlock(_MdxBlock):
     # A class representing a record block.
     #
     # Has the ability to return (in the format suitable for insertion in an mdx file)
-    # both the block itself, as well as the entry in the record block index for that
-    # block.
-
-    def __init__(self, offset_table, compression_type, version):
-        # Builds the data for offset_table.
-        #
-        # offset_table is a iterable containing _OffsetTableEntry objects.
-        #
-        # Actually only uses the record parts.
+    # the entry in the record block index for that block. The block itself is
+    # written to the file as soon as it is compressed.
 
-        _MdxBlock.__init__(self, offset_table, compression_type, version)
+    def __init__(self, comp_size, decomp_size, version):
+        _MdxBlock.__init__(self, comp_size, decomp_size, version)
 
     def get_index_entry(self):
         # Returns a bytes object, containing the entry for this block in the record
@@ -696,12 +708,23 @@ class _MdxRecordBlock(_MdxBlock):
         return struct.pack(format, self._comp_size, self._decomp_size)
 
     @staticmethod
-    def _block_entry(t, __version__):
-        return t.record_null
+    def len_index_entry(version):
+        # The length of get_index_entry(), known before the block is compressed.
+        if version == "2.0":
+            return 16
+        else:
+            return 8
+
+    @staticmethod
+    def _block_entry(t, python_encoding, __version__):
+        # mdd records are bytes already, mdx records get an extra null character.
+        if isinstance(t.record, bytes):
+            return t.record
+        return (t.record+"\0").encode(python_encoding)
 
     @staticmethod
     def _len_block_entry(t):
-        return len(t.record_null)
+        return t.record_len
 
 
 class _MdxKeyBlock(_MdxBlock):
@@ -710,14 +733,14 @@ class _MdxKeyBlock(_MdxBlock):
     # Has the ability to return (in the format suitable for insertion in an mdx file)
     # both the block itself, as well as the entry in the record block index for that
     # block.
-    def __init__(self, offset_table, compression_type, version):
-        # Builds the data for offset_table.
+    def __init__(self, offset_table, comp_data, decomp_size, version):
+        # offset_table is a iterable containing the _OffsetTableEntry objects of
+        # this block, and comp_data its compressed data.
         #
-        # offset_table is a iterable containing _OffsetTableEntry objects.
-        #
-        # Only uses the key, key_len, key_null and offset fields, and effectively ignores record_null.
+        # Only uses the key, key_len, key_null and offset fields, and effectively ignores the record.
 
-        _MdxBlock.__init__(self, offset_table, compression_type, version)
+        _MdxBlock.__init__(self, len(comp_data), decomp_size, version)
+        self._comp_data = comp_data
         self._num_entries = len(offset_table)
         if version == "2.0":
             self._first_key = offset_table[0].key_null
@@ -728,8 +751,12 @@ class _MdxKeyBlock(_MdxBlock):
         self._first_key_len = offset_table[0].key_len
         self._last_key_len = offset_table[len(offset_table)-1].key_len
 
+    def get_block(self):
+        # Returns a bytes object, containing the data for this block.
+        return self._comp_data
+
     @staticmethod
-    def _block_entry(t, version):
+    def _block_entry(t, __python_encoding__, version):
         if version == "2.0":
             format = b">Q"
         else: